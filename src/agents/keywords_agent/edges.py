@@ -1,5 +1,24 @@
 from typing import Literal
-from src.agents.keywords_agent.state import KeywordState
+from langgraph.types import Send
+from src.agents.keywords_agent.state import KeywordState, KeywordPlannerTask
+from src.utils.settings import settings
+
+def gkp_prefetch_urls() -> list[str]:
+    """
+    Urls of the keyword planner calls that only need the seed keywords: the seeds-only call ("") and the site url
+    (settings.GKP_SITE_URL) if one is configured.
+    """
+    return [""] + ([settings.GKP_SITE_URL] if settings.GKP_SITE_URL else [])
+
+
+def gkp_prefetch_enabled() -> bool:
+    """
+    Whether `keyword_planner_prefetch` starts the seeds-only calls. It needs the GKP cache: the fan-out sends the same
+    calls again and single flight only covers calls that are still running, a prefetch that already finished is served
+    by the cache or requested a second time.
+    """
+    return settings.GKP_PREFETCH_ENABLED and settings.GKP_CACHE_ENABLED
+
 
 async def route_to_query_or_analysis(state: KeywordState) -> Literal["query_generator", "competitor_analysis"]:
     """
@@ -7,7 +26,63 @@ async def route_to_query_or_analysis(state: KeywordState) -> Literal["query_gene
     If tool response contains sufficient competitor information, it will route to the "competitor_analysis" node.
     If tool response is not sufficient, it will route to the "query_generator" node to generate new search queries.
     
-    Updates:
-        - state._web_search_results_accumulated: updates it with the tool response. Adds the search queries to the tool response as well.
+    Reads:
+        - state.route_to: set by router_and_state_updater after it stored the results of the search round in state.web_search_results.
+    """
+    return state["route_to"]
+
+
+async def route_after_revision_check(
+    state: KeywordState,
+) -> Literal["query_generator", "masterlist_and_primary_keyword_generator"]:
     """
-    return state["route_to"]
\ No newline at end of file
+    Continue with the full research pipeline or, when revision_router reused the research of the previous revision,
+    directly with the masterlist.
+
+    Reads:
+        - state.revision_route: set by revision_router.
+    """
+    return state["revision_route"]
+
+
+def fan_out_keyword_planner(state: KeywordState) -> list[Send]:
+    """
+    Map step of the keyword planner map-reduce. Sends one `google_keyword_planner` call per top ranked competitor url
+    (up to settings.GKP_FANOUT_URLS) so all of them run in parallel in one super step. Their results are appended to
+    `planner_results` and reduced by `keyword_data_synthesizer`.
+
+    Competitors are ordered by rank and deduplicated by url because the LLM sometimes repeats ranks or urls.
+    The calls prefetched by `keyword_planner_prefetch` (seeds only and the site url) are sent as well. With prefetching
+    disabled and no competitor url available we still send one seed-keywords-only call (url="") so the pipeline can continue.
+    """
+    seed_keywords: list[str] = state.get("retrieved_entities", [])
+    competitor_information: list[dict[str, str | int]] = state.get("competitor_information", [])
+
+    # sort by rank (missing or invalid ranks go last), sorted() is stable so ties keep the LLM's order
+    ranked_competitors = sorted(
+        competitor_information,
+        key=lambda competitor: competitor.get("rank") if isinstance(competitor.get("rank"), int) else float("inf"),  # type: ignore
+    )
+
+    urls: list[str] = []
+    for competitor in ranked_competitors:
+        url: str = str(competitor.get("url") or "").strip()
+        if url and url not in urls:
+            urls.append(url)
+        if len(urls) >= settings.GKP_FANOUT_URLS:
+            break
+
+    # the seeds-only (and site url) calls started early by keyword_planner_prefetch merge in here, they are served by the
+    # GKP client's single flight or cache. Without prefetch the seeds-only call is only the fallback when no url is known
+    if gkp_prefetch_enabled():
+        urls += [url for url in gkp_prefetch_urls() if url not in urls]
+    elif not urls:
+        urls = [""]
+
+    return [
+        Send(
+            node="google_keyword_planner",
+            arg=KeywordPlannerTask(seed_keywords=seed_keywords, url=url, index=index),
+        )
+        for index, url in enumerate(urls)
+    ]
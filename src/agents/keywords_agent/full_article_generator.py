@@ -1,8 +1,9 @@
 # Generate a full article suggestion when this LLM runs
+from typing import Any, AsyncGenerator
 from langchain_core.messages import HumanMessage
 
 from src.utils.models_initializer import (
-    initialize_model_with_fallbacks,
+    lazy_model_with_fallbacks,
     get_mistral_model,
     get_openai_model,
 )
@@ -10,13 +11,17 @@ from src.utils.models_initializer import (
 from src.agents.keywords_agent.schemas import FullArticleGeneratorModel
 
 from src.agents.keywords_agent.prompts import FULL_ARTICLE_SUGGESTION_PROMPT
+from src.utils.prompt_budget import prompt_builder
+from src.utils.llm_usage import llm_usage
+from src.utils.model_router import STREAM_RESTART
+from src.utils.structured_stream import FieldDelta, field_deltas, reset_deltas
 
 from src.agents.keywords_agent.intermediate_state import (
     get_original_article_draft,
     get_sentence_level_suggestions
 )
 
-MODEL_WITH_FALLBACK_AND_STRUCTURED = initialize_model_with_fallbacks(
+MODEL_WITH_FALLBACK_AND_STRUCTURED = lazy_model_with_fallbacks(
     primary_model_fn=get_openai_model,
     primary_model_kwargs={"model_num": 1, "temperature": 0.2},
     fallback_model_fns=[get_mistral_model, get_openai_model],
@@ -25,24 +30,96 @@ MODEL_WITH_FALLBACK_AND_STRUCTURED = initialize_model_with_fallbacks(
         {"model_num": 2, "temperature": 0.2},
     ],
     structured_output_schema=FullArticleGeneratorModel,
+    node="full_article_generator",
 )
 
+# same models for the streaming endpoint: outputs are partial dicts while the article is written (see stream_full_article)
+STREAMING_MODEL_WITH_FALLBACK_AND_PARTIAL_JSON = lazy_model_with_fallbacks(
+    primary_model_fn=get_openai_model,
+    primary_model_kwargs={"model_num": 1, "temperature": 0.2},
+    fallback_model_fns=[get_mistral_model, get_openai_model],
+    fallback_model_kwargs_list=[
+        {"model_num": 1, "temperature": 0.2},
+        {"model_num": 2, "temperature": 0.2},
+    ],
+    structured_output_schema=FullArticleGeneratorModel,
+    node="full_article_generator",
+    partial_json=True,
+)
+
+# schema field -> field name of the streamed deltas
+STREAM_FIELDS: dict[str, str] = {"content": "article_suggestion"}
+
+# this runs outside the graph, so name the node for the usage tracker ourselves
+MODEL_CONFIG: dict = {"callbacks": [llm_usage], "metadata": {"node": "full_article_generator"}}
+
 
-async def suggest_full_article() -> str:
+async def build_full_article_prompt(run_id: str) -> str:
     """
-    suggest a full revised article using the sentence level suggestions suggested earlier. We assume suggestions.txt already has the sentence level suggestions.
+    Format the prompt with the original article draft and sentence level suggestions of a keyword agent run.
+    Both are needed in full to rewrite the article, so nothing is trimmable here (the prompt size is only measured)
+
+    Raises:
+        SessionNotFoundError: If the run id is unknown or expired.
+    """
+    return prompt_builder.build(
+        node="full_article_generator",
+        template=FULL_ARTICLE_SUGGESTION_PROMPT,
+        original_article_draft=await get_original_article_draft(run_id),
+        sentence_level_suggestions=await get_sentence_level_suggestions(run_id),
+    )
+
+
+async def suggest_full_article(run_id: str) -> str:
+    """
+    suggest a full revised article using the sentence level suggestions of an earlier keyword agent run.
     for now this is a quick hack, later we will integrate this using subgraphs or add this as a node to the keywords agent graph.
 
+    Args:
+        run_id (str): The run id sent in the keyword agent stream ({"type": "run_id", ...} event).
+
     Returns:
         str: The full article suggestion.
     """
-    # format the prompt with the original article draft and sentence level suggestions
-    prompt = FULL_ARTICLE_SUGGESTION_PROMPT.format(
-        original_article_draft=get_original_article_draft(),
-        sentence_level_suggestions=get_sentence_level_suggestions(),
-    )
+    prompt: str = await build_full_article_prompt(run_id)
 
     # Generate the full article suggestion using the model
-    full_article_suggestion: FullArticleGeneratorModel = await MODEL_WITH_FALLBACK_AND_STRUCTURED.ainvoke([HumanMessage(content=prompt)])  # type: ignore
+    full_article_suggestion: FullArticleGeneratorModel = await MODEL_WITH_FALLBACK_AND_STRUCTURED.ainvoke(
+        [HumanMessage(content=prompt)], config=MODEL_CONFIG
+    )  # type: ignore
+
+    return full_article_suggestion.content
+
+
+async def stream_full_article(run_id: str) -> AsyncGenerator[FieldDelta, None]:
+    """
+    Same as `suggest_full_article` but yields the article while the model writes it.
+
+    Args:
+        run_id (str): The run id sent in the keyword agent stream ({"type": "run_id", ...} event).
+
+    Yields:
+        FieldDelta: Text added to the "article_suggestion" field since the previous delta (replace instead of append if
+            `reset`, an empty reset delta means a fallback model starts the article over).
+
+    Raises:
+        pydantic.ValidationError: If no model produced an article matching FullArticleGeneratorModel.
+    """
+    prompt: str = await build_full_article_prompt(run_id)
+
+    partial_response: dict[str, Any] = {}
+    async for chunk in STREAMING_MODEL_WITH_FALLBACK_AND_PARTIAL_JSON.astream([HumanMessage(content=prompt)], config=MODEL_CONFIG):
+        if chunk is STREAM_RESTART:
+            # the model failed mid article and the next one starts over
+            for delta in reset_deltas(partial_response, STREAM_FIELDS):
+                yield delta
+            partial_response = {}
+            continue
+        if not isinstance(chunk, dict):
+            continue
+        for delta in field_deltas(partial_response, chunk, STREAM_FIELDS):
+            yield delta
+        partial_response = chunk
 
-    return full_article_suggestion.content
\ No newline at end of file
+    # the router validated the last partial output already, this only guards chains without one
+    FullArticleGeneratorModel.model_validate(partial_response)
\ No newline at end of file
@@ -1,9 +1,13 @@
 # typing
-from typing import AsyncGenerator
+import uuid
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncGenerator
 from src.agents.keywords_agent.intermediate_state import (
-    set_original_article_draft,
-    clear_intermediate_state,
+    start_run_session,
+    get_latest_revision,
+    set_latest_revision,
 )
+from src.agents.keywords_agent.revisions import load_previous_revision, save_revision
 
 # Langgraph imports
 from langgraph.graph import StateGraph, START, END
@@ -11,24 +15,35 @@ from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.graph.state import CompiledStateGraph
 
 # our custom state, tools, nodes
-from src.agents.keywords_agent.state import KeywordState
+from src.agents.keywords_agent.state import KeywordState, PreviousRevision
 from src.tools.web_search_tool import WebSearch, dummy_web_search_tool
-from src.agents.keywords_agent.edges import route_to_query_or_analysis
+from src.tools.google_keywords_api import gkp
+from src.agents.keywords_agent.edges import (
+    route_to_query_or_analysis,
+    route_after_revision_check,
+    fan_out_keyword_planner,
+)
 from src.agents.keywords_agent.nodes import (
     entity_extractor,
+    revision_router,
+    keyword_planner_prefetch,
     query_generator,
     competitor_analysis,
-    google_keyword_planner1,
-    google_keyword_planner2,
+    google_keyword_planner,
     keyword_data_synthesizer,
     masterlist_and_primary_keyword_generator,
     suggestions_generator,
     router_and_state_updater,
 )
 from src.utils.settings import settings, get_key
+from src.utils.rate_limiter import current_run_id
+from src.utils.llm_usage import llm_usage
+from src.utils.checkpointer import graph_checkpointer
+from src.utils.session_store import session_store
+from src.utils.shared_runs import article_key, shared_runs
 
-# For Opik observability
-from opik.integrations.langchain import OpikTracer
+if TYPE_CHECKING:
+    from opik.integrations.langchain import OpikTracer
 
 opik_api_key: str | None = get_key(settings.OPIK_API_KEY)
 opik_workspace: str | None = get_key(settings.OPIK_WORKSPACE)
@@ -39,139 +54,269 @@ import dotenv
 
 dotenv.load_dotenv()
 
-# initialize graph
-graph_builder = StateGraph(state_schema=KeywordState)
-
-# initialize tools
-tool_list = [WebSearch()]
-# tool_list = [dummy_web_search_tool]  # testing
-
-# Add Nodes
-graph_builder.add_node(node="entity_extractor", action=entity_extractor)
-graph_builder.add_node(node="query_generator", action=query_generator)
-graph_builder.add_node(node="competitor_analysis", action=competitor_analysis)
-graph_builder.add_node(node="web_search_tool", action=ToolNode(tools=tool_list))
-graph_builder.add_node(node="router_and_state_updater", action=router_and_state_updater)
-graph_builder.add_node(node="google_keyword_planner1", action=google_keyword_planner1)
-graph_builder.add_node(node="google_keyword_planner2", action=google_keyword_planner2)
-graph_builder.add_node(node="keyword_data_synthesizer", action=keyword_data_synthesizer)
-graph_builder.add_node(
-    node="masterlist_and_primary_keyword_generator",
-    action=masterlist_and_primary_keyword_generator,
-)
-graph_builder.add_node(node="suggestions_generator", action=suggestions_generator)
-
-# Add Edges
-graph_builder.add_edge(start_key=START, end_key="entity_extractor")
-graph_builder.add_edge(start_key="entity_extractor", end_key="query_generator")
-
-# if this confuses you refer to: https://www.baihezi.com/mirrors/langgraph/reference/prebuilt/index.html#tools_condition
-graph_builder.add_conditional_edges(
-    source="query_generator",
-    path=tools_condition,
-    path_map={
-        # If it returns 'action', route to the 'web_search_tool' node
-        "tools": "web_search_tool",
-        # If it returns '__end__', route to the 'router_and_state_updater' node. This should never happen but just in case.
-        "__end__": "router_and_state_updater",
-    },
-)
-graph_builder.add_edge(start_key="web_search_tool", end_key="router_and_state_updater")
-
-# this is a loopback edge to allow the agent to retry the tool call
-graph_builder.add_conditional_edges(
-    source="router_and_state_updater",
-    path=route_to_query_or_analysis,
-    path_map={
-        "query_generator": "query_generator",
-        "competitor_analysis": "competitor_analysis",
-    },
-)
-# add parallel edges from competitor_analysis to google_keyword_planner1 and google_keyword_planner2
-graph_builder.add_edge(
-    start_key="competitor_analysis",
-    end_key="google_keyword_planner1",
-)
-graph_builder.add_edge(
-    start_key="competitor_analysis",
-    end_key="google_keyword_planner2",
-)
-# add edges from google_keyword_planner1 and google_keyword_planner2 to keyword_data_synthesizer
-graph_builder.add_edge(
-    start_key="google_keyword_planner1",
-    end_key="keyword_data_synthesizer",
-)
-graph_builder.add_edge(
-    start_key="google_keyword_planner2",
-    end_key="keyword_data_synthesizer",
-)
-# now synthesizer will route to masterlist_and_primary_keyword_generator
-graph_builder.add_edge(
-    start_key="keyword_data_synthesizer",
-    end_key="masterlist_and_primary_keyword_generator",
-)
-graph_builder.add_edge(
-    start_key="masterlist_and_primary_keyword_generator",
-    end_key="suggestions_generator",
-)
-graph_builder.add_edge(
-    start_key="suggestions_generator",
-    end_key=END,
-)
 
-# Compile the graph
-keyword_agent: CompiledStateGraph = graph_builder.compile()
+def build_keyword_agent() -> CompiledStateGraph:
+    """
+    Build and compile the keyword agent graph.
 
-# Add Opik Tracer
-tracer = OpikTracer(
-    graph=keyword_agent.get_graph(xray=True), project_name=opik_project_name
-)
+    Returns:
+        CompiledStateGraph: The compiled keyword agent.
+    """
+    # initialize graph
+    graph_builder = StateGraph(state_schema=KeywordState)
+
+    # initialize tools
+    tool_list = [WebSearch()]
+    # tool_list = [dummy_web_search_tool]  # testing
+
+    # Add Nodes
+    graph_builder.add_node(node="entity_extractor", action=entity_extractor)
+    graph_builder.add_node(node="revision_router", action=revision_router)
+    graph_builder.add_node(node="keyword_planner_prefetch", action=keyword_planner_prefetch)
+    graph_builder.add_node(node="query_generator", action=query_generator)
+    graph_builder.add_node(node="competitor_analysis", action=competitor_analysis)
+    graph_builder.add_node(node="web_search_tool", action=ToolNode(tools=tool_list))
+    graph_builder.add_node(node="router_and_state_updater", action=router_and_state_updater)
+    graph_builder.add_node(node="google_keyword_planner", action=google_keyword_planner)
+    graph_builder.add_node(node="keyword_data_synthesizer", action=keyword_data_synthesizer)
+    graph_builder.add_node(
+        node="masterlist_and_primary_keyword_generator",
+        action=masterlist_and_primary_keyword_generator,
+    )
+    graph_builder.add_node(node="suggestions_generator", action=suggestions_generator)
+
+    # Add Edges
+    graph_builder.add_edge(start_key=START, end_key="entity_extractor")
+    graph_builder.add_edge(start_key="entity_extractor", end_key="revision_router")
+
+    # speculative branch: start the GKP calls that only need the seed keywords while the search loop runs.
+    # It returns at once, its results merge in through the keyword planner fan-out (see keyword_planner_prefetch)
+    graph_builder.add_edge(start_key="entity_extractor", end_key="keyword_planner_prefetch")
+    graph_builder.add_edge(start_key="keyword_planner_prefetch", end_key=END)
+
+    # revision-aware mode: an edited draft whose topic didn't change reuses the previous research and skips to the masterlist
+    graph_builder.add_conditional_edges(
+        source="revision_router",
+        path=route_after_revision_check,
+        path_map={
+            "query_generator": "query_generator",
+            "masterlist_and_primary_keyword_generator": "masterlist_and_primary_keyword_generator",
+        },
+    )
+
+    # if this confuses you refer to: https://www.baihezi.com/mirrors/langgraph/reference/prebuilt/index.html#tools_condition
+    graph_builder.add_conditional_edges(
+        source="query_generator",
+        path=tools_condition,
+        path_map={
+            # If it returns 'action', route to the 'web_search_tool' node
+            "tools": "web_search_tool",
+            # If it returns '__end__', route to the 'router_and_state_updater' node. This should never happen but just in case.
+            "__end__": "router_and_state_updater",
+        },
+    )
+    graph_builder.add_edge(start_key="web_search_tool", end_key="router_and_state_updater")
+
+    # this is a loopback edge to allow the agent to retry the tool call
+    graph_builder.add_conditional_edges(
+        source="router_and_state_updater",
+        path=route_to_query_or_analysis,
+        path_map={
+            "query_generator": "query_generator",
+            "competitor_analysis": "competitor_analysis",
+        },
+    )
+    # map-reduce: competitor_analysis fans out one google_keyword_planner call per top competitor url (Send), all run in parallel in one super step
+    graph_builder.add_conditional_edges(
+        source="competitor_analysis",
+        path=fan_out_keyword_planner,
+        path_map=["google_keyword_planner"],
+    )
+    # every google_keyword_planner call appends to planner_results, the synthesizer runs once after all of them complete
+    graph_builder.add_edge(
+        start_key="google_keyword_planner",
+        end_key="keyword_data_synthesizer",
+    )
+    # now synthesizer will route to masterlist_and_primary_keyword_generator
+    graph_builder.add_edge(
+        start_key="keyword_data_synthesizer",
+        end_key="masterlist_and_primary_keyword_generator",
+    )
+    graph_builder.add_edge(
+        start_key="masterlist_and_primary_keyword_generator",
+        end_key="suggestions_generator",
+    )
+    graph_builder.add_edge(
+        start_key="suggestions_generator",
+        end_key=END,
+    )
+
+    # Compile the graph
+    return graph_builder.compile()
+
+
+@lru_cache(maxsize=1)
+def get_keyword_agent() -> CompiledStateGraph:
+    """
+    The compiled keyword agent, built on first use (importing this module stays cheap for the API and the mock server).
+    """
+    return build_keyword_agent()
+
+
+@lru_cache(maxsize=1)
+def get_tracer() -> "OpikTracer":
+    """
+    The Opik tracer of the keyword agent, built on first use. Opik is only imported here.
+    """
+    # For Opik observability
+    from opik.integrations.langchain import OpikTracer
+
+    return OpikTracer(graph=get_keyword_agent().get_graph(xray=True), project_name=opik_project_name)
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Keep `keyword_agent` and `tracer` importable as module attributes (langgraph.json points at `graph.py:keyword_agent`)
+    while building them lazily.
+    """
+    if name == "keyword_agent":
+        return get_keyword_agent()
+    if name == "tracer":
+        return get_tracer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def get_checkpointed_keyword_agent() -> CompiledStateGraph:
+    """
+    The keyword agent with the SQLite checkpointer attached (the plain agent if checkpointing is disabled).
+    The checkpointer is only attached here so the LangGraph dev server (langgraph.json) can keep using its own.
+    """
+    if graph_checkpointer is None:
+        return get_keyword_agent()
+    return get_keyword_agent().copy(update={"checkpointer": await graph_checkpointer.get()})
+
+
+async def _stream_agent_run(input: dict[str, Any] | None, run_id: str) -> AsyncGenerator:
+    """
+    Stream a run of the keyword agent on thread `run_id` and forward its custom events.
+    `input` None continues the thread from its last checkpoint.
+    """
+    agent: CompiledStateGraph = await get_checkpointed_keyword_agent()
+    failed: bool = False
+    # latest full state of the run, its research is kept for the next revision of the draft
+    values: dict[str, Any] | None = None
+
+    # the thread's last activity, threads nobody resumes for CHECKPOINT_TTL_SECONDS are pruned
+    if graph_checkpointer is not None:
+        await graph_checkpointer.touch(run_id)
+
+    stream = agent.astream(
+        input=input,
+        stream_mode=["custom", "values"],
+        # llm_usage records per node token usage and prompt cache hits. The thread id keys the run's checkpoints
+        config={"callbacks": [get_tracer(), llm_usage], "configurable": {"thread_id": run_id}},
+    )
+    try:
+        async for mode, update in stream:
+            if mode == "values":
+                values = update
+                continue
+
+            print("\n\n******************")
+            print(update)
+            print("\n")
+
+            # check if error was yielded, in which case we yield that error message but break the graph execution
+            if isinstance(update, dict) and update.get("type") == "error":
+                failed = True
+                yield update
+                break
+
+            # otherwise we can yield the update as a normal event and keep the graph execution going
+            yield update
+    except Exception as e:
+        # nodes stream their error event before they raise, errors outside of the nodes (i.e. checkpoint writes) don't
+        print(f"Agent run {run_id} failed: {e}")
+        if not failed:
+            yield {"type": "error", "content": str(e)}
+        failed = True
+    finally:
+        # stop the graph right away (not when the generator is garbage collected) and flush its pending checkpoints,
+        # so a resume sees the last completed step
+        await stream.aclose()
+        # the speculative GKP calls of a run that failed or whose client went away aren't waited for anymore
+        await gkp.cancel_prefetches(run_id)
+
+    if failed:
+        return
+
+    if values is not None:
+        await save_revision(run_id, values)
+
+    # a completed run won't be resumed, its checkpoints are only dead weight in the file
+    if graph_checkpointer is not None and not settings.CHECKPOINT_KEEP_COMPLETED:
+        await graph_checkpointer.delete_thread(run_id)
 
 
 # Run the agent
-async def run_keyword_agent_stream(user_input: str) -> AsyncGenerator:
+async def run_keyword_agent_stream(
+    user_input: str,
+    run_id: str | None = None,
+    previous_run_id: str | None = None,
+) -> AsyncGenerator:
     """
     Runs the LangGraph workflow with streaming output and yields updates as a dictionary.
-    It sets the initial state of "messages" and "user_input" channels and starts the agent workflow.
+    It sets the initial state of "messages", "user_input", "run_id" and "previous_revision" channels and starts the agent workflow.
 
     Args:
         user_input (str): The user's input article string to be processed by the agent.
+        run_id (str | None): Id of this run. A new one is generated if not given.
+        previous_run_id (str | None): Run of the previous revision of this draft. Its research is reused when the
+            draft and its entities didn't change much (see revisions.py).
 
     Yields:
         AsyncGenerator: Yields updates from the agent workflow as dictionaries.
 
         Possible output types are:
+        - {"type": "run_id", "content": str} (always the first event)
         - {"type": "error", "content": str}
         - {"type": "complete", "content": str}
         - {"type": "internal", "event_status": "new" or "old", "node": str, "content": str}
         - {"type": "internal_content", "event_status": "old", "node": str, "content": array}
+        - {"type": "answer_delta", "event_status": "new", "node": str, "content": {"field": str, "index": int | None, "delta": str, "reset": bool}}
         - {"type": "answer", "event_status": "new", "node": str, "content": dict}
 
     Note:
         Note that "internal_content" has to be an array of strings because frontend expects it to be an array.
+        "answer_delta" events stream the answer while it is generated (append `delta` to the field, or to item `index` of
+        a list field, replace it if `reset`). The complete "answer" event still follows, so clients may ignore the deltas.
+        The "run_id" is what the full article endpoints expect to find this run's article and suggestions, and what
+        `resume_keyword_agent_stream` expects to continue the run if it fails or the connection drops.
     """
-    # Clear any previous intermediate state to ensure clean execution
-    clear_intermediate_state()
+    run_id = run_id or uuid.uuid4().hex
 
-    # set intermediate state with article draft
-    set_original_article_draft(user_input)
+    # tag every provider call of this run so the rate limiter can queue runs fairly against each other.
+    # Each request streams in its own task, so the value doesn't leak into other runs.
+    current_run_id.set(run_id)
 
     try:
-        async for update in keyword_agent.astream(
-            input={"messages": user_input, "user_input": user_input},
-            stream_mode="custom",
-            config={"callbacks": [tracer]},
-        ):
-            print("\n\n******************")
-            print(update)
-            print("\n")
+        # the run's session keeps the article draft (and later the suggestions) for the full article endpoint
+        await start_run_session(run_id, user_input)
+        yield {"type": "run_id", "content": run_id}
 
-            # check if error was yielded, in which case we yield that error message but break the graph execution
-            if isinstance(update, dict) and update.get("type") == "error":
-                yield update
-                break
+        previous_revision: PreviousRevision | None = (
+            await load_previous_revision(previous_run_id, user_input) if previous_run_id else None
+        )
 
-            # otherwise we can yield the update as a normal event and keep the graph execution going
+        async for update in _stream_agent_run(
+            input={
+                "messages": user_input,
+                "user_input": user_input,
+                "run_id": run_id,
+                "previous_revision": previous_revision,
+            },
+            run_id=run_id,
+        ):
             yield update
 
         # Yield a final message indicating completion so connection can be closed gracefully
@@ -180,3 +325,78 @@ async def run_keyword_agent_stream(user_input: str) -> AsyncGenerator:
     except Exception as e:
         print(f"Error initializing agent: {e}")
         yield {"type": "error", "content": str(e)}
+
+
+async def run_shared_keyword_agent_stream(user_input: str, session_id: str | None = None) -> AsyncGenerator:
+    """
+    Same events as `run_keyword_agent_stream`, but identical articles share one run: a submission attaches to the run
+    of the same article that is in flight (earlier events are replayed first) or, shortly after it completed, is
+    served its stored events. Everyone attached to a run gets the same run id.
+
+    Args:
+        user_input (str): The user's input article string to be processed by the agent.
+        session_id (str | None): Editing session of the draft (i.e. the document id). A new revision reuses the
+            research of the session's previous revision when its topic didn't change.
+    """
+    previous_run_id: str | None = await get_latest_revision(session_id) if session_id else None
+
+    def start() -> AsyncGenerator:
+        return run_keyword_agent_stream(user_input, previous_run_id=previous_run_id)
+
+    updates: AsyncGenerator = (
+        shared_runs.subscribe(article_key(user_input), start) if shared_runs is not None else start()
+    )
+
+    run_id: str | None = None
+    failed: bool = False
+    async for update in updates:
+        if isinstance(update, dict):
+            if update.get("type") == "run_id":
+                run_id = update["content"]
+            elif update.get("type") == "error":
+                failed = True
+        yield update
+
+    # this run is the revision the next submission of the session is compared against
+    if session_id and run_id and not failed:
+        await set_latest_revision(session_id, run_id)
+
+
+async def resume_keyword_agent_stream(run_id: str) -> AsyncGenerator:
+    """
+    Continues a failed or interrupted run from its last completed super step (needs CHECKPOINT_ENABLED).
+    Nodes that already completed are not run again, so the stream only carries the events of the remaining nodes.
+
+    Args:
+        run_id (str): The run id sent as the first event of the original run.
+
+    Yields:
+        AsyncGenerator: Same events as `run_keyword_agent_stream`.
+    """
+    if graph_checkpointer is None:
+        yield {"type": "error", "content": "Runs can't be resumed, checkpointing is disabled (CHECKPOINT_ENABLED=false)"}
+        return
+
+    current_run_id.set(run_id)
+
+    try:
+        agent: CompiledStateGraph = await get_checkpointed_keyword_agent()
+        snapshot = await agent.aget_state(config={"configurable": {"thread_id": run_id}})
+        # no checkpoint at all (unknown id, or a completed run whose checkpoints were deleted) or nothing left to run
+        if not snapshot.values or not snapshot.next:
+            yield {"type": "error", "content": f"Run {run_id} can't be resumed, it is unknown or already completed"}
+            return
+
+        # the session may have expired meanwhile, the draft is part of the checkpointed state
+        if await session_store.get(run_id) is None:
+            await start_run_session(run_id, snapshot.values["user_input"])
+        yield {"type": "run_id", "content": run_id}
+
+        async for update in _stream_agent_run(input=None, run_id=run_id):
+            yield update
+
+        yield {"type": "complete", "content": "Agent workflow completed"}
+
+    except Exception as e:
+        print(f"Error resuming agent run {run_id}: {e}")
+        yield {"type": "error", "content": str(e)}
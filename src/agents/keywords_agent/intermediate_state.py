@@ -1,50 +1,97 @@
-# Global variables to store intermediate state during graph execution
-original_article_draft: str = ""
-sentence_level_suggestions: str = ""
+# Intermediate state of a run that is needed after the graph finished (i.e. by the full article endpoint).
+# It lives in the session store keyed by the run id, so concurrent runs (and other workers) never see each other's data.
+from typing import Any
 
-def set_original_article_draft(draft: str) -> None:
+from src.utils.session_store import session_store
+
+
+async def start_run_session(run_id: str, draft: str) -> None:
     """
-    Set the original article draft that will be used for full article generation.
-    
+    Create the session of a new run with the original article draft that will be used for full article generation.
+
     Args:
+        run_id (str): The run id (also sent to the client in the SSE stream).
         draft (str): The original article draft content provided by the user.
     """
-    global original_article_draft
-    original_article_draft = draft
-    
-def set_sentence_level_suggestions(suggestions: str) -> None:
+    await session_store.create(run_id, original_article_draft=draft, sentence_level_suggestions="")
+
+
+async def set_sentence_level_suggestions(run_id: str, suggestions: str) -> None:
     """
     Set the sentence level suggestions generated during the keyword analysis workflow.
-    
+
     Args:
+        run_id (str): The run the suggestions belong to.
         suggestions (str): The sentence level suggestions content for article improvement.
     """
-    global sentence_level_suggestions
-    sentence_level_suggestions = suggestions
+    await session_store.update(run_id, sentence_level_suggestions=suggestions)
+
+
+async def get_original_article_draft(run_id: str) -> str:
+    """
+    Retrieve the original article draft of a run.
+
+    Returns:
+        str: The original article draft content.
+
+    Raises:
+        SessionNotFoundError: If the run id is unknown or expired.
+    """
+    session = await session_store.require(run_id)
+    return session.get("original_article_draft", "")
+
 
-def get_original_article_draft() -> str:
+async def get_sentence_level_suggestions(run_id: str) -> str:
     """
-    Retrieve the original article draft.
-    
+    Retrieve the sentence level suggestions of a run.
+
     Returns:
-        str: The original article draft content, or empty string if not set.
+        str: The sentence level suggestions content, or empty string if the run didn't produce them (yet).
+
+    Raises:
+        SessionNotFoundError: If the run id is unknown or expired.
     """
-    return original_article_draft
+    session = await session_store.require(run_id)
+    return session.get("sentence_level_suggestions", "")
 
-def get_sentence_level_suggestions() -> str:
+
+async def set_revision_artifacts(run_id: str, artifacts: dict[str, Any]) -> None:
+    """
+    Keep the research of a completed run, so the next revision of the draft can reuse it (see revisions.py).
+
+    Args:
+        run_id (str): The run that produced the research.
+        artifacts (dict[str, Any]): The reusable state fields and the entities the research was done with.
     """
-    Retrieve the sentence level suggestions.
-    
+    await session_store.update(run_id, revision_artifacts=artifacts)
+
+
+async def get_revision_artifacts(run_id: str) -> dict[str, Any] | None:
+    """
+    Retrieve the research of a completed run.
+
     Returns:
-        str: The sentence level suggestions content, or empty string if not set.
+        dict[str, Any] | None: The artifacts, None if the run is unknown, expired or didn't complete.
     """
-    return sentence_level_suggestions
+    session = await session_store.get(run_id)
+    return session.get("revision_artifacts") if session is not None else None
 
-def clear_intermediate_state() -> None:
+
+async def set_latest_revision(session_id: str, run_id: str) -> None:
+    """
+    Remember the latest completed run of an editing session (one draft that is re-submitted while it is edited).
+
+    Args:
+        session_id (str): The editing session sent by the client (i.e. the document id).
+        run_id (str): The run of the latest revision.
     """
-    Clear all intermediate state variables. This should be called at the start
-    of each new workflow execution to prevent data from previous runs.
+    await session_store.update(f"editing:{session_id}", latest_run_id=run_id)
+
+
+async def get_latest_revision(session_id: str) -> str | None:
+    """
+    Returns:
+        str | None: The run id of the latest completed revision of an editing session, None for a new session.
     """
-    global original_article_draft, sentence_level_suggestions
-    original_article_draft = ""
-    sentence_level_suggestions = ""
\ No newline at end of file
+    session = await session_store.get(f"editing:{session_id}")
+    return session.get("latest_run_id") if session is not None else None
@@ -3,17 +3,29 @@ Write all the node functions for the keywords agent here.
 """
 
 import datetime
-import json
 from typing import Any
 
-from src.agents.keywords_agent.state import KeywordState
+from src.agents.keywords_agent.state import (
+    KeywordState,
+    KeywordPlannerTask,
+    WebSearchRecord,
+    merge_web_search_results,
+)
 from src.agents.keywords_agent.intermediate_state import set_sentence_level_suggestions
-from langchain_core.messages import HumanMessage
+from src.agents.keywords_agent.revisions import can_reuse_research
+from src.agents.keywords_agent.edges import gkp_prefetch_enabled, gkp_prefetch_urls
+from langchain_core.messages import HumanMessage, ToolMessage
 from langgraph.config import get_stream_writer
 
-from src.tools.google_keywords_api import GoogleKeywordsAPI
+from src.tools.google_keywords_api import gkp
+from src.tools.keyword_metrics import KeywordMetricsTable
+from src.tools.competitor_relevance import RelevanceDecision, competitor_scorer
+from src.utils.settings import settings
+from src.utils.prompt_budget import BudgetedInput, prompt_builder
+from src.utils.model_router import STREAM_RESTART
+from src.utils.structured_stream import FieldDelta, field_deltas, reset_deltas
 from src.utils.models_initializer import (
-    initialize_model_with_fallbacks,
+    lazy_model_with_fallbacks,
     get_gemini_model,
     get_groq_model,
     get_mistral_model,
@@ -36,13 +48,17 @@ from src.agents.keywords_agent.schemas import (
 )
 from src.tools.web_search_tool import WebSearch
 
-# get current time to feed into all prompts
-CURRENT_TIME: str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+def get_current_time() -> str:
+    """
+    Current time to feed into all prompts. Read per prompt (not once at import) since it is per-request data that goes in
+    the CURRENT TIME section after the static instructions.
+    """
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 # #################
 # Entity Extractor Model
 # #################
-ENTITIES_MODEL_WITH_FALLBACK_AND_STRUCTURED = initialize_model_with_fallbacks(
+ENTITIES_MODEL_WITH_FALLBACK_AND_STRUCTURED = lazy_model_with_fallbacks(
     primary_model_fn=get_openai_model,
     primary_model_kwargs={"model_num": 1, "temperature": 0.5},
     fallback_model_fns=[get_groq_model, get_mistral_model],
@@ -51,12 +67,13 @@ ENTITIES_MODEL_WITH_FALLBACK_AND_STRUCTURED = initialize_model_with_fallbacks(
         {"model_num": 1, "temperature": 0.5},
     ],
     structured_output_schema=Entities,
+    node="entity_extractor",
 )
 
 #################
 # Query Generator Model
 #################
-QUERY_GENERATOR_MODEL_WITH_FALLBACK_AND_TOOLS = initialize_model_with_fallbacks(
+QUERY_GENERATOR_MODEL_WITH_FALLBACK_AND_TOOLS = lazy_model_with_fallbacks(
     primary_model_fn=get_mistral_model,
     primary_model_kwargs={"model_num": 1, "temperature": 0.7},
     fallback_model_fns=[get_openai_model, get_openai_model],
@@ -67,13 +84,17 @@ QUERY_GENERATOR_MODEL_WITH_FALLBACK_AND_TOOLS = initialize_model_with_fallbacks(
     bind_tools=True,
     tools=[WebSearch()],
     tool_choice="web_search_tool",
+    # not cached: a response without a tool call sends the run back here with the same prompt, a cached answer would
+    # replay it on every retry (and replay its tool call ids into other runs)
+    cache=False,
+    node="query_generator",
 )
 
 
 ##############
 # Router Model
 ##############
-ROUTER_MODEL_WITH_FALLBACK_AND_STRUCTURED = initialize_model_with_fallbacks(
+ROUTER_MODEL_WITH_FALLBACK_AND_STRUCTURED = lazy_model_with_fallbacks(
     primary_model_fn=get_mistral_model,
     primary_model_kwargs={"model_num": 1, "temperature": 0.1},
     fallback_model_fns=[get_openai_model, get_groq_model],
@@ -82,13 +103,14 @@ ROUTER_MODEL_WITH_FALLBACK_AND_STRUCTURED = initialize_model_with_fallbacks(
         {"model_num": 3, "temperature": 0.1},
     ],
     structured_output_schema=RouteToQueryOrAnalysis,
+    node="router_and_state_updater",
 )
 
 # #################
 # # Competitor Analysis Model
 # #################
 COMPETITOR_ANALYSIS_MODEL_WITH_FALLBACK_AND_STRUCTURED = (
-    initialize_model_with_fallbacks(
+    lazy_model_with_fallbacks(
         primary_model_fn=get_openai_model,
         primary_model_kwargs={"model_num": 1, "temperature": 0.3},
         fallback_model_fns=[get_gemini_model, get_mistral_model],
@@ -97,18 +119,14 @@ COMPETITOR_ANALYSIS_MODEL_WITH_FALLBACK_AND_STRUCTURED = (
             {"model_num": 1, "temperature": 0.3},
         ],
         structured_output_schema=CompetitorAnalysisOutputModel,
+        node="competitor_analysis",
     )
 )
 
-##############
-# # Initialize Google Keyword Planner API client
-##############
-gkp = GoogleKeywordsAPI()
-
 ##############
 # # Masterlist and Primary Keyword Model
 ##############
-MPS_MODEL_WITH_FALLBACK_AND_STRUCTURED = initialize_model_with_fallbacks(
+MPS_MODEL_WITH_FALLBACK_AND_STRUCTURED = lazy_model_with_fallbacks(
     primary_model_fn=get_openai_model,
     primary_model_kwargs={"model_num": 1, "temperature": 0.5},
     fallback_model_fns=[get_mistral_model, get_openai_model],
@@ -117,12 +135,13 @@ MPS_MODEL_WITH_FALLBACK_AND_STRUCTURED = initialize_model_with_fallbacks(
         {"model_num": 2, "temperature": 0.5},
     ],
     structured_output_schema=MasterlistAndPrimarySecondaryKeywords,
+    node="masterlist_and_primary_keyword_generator",
 )
 
 ################
 # # Suggestions Generator Model
 ################
-SUGGESTIONS_MODEL_WITH_FALLBACK_AND_STRUCTURED = initialize_model_with_fallbacks(
+SUGGESTIONS_MODEL_WITH_FALLBACK_AND_STRUCTURED = lazy_model_with_fallbacks(
     primary_model_fn=get_openai_model,
     primary_model_kwargs={"model_num": 1, "temperature": 0.5},
     fallback_model_fns=[get_mistral_model, get_gemini_model],
@@ -131,8 +150,18 @@ SUGGESTIONS_MODEL_WITH_FALLBACK_AND_STRUCTURED = initialize_model_with_fallbacks
         {"model_num": 2, "temperature": 0.5},
     ],
     structured_output_schema=SuggestionGeneratorModel,
+    node="suggestions_generator",
+    # streamed to the frontend field by field as the model writes it
+    partial_json=True,
 )
 
+# schema field -> field name in the streamed answer events (the final answer event calls final_suggestions "final_answer")
+SUGGESTION_STREAM_FIELDS: dict[str, str] = {
+    "suggested_url_slug": "suggested_url_slug",
+    "suggested_article_headlines": "suggested_article_headlines",
+    "final_suggestions": "final_answer",
+}
+
 
 async def entity_extractor(state: KeywordState):
     """
@@ -160,8 +189,13 @@ async def entity_extractor(state: KeywordState):
     # Get user input from state
     user_article: str = state["user_input"]
 
-    # Prepare the prompt
-    prompt: str = ENTITY_EXTRACTOR_PROMPT.format(user_article=user_article, current_time=CURRENT_TIME)
+    # Prepare the prompt within the node's token budget (very long articles are cut, the lede is kept)
+    prompt: str = prompt_builder.build(
+        node="entity_extractor",
+        template=ENTITY_EXTRACTOR_PROMPT,
+        user_article=BudgetedInput(user_article, min_tokens=2000),
+        current_time=get_current_time(),
+    )
 
     # initialize the list of retrieved entities
     retrieved_entities: list[str] = []
@@ -205,12 +239,52 @@ async def entity_extractor(state: KeywordState):
         )
         # if error has occured we will terminate the connection with frontend and user should see error message.
         print(f"Error encountered in Entity Extraction: {e}")
+        # every node raises after its error event: the run stops with the node unfinished, so its checkpoint still has
+        # the node as next step and resume_keyword_agent_stream runs it again (a swallowed error would count as done)
+        raise
+
+
+async def revision_router(state: KeywordState):
+    """
+    Decide whether this run can reuse the research of the previous revision of the draft (see revisions.py).
+
+    The research (search results, competitor analysis, GKP data) is reused when the entities of the new draft overlap
+    enough with the ones the research was done with, then the run continues at the masterlist. Otherwise (or for a
+    new draft) it goes through the full pipeline.
+
+    Updates:
+        - state.revision_route: The node the run continues with.
+        - state.research_entities: The entities the research of this run is based on.
+        - the reused fields (revisions.REUSABLE_FIELDS) when the research is reused.
+    """
+    retrieved_entities: list[str] = state.get("retrieved_entities", [])
+    previous_revision = state.get("previous_revision")
+    if not previous_revision or not can_reuse_research(previous_revision, retrieved_entities):
+        if previous_revision:
+            print(f"Entities changed since run {previous_revision['run_id']}, running the full pipeline")
+        return {"revision_route": "query_generator", "research_entities": retrieved_entities}
+
+    stream_writer = get_stream_writer()
+    stream_writer(
+        {
+            "type": "internal",
+            "event_status": "old",
+            "node": "Revision Router",
+            "content": "The topic of your draft didn't change, reusing the competitor research and keyword data of your previous revision.",
+        }
+    )
+    return {
+        "revision_route": "masterlist_and_primary_keyword_generator",
+        # the reused research was done with the previous entities, the next revision is compared against them too
+        "research_entities": previous_revision["research_entities"],
+        **previous_revision["artifacts"],
+    }
 
 
 async def query_generator(state: KeywordState):
     """
     Takes user_input and retrieved_entities and generates search queries.
-    If state['_web_search_results_accumulated'] has previous tool calls and their responses then it will also look at the tool response to previous queries and regenerate search queries.
+    If state['web_search_results'] has results from previous search rounds then it will also look at them and regenerate search queries.
     Its tool_choice parameter is set to "web_search_tool" to force the LLM to always use the web search tool.
 
     Updates:
@@ -235,14 +309,17 @@ async def query_generator(state: KeywordState):
     # initialize search queries so we can append results to it
     search_queries = []
 
-    # get current web search results from state. This will be empty if this is the first time we are calling this node.
-    web_search_results: str = state.get("web_search_results_accumulated", "")
+    # render current web search results from state. This will be empty if this is the first time we are calling this node.
+    web_search_results: list[str] = render_web_search_result_blocks(state.get("web_search_results", []))
 
-    prompt = QUERY_GENERATOR_PROMPT.format(
-        user_article=state["user_input"],
+    # over budget, the latest search results are dropped first and then the article is cut
+    prompt: str = prompt_builder.build(
+        node="query_generator",
+        template=QUERY_GENERATOR_PROMPT,
+        user_article=BudgetedInput(state["user_input"], priority=1, min_tokens=1500),
         entities=state["retrieved_entities"],
-        web_search_results=web_search_results,
-        current_time=CURRENT_TIME
+        web_search_results=BudgetedInput(web_search_results, priority=0, min_tokens=500),
+        current_time=get_current_time(),
     )
 
     try:
@@ -284,7 +361,7 @@ async def query_generator(state: KeywordState):
             return {
                 # add AIMessage to 'messages' so tools_condition edge can detect the tool call and route to "tools" node.
                 "messages": [ai_message],
-                # we add search queries in the state so we can access them in the router_and_state_updater node. They are useful in formatting web_search_results_accumulated
+                # we add search queries in the state so we can access them in the router_and_state_updater node
                 "generated_search_queries": search_queries,
                 # increment the tool_call_count so we can route to "competitor_analysis" node after 2 calls (this sets an upper bound on the tool calls)
                 "tool_call_count": state.get("tool_call_count", 0) + 1,
@@ -310,15 +387,17 @@ async def query_generator(state: KeywordState):
             }
         )
         print(f"Error encountered in Query Generation: {e}")
+        raise
 
 
 async def router_and_state_updater(state: KeywordState):
     """
     This node recieves the ToolMessage from the "tools" Node and determines whether to route to the "query_generator" or "competitor_analysis" node if enough quality competitors have been found.
-    I made this into a node instead of conditional edge because I want to be able to update the "web_search_results_accumulated" state with the tool response and the search queries.
+    Clear cases are decided by the local relevance scorer (see competitor_relevance.py), the router model is only asked when it is ambiguous.
+    I made this into a node instead of conditional edge because I want to be able to update the "web_search_results" state with the results of this search round.
 
     Updates:
-        - state._web_search_results_accumulated: updates it with the tool response. Adds the search queries to the tool response as well.
+        - state.web_search_results: adds the results of every ToolMessage of this round (deduplicated by url, with the query that found them).
         - state.route_to: sets it to "competitor_analysis" or "query_generator" based on the tool response.
     """
     # initialize custom stream writer for langgraph to emit functions to frontend
@@ -347,14 +426,9 @@ async def router_and_state_updater(state: KeywordState):
 
     if state["tool_call_count"] >= 2:
 
-        # if we have already called the tool twice, we will not call it again but we still need to update web_search_results with latest tool response (append to existing results)
-        messages: list = state["messages"]
-        web_search_results = await update_web_search_results(
-            messages=messages,
-            search_queries=state["generated_search_queries"],
-            web_search_results_accumulated=state.get(
-                "web_search_results_accumulated", ""
-            ),
+        # if we have already called the tool twice, we will not call it again but we still need to add the latest results to web_search_results
+        new_results: list[WebSearchRecord] = collect_web_search_results(
+            messages=state["messages"], search_round=state["tool_call_count"]
         )
 
         stream_writer(
@@ -367,43 +441,56 @@ async def router_and_state_updater(state: KeywordState):
         )
         return {
             "route_to": "competitor_analysis",
-            "web_search_results_accumulated": web_search_results,
+            # the reducer merges these into the existing results
+            "web_search_results": new_results,
         }
     else:
-        # Get the tool response from last two ToolMessages. But if only 1 tool call was made then we will only have 1 ToolMessage.
-        messages: list = state["messages"]
-
-        # update the web search results with the content from the last two ToolMessages and the corresponding search queries
-        web_search_results = await update_web_search_results(
-            messages=messages,
-            search_queries=state["generated_search_queries"],
-            web_search_results_accumulated=state.get(
-                "web_search_results_accumulated", ""
-            ),
+        # results of every ToolMessage of this round (one per generated query)
+        new_results: list[WebSearchRecord] = collect_web_search_results(
+            messages=state["messages"], search_round=state["tool_call_count"]
         )
 
+        # the router looks at all results so far, merge locally the same way the state reducer will
+        merged_results: list[WebSearchRecord] = merge_web_search_results(state.get("web_search_results", []), new_results)
+
         # get user input and entities as well
         user_input: str = state.get("user_input", "")
         retrieved_entities: list[str] = state.get("retrieved_entities", [])
 
-        # prepare prompt for the router model
-        prompt = ROUTE_QUERY_OR_ANALYSIS_PROMPT.format(
-            user_article=user_input,
-            entities=retrieved_entities,
-            web_search_results=web_search_results,
-            current_time=CURRENT_TIME
+        # clear cases are decided locally from the relevance of the results, only ambiguous ones need the router model
+        local_decision: RelevanceDecision | None = (
+            competitor_scorer.decide(user_input, retrieved_entities, merged_results)
+            if settings.ROUTER_SCORER_ENABLED
+            else None
         )
 
         try:
-            # invoke the router model
-            router_decision: (
-                RouteToQueryOrAnalysis
-            ) = await ROUTER_MODEL_WITH_FALLBACK_AND_STRUCTURED.ainvoke(
-                [HumanMessage(content=prompt)]
-            )  # type: ignore
+            if local_decision is not None and local_decision.route is not None:
+                route: str = local_decision.route
+                print(f"Router decided locally: {route} ({local_decision.good_share:.0%} of the results are relevant competitors)")
+            else:
+                # prepare prompt for the router model
+                prompt: str = prompt_builder.build(
+                    node="router_and_state_updater",
+                    template=ROUTE_QUERY_OR_ANALYSIS_PROMPT,
+                    user_article=BudgetedInput(user_input, priority=1, min_tokens=1500),
+                    entities=retrieved_entities,
+                    web_search_results=BudgetedInput(
+                        render_web_search_result_blocks(merged_results), priority=0, min_tokens=1000
+                    ),
+                    current_time=get_current_time(),
+                )
+
+                # invoke the router model
+                router_decision: (
+                    RouteToQueryOrAnalysis
+                ) = await ROUTER_MODEL_WITH_FALLBACK_AND_STRUCTURED.ainvoke(
+                    [HumanMessage(content=prompt)]
+                )  # type: ignore
+                route = router_decision.route
 
             # stream the decision to the frontend
-            if router_decision.route == "competitor_analysis":
+            if route == "competitor_analysis":
                 stream_writer(
                     {
                         "type": "internal",
@@ -412,7 +499,7 @@ async def router_and_state_updater(state: KeywordState):
                         "content": "Enough quality competitors found, routing to competitor analysis node for further processing",
                     }
                 )
-            elif router_decision.route == "query_generator":
+            elif route == "query_generator":
                 stream_writer(
                     {
                         "type": "internal",
@@ -423,8 +510,8 @@ async def router_and_state_updater(state: KeywordState):
                 )
 
             return {
-                "route_to": router_decision.route,
-                "web_search_results_accumulated": web_search_results,
+                "route_to": route,
+                "web_search_results": new_results,
             }
 
         except Exception as e:
@@ -437,17 +524,18 @@ async def router_and_state_updater(state: KeywordState):
                 }
             )
             print(f"Error occurred in query analysis node: {e}")
+            raise
 
 
 async def competitor_analysis(state: KeywordState):
     """
-    This node gets the user_input, retrieved_entities and web_search_results_accumulated from the state and conducts competitor analysis.
+    This node gets the user_input, retrieved_entities and web_search_results from the state and conducts competitor analysis.
 
     Updates:
         - state.competitor_information: List of competitor data from top 5 search results (it may have upto 20 results).
         - state.generated_search_queries: List of generated search queries (it may have upto 4 search queries so it must choose the top 2).
         - state.competitive_analysis: Competitive analysis generated by our agent after comparing our article with competitor content.
-        - state.web_search_results_accumulated: Cleans up the space by setting it to "" so garbage collector can clean it up.
+        - state.web_search_results: Cleans up the space by resetting it so garbage collector can clean it up.
     """
     # initialize custom stream writer for langgraph to emit functions to frontend
     stream_writer = get_stream_writer()
@@ -463,14 +551,17 @@ async def competitor_analysis(state: KeywordState):
     # first get the input variables from the state
     user_input: str = state.get("user_input", "")
     retrieved_entities: list[str] = state.get("retrieved_entities", [])
-    web_search_results: str = state.get("web_search_results_accumulated", "")
-
-    # prepare the prompt for the competitor analysis model
-    prompt = COMPETITOR_ANALYSIS_AND_STRUCTURED_OUTPUT_PROMPT.format(
-        user_article=user_input,
+    web_search_results: list[str] = render_web_search_result_blocks(state.get("web_search_results", []))
+
+    # prepare the prompt for the competitor analysis model. The search results are what is being analyzed,
+    # so over budget the article is cut first and only then the latest results are dropped
+    prompt: str = prompt_builder.build(
+        node="competitor_analysis",
+        template=COMPETITOR_ANALYSIS_AND_STRUCTURED_OUTPUT_PROMPT,
+        user_article=BudgetedInput(user_input, priority=0, min_tokens=1500),
         entities=retrieved_entities,
-        web_search_results=web_search_results,
-        current_time=CURRENT_TIME
+        web_search_results=BudgetedInput(web_search_results, priority=1, min_tokens=2000),
+        current_time=get_current_time(),
     )
 
     # initialize the output variables
@@ -532,8 +623,8 @@ async def competitor_analysis(state: KeywordState):
             "competitor_information": competitor_information,
             "generated_search_queries": generated_search_queries,
             "competitive_analysis": competitive_analysis,
-            # set to "" to clean up space
-            "web_search_results_accumulated": "",
+            # None resets the channel to clean up space
+            "web_search_results": None,
         }
 
     except Exception as e:
@@ -546,128 +637,100 @@ async def competitor_analysis(state: KeywordState):
                 "content": f"Error occured in competitor analysis node: {str(e)}",
             }
         )
+        raise
 
 
-async def google_keyword_planner1(state: KeywordState):
+async def keyword_planner_prefetch(state: KeywordState):
     """
-    Use Google Keyword Planner API to get keyword data for our article. We make 2 parallel calls, this node and google_keyword_planner2 node run in one super step in langgraph.
-    We will use state["retrieved_entities"] as seed keywords for both calls but this node uses first url in the competitor_information list and the other node uses the second url in the list.
+    Speculative branch that runs right after entity_extractor, next to the search loop: the seed keywords are known now
+    but the competitor urls only after competitor_analysis, so the GKP calls that only need seeds are started already.
 
-    Updates:
-        - state.planner_list1: List of keyword data from the first GKP call
-    """
-    # custom stream writer for langgraph to emit functions to frontend
-    stream_writer = get_stream_writer()
-    stream_writer(
-        {
-            "type": "internal",
-            "event_status": "new",
-            "node": "Google Keyword Planner",
-            "content": "Using Google keyword planner to get keyword recommendations for your article. Running parallel calls to get many different keywords",
-        }
-    )
+    The calls run in the background (`gkp.prefetch`, cancelled when the run ends) and this node returns at once (a node
+    that awaited them would hold up its super step, and with it the search loop). `fan_out_keyword_planner` sends the same calls again together with the competitor
+    url calls: they are served by the GKP client's single flight while still running or by its cache once done, so
+    their results merge into planner_results without a second round trip on the critical path.
 
-    # Get the seed keywords from the state
+    Skipped when the research of the previous revision will be reused (no GKP calls in that run), and without the GKP
+    cache (see `gkp_prefetch_enabled`).
+    """
     seed_keywords: list[str] = state.get("retrieved_entities", [])
+    if not gkp_prefetch_enabled() or not seed_keywords:
+        return {}
+    if can_reuse_research(state.get("previous_revision"), seed_keywords):
+        return {}
 
-    # Get the competitor information list from the state
-    competitor_information: list[dict[str, str | int]] = state.get(
-        "competitor_information", []
-    )
+    # a failed prefetch costs the run nothing, the fan-out makes the call again and reports its error
+    for url in gkp_prefetch_urls():
+        gkp.prefetch(keywords=seed_keywords, url=url, run_id=state.get("run_id", ""))
+    return {}
 
-    try:
-        # Get the first URL from the competitor information (assumes at least one entry exists)
-        top_url: str = competitor_information[0]["url"]  # type: ignore
 
-        # Fetch keyword planner data using the helper function
-        planner_list1: list[dict[str, str | int]] = await fetch_gkp_keywords(
-            seed_keywords=seed_keywords, url=top_url
-        )
+async def google_keyword_planner(task: KeywordPlannerTask):
+    """
+    Use Google Keyword Planner API to get keyword data for our article. This is the map step of a map-reduce:
+    `fan_out_keyword_planner` sends one call per top ranked competitor url and all of them run in one super step in langgraph.
+    Every call uses state["retrieved_entities"] as seed keywords and its own competitor url.
+    Upstream requests are bounded by the "gkp" rate limit governor (settings.PROVIDER_RATE_LIMITS) so a large fan-out or many concurrent runs don't flood the GKP microservice.
 
-        # Update the state with the results
-        return {"planner_list1": planner_list1}
+    Args:
+        task (KeywordPlannerTask): the Send payload with seed keywords, competitor url and index of this call.
 
-    except Exception as e:
-        print(f"Error occurred in Google Keyword Planner 1 node: {e}")
+    Updates:
+        - state.planner_results: appends the list of keyword data from this call.
+    """
+    # custom stream writer for langgraph to emit functions to frontend
+    stream_writer = get_stream_writer()
+
+    # only the first call announces the step, otherwise the frontend would show the same message for every url
+    if task["index"] == 0:
         stream_writer(
             {
-                "type": "error",
+                "type": "internal",
                 "event_status": "new",
-                "node": "Google Keyword Planner 1",
-                "content": f"Error occurred in Google Keyword Planner 1 node: {str(e)}",
+                "node": "Google Keyword Planner",
+                "content": "Using Google keyword planner to get keyword recommendations for your article. Running parallel calls to get many different keywords",
             }
         )
 
-
-async def google_keyword_planner2(state: KeywordState):
-    """
-    Use Google Keyword Planner API to get keyword data for our article. We make 2 parallel calls, this node and google_keyword_planner1 node run in one super step in langgraph.
-    We will use state["retrieved_entities"] as seed keywords for both calls but this node uses second url in the competitor_information list and the other node uses the first url in the list.
-
-    Updates:
-        - state.planner_list2: List of keyword data from the second GKP call
-    """
-    stream_writer = get_stream_writer()
-
-    # Get the seed keywords from the state
-    seed_keywords: list[str] = state.get("retrieved_entities", [])
-
-    # Get the competitor information list from the state
-    competitor_information: list[dict[str, str | int]] = state.get(
-        "competitor_information", []
-    )
     try:
-        # We need to find the URL for the competitor with rank=2.
-        # We cannot simply take the second object in the list because sometimes there are multiple objects with rank=1 (LLM might have misbehaved).
-        # Therefore, we loop through the array and select the first object where rank==2. This should be quick though it won't really have O(n) complexity.
-        second_url: str = ""
-        for competitor in competitor_information:
-            rank = competitor.get("rank", None)
-            # ensure rank is not None and equal 2
-            if isinstance(rank, int) and rank == 2:
-                second_url: str = competitor["url"]  # type: ignore
-                break
-
         # Fetch keyword planner data using the helper function
-        planner_list2: list[dict[str, str | int]] = await fetch_gkp_keywords(
-            seed_keywords=seed_keywords, url=second_url
+        planner_list: list[dict[str, str | int]] = await fetch_gkp_keywords(
+            seed_keywords=task["seed_keywords"], url=task["url"]
         )
 
-        # Update the state with the results
-        return {"planner_list2": planner_list2}
+        # Update the state with the results (reducer appends this list to the others)
+        return {"planner_results": [planner_list]}
 
     except Exception as e:
-        print(f"Error occurred in Google Keyword Planner 2 node: {e}")
+        print(f"Error occurred in Google Keyword Planner node (url={task['url']}): {e}")
         stream_writer(
             {
                 "type": "error",
                 "event_status": "new",
-                "node": "Google Keyword Planner 2",
-                "content": f"Error occurred in Google Keyword Planner 2 node: {str(e)}",
+                "node": "Google Keyword Planner",
+                "content": f"Error occurred in Google Keyword Planner node: {str(e)}",
             }
         )
+        raise
 
 
 async def keyword_data_synthesizer(state: KeywordState):
     """
-    Merges, Deduplicates and Sorts the keyword planner data from both GKP calls and combines them into a single list.
-    \nMerge and Deduplication happens in O(n+m) using hash set where n and m are the lengths of the two lists.
-    \nSorting happens in O(nlogn) using Timsort (Python's built-in sort algorithm) where n is the length of the combined list.
-    \nThis is a single step in the langgraph and runs after both GKP calls are completed.
+    Reduce step of the keyword planner map-reduce. Merges, Deduplicates and Sorts the keyword planner data from all fanned out GKP calls and combines them into a single list.
+    \nThe lists are loaded into a columnar KeywordMetricsTable (NumPy arrays) where deduplication, top-k selection (partial sort, O(n + klogk)) and trend features are vectorized.
+    \nThe number of keywords kept is capped by settings.GKP_SYNTHESIZER_TOP_K so the masterlist prompt stays bounded no matter how wide the fan-out is.
+    \nThis is a single step in the langgraph and runs after all GKP calls are completed.
 
     Updates:
-        - state.keyword_planner_data: Combined and sorted list of keyword data from both GKP calls.
+        - state.keyword_planner_data: Combined and sorted list of keyword data from all GKP calls.
     """
     stream_writer = get_stream_writer()
 
-    # Retrieve the two lists of keyword data from the state, defaulting to empty lists if not present (though it should be present)
-    planner_list1: list[dict[str, int | str | dict[str, int]]] = state.get(
-        "planner_list1", []
-    )
-    planner_list2: list[dict[str, int | str | dict[str, int]]] = state.get(
-        "planner_list2", []
+    # Retrieve the keyword data lists from the state (one per GKP call), defaulting to empty list if not present (though it should be present)
+    planner_results: list[list[dict[str, int | str | dict[str, int]]]] = state.get(
+        "planner_results", []
     )
-    size: int = len(planner_list1) + len(planner_list2)
+    size: int = sum(len(planner_list) for planner_list in planner_results)
 
     stream_writer(
         {
@@ -687,30 +750,17 @@ async def keyword_data_synthesizer(state: KeywordState):
         }
     )
 
-    # Initialize a set to track unique keyword texts for deduplication
-    seen_keywords: set[str] = set()
-
-    # Initialize a list to store the combined and deduplicated keywords
-    combined_keywords: list[dict[str, int | str | dict[str, int]]] = []
-
-    # Merge and deduplicate both lists in a single pass
-    for keyword_list in (planner_list1, planner_list2):
-        # iterate through the objects in each list
-        for keyword_data in keyword_list:
-            keyword_text: str = str(keyword_data.get("text", ""))
-
-            # Only add the keyword if it has not been seen before and is not empty
-            if keyword_text and keyword_text not in seen_keywords:
-                seen_keywords.add(keyword_text)
-                combined_keywords.append(keyword_data)
-
-    # Sort the combined list by 'average_monthly_searches' in descending order
     try:
-        # the key will be an int but type checker isn't identifying that GKP parser will always only add int to this field so we use type: ignore
-        combined_keywords.sort(
-            key=lambda x: int(x.get("average_monthly_searches", 0)),  # type: ignore
-            reverse=True,
+        # Load every list into one columnar table, drop empty and repeated keywords (first occurrence wins) and keep the
+        # top settings.GKP_SYNTHESIZER_TOP_K by 'average_monthly_searches' in descending order using a partial sort
+        keyword_table: KeywordMetricsTable = (
+            KeywordMetricsTable.from_records(
+                keyword_data for keyword_list in planner_results for keyword_data in keyword_list
+            )
+            .deduplicate()
+            .top_k(settings.GKP_SYNTHESIZER_TOP_K)
         )
+        combined_keywords: list[dict[str, Any]] = keyword_table.to_records()
 
         stream_writer(
             {
@@ -724,12 +774,11 @@ async def keyword_data_synthesizer(state: KeywordState):
         # Return the updated state with the combined keyword planner data
         return {
             "keyword_planner_data": combined_keywords,
-            # clear the planner lists to free up memory
-            "planner_list1": [],
-            "planner_list2": [],
+            # clear the planner lists to free up memory (None resets the reducer)
+            "planner_results": None,
         }
     except Exception as sort_error:
-        # Handle any sorting errors gracefully and print a meaningful message
+        # Handle any merging/sorting errors gracefully and print a meaningful message
         print(f"Error sorting combined keyword data: {sort_error}")
         stream_writer(
             {
@@ -739,6 +788,7 @@ async def keyword_data_synthesizer(state: KeywordState):
                 "content": f"Error occurred while sorting keywords: {str(sort_error)}",
             }
         )
+        raise
 
 
 async def masterlist_and_primary_keyword_generator(state: KeywordState):
@@ -747,7 +797,7 @@ async def masterlist_and_primary_keyword_generator(state: KeywordState):
 
     Steps:
         1. Analyze the GKP data from the previous step.
-        2. We can have maximum of 50 keywords from the previous steps (25 max per GKP call).
+        2. We can have maximum of 25 keywords per GKP call from the previous steps (one call per fanned out competitor url).
         3. Determine the relevancy of each keyword based on our user_input and competitor_information.
         6. Pick up to 20 keywords based on the relevancy and metrics.
         7. Get a masterlist of keywords sorted by descending order: list of objects has {text, monthly_searches, competition, competition_index, relevancy_score}.
@@ -781,8 +831,10 @@ async def masterlist_and_primary_keyword_generator(state: KeywordState):
     keyword_planner_data: list[dict[str, int | str | dict[str, int]]] = state.get(
         "keyword_planner_data", []
     )
-    # format some input vars for inserting into the prompt as string
-    keyword_planner_data_str: str = json.dumps(keyword_planner_data, indent=2)
+    # format some input vars for inserting into the prompt as string. The compact table summarizes the monthly volumes with trend features
+    # (yoy growth, 3 month momentum, peak month, volatility) and is a fraction of the size of json.dumps(indent=2)
+    # rows are sorted by average monthly searches, so trimming from the end drops the smallest keywords first
+    keyword_planner_rows: list[str] = KeywordMetricsTable.from_records(keyword_planner_data).render_compact().split("\n")
 
     # initialize the output variables
     keyword_masterlist: list[dict[str, str]] = []
@@ -790,14 +842,16 @@ async def masterlist_and_primary_keyword_generator(state: KeywordState):
     secondary_keywords: list[dict[str, str]] = []
 
     # prepare the prompt for the masterlist and primary keyword generator model
-    prompt = MASTERLIST_PRIMARY_SECONDARY_KEYWORD_GENERATOR_PROMPT.format(
-        user_article=user_input,
+    prompt: str = prompt_builder.build(
+        node="masterlist_and_primary_keyword_generator",
+        template=MASTERLIST_PRIMARY_SECONDARY_KEYWORD_GENERATOR_PROMPT,
+        user_article=BudgetedInput(user_input, priority=2, min_tokens=1500),
         entities=retrieved_entities,
         generated_search_queries=search_queries,
         competitor_information=competitor_information,
-        competitor_analysis=competitor_analysis,
-        keyword_planner_data=keyword_planner_data_str,
-        current_time=CURRENT_TIME
+        competitor_analysis=BudgetedInput(competitor_analysis, priority=1, min_tokens=500),
+        keyword_planner_data=BudgetedInput(keyword_planner_rows, priority=0, min_tokens=800, separator="\n"),
+        current_time=get_current_time(),
     )
 
     try:
@@ -852,6 +906,7 @@ async def masterlist_and_primary_keyword_generator(state: KeywordState):
                 "content": f"Error occurred in masterlist and primary keyword generator node: {str(e)}",
             }
         )
+        raise
 
 
 async def suggestions_generator(state: KeywordState):
@@ -893,29 +948,54 @@ async def suggestions_generator(state: KeywordState):
     final_answer: str = ""
 
     # prepare the prompt for the suggestions generator model
-    prompt = SUGGESTION_GENERATOR_PROMPT.format(
+    # sentence level suggestions need the whole article, so only the competitor analysis is trimmable here
+    prompt: str = prompt_builder.build(
+        node="suggestions_generator",
+        template=SUGGESTION_GENERATOR_PROMPT,
         user_article=user_input,
         primary_keywords=primary_keywords,
         secondary_keywords=secondary_keywords,
         competitor_information=competitor_information,
-        competitor_analysis=competitor_analysis,
-        current_time=CURRENT_TIME
+        competitor_analysis=BudgetedInput(competitor_analysis, priority=0, min_tokens=400),
+        current_time=get_current_time(),
     )
 
     try:
-        response: (
-            SuggestionGeneratorModel
-        ) = await SUGGESTIONS_MODEL_WITH_FALLBACK_AND_STRUCTURED.ainvoke(
-            [HumanMessage(content=prompt)]
-        )  # type: ignore
+        # stream the partial output as it is generated: slug first, then headlines, then the suggestions markdown.
+        # Each event carries only the text added since the previous one
+        partial_response: dict[str, Any] = {}
+        async for chunk in SUGGESTIONS_MODEL_WITH_FALLBACK_AND_STRUCTURED.astream([HumanMessage(content=prompt)]):
+            if chunk is STREAM_RESTART:
+                # the model failed mid answer and the next one starts over, clear what the frontend got so far
+                deltas: list[FieldDelta] = reset_deltas(partial_response, SUGGESTION_STREAM_FIELDS)
+                partial_response = {}
+            elif isinstance(chunk, dict):
+                deltas = field_deltas(partial_response, chunk, SUGGESTION_STREAM_FIELDS)
+                partial_response = chunk
+            else:
+                continue
+            for delta in deltas:
+                stream_writer(
+                    {
+                        "type": "answer_delta",
+                        "event_status": "new",
+                        "node": "Suggestions Generator",
+                        "content": delta,
+                    }
+                )
+
+        # the last partial output is the complete response (the router already validated it, this builds the model)
+        response: SuggestionGeneratorModel = SuggestionGeneratorModel.model_validate(partial_response)
 
         # extract the output variables from the response
         suggested_url_slug = response.suggested_url_slug
         suggested_article_headlines = response.suggested_article_headlines
         final_answer = response.final_suggestions
         
-        # add final_answer to intermediate-state so we can display full article suggestions (quick hack for now)
-        set_sentence_level_suggestions(final_answer)
+        # add final_answer to the run's session so the full article endpoint can use it (quick hack for now).
+        # Runs started without run_keyword_agent_stream (i.e. LangGraph Studio) have no session
+        if run_id := state.get("run_id"):
+            await set_sentence_level_suggestions(run_id, final_answer)
 
         # stream the suggestions to the frontend
         stream_writer(
@@ -958,66 +1038,91 @@ async def suggestions_generator(state: KeywordState):
                 "content": f"Error occurred in suggestions generator node: {str(e)}",
             }
         )
+        raise
 
 
 #################
-# # utility functions to help update web search. since we needed it twice i made it a function
+# # utility functions to collect web search results from ToolMessages and render them for prompts
 #################
 
 
-async def update_web_search_results(
-    messages: list, search_queries: list[str], web_search_results_accumulated: str
-) -> str:
+def collect_web_search_results(messages: list, search_round: int) -> list[WebSearchRecord]:
     """
-    Update the accumulated web search results with the content from the last two ToolMessages and the corresponding search queries.
+    Collect the results of the latest search round from the trailing ToolMessages (one per generated query, any number of them).
 
-    This function extracts the content from the last two ToolMessages in the messages list and appends them to the accumulated web search results,
-    associating each tool response with its corresponding search query.
+    Each ToolMessage carries the parsed results and the query that produced them as its artifact, so nothing is re-parsed from text.
+    Duplicates are dropped later by the `web_search_results` reducer.
 
     Args:
-        messages (list): List of ToolMessage objects, each with a 'content' attribute.
-        search_queries (list[str]): List of generated search queries.
-        web_search_results_accumulated (str): The previously accumulated web search results.
+        messages (list): The messages in the state. The ToolMessages of the latest round are at the end.
+        search_round (int): The current tool_call_count, stored on each record as the round the url was first found in.
 
     Returns:
-        str: The updated web search results string.
+        list[WebSearchRecord]: The results of this round in order.
     """
-    # Initialize variables to store the content of the last two tool responses
-    first_tool_response: str = ""
-    second_tool_response: str = ""
-
-    # Calculate the starting index (2 before the last message)
-    start_index: int = max(len(messages) - 2, 0)
-
-    # Loop through the last two messages and extract their content
-    for index in range(start_index, len(messages)):
-        message = messages[index]
-        # Ensure the message has a 'content' attribute so that we know its an output from a ToolMessage
-        if hasattr(message, "content"):
-            if index == start_index:
-                first_tool_response = message.content
-            else:
-                second_tool_response = message.content
+    # walk back over the ToolMessages produced by the last tools node run
+    tool_messages: list[ToolMessage] = []
+    for message in reversed(messages):
+        if not isinstance(message, ToolMessage):
+            break
+        tool_messages.append(message)
+    tool_messages.reverse()
+
+    records: list[WebSearchRecord] = []
+    for message in tool_messages:
+        # failed tool calls have no artifact (ToolNode puts the error in the content)
+        artifact: dict[str, Any] | None = message.artifact if isinstance(message.artifact, dict) else None
+        if artifact is None:
+            continue
+        for result in artifact.get("results", []):
+            if not result.get("url"):
+                continue
+            records.append(
+                WebSearchRecord(
+                    url=result["url"],
+                    title=result.get("title"),
+                    score=result.get("score"),
+                    published_date=result.get("published_date"),
+                    highlights=result.get("highlights"),
+                    queries=[artifact.get("query", "")],
+                    round=search_round,
+                )
+            )
 
-    # Start with the previously accumulated web search results
-    web_search_results: str = web_search_results_accumulated
+    return records
 
-    # If there was only one tool call made, then len(search_queries) will be 1 and we will only have second_tool_response based on the for loop above.
-    if len(search_queries) == 1:
-        web_search_results = (
-            web_search_results
-            + f"\n\nSearch Query: {search_queries[0]}\n"
-            + f"\n{second_tool_response}"
-        )
-    elif len(search_queries) == 2:
-        web_search_results = (
-            web_search_results
-            + f"\n\nSearch Query: {search_queries[0]}\n"
-            + f"{first_tool_response}\n\nSearch Query: {search_queries[1]}\n"
-            + second_tool_response
+
+def render_web_search_result_blocks(records: list[WebSearchRecord]) -> list[str]:
+    """
+    Render each stored web search result into a compact text block for prompts. Each url appears once,
+    followed by the search queries that found it. Blocks are kept separate so the prompt builder can drop whole results.
+
+    Args:
+        records (list[WebSearchRecord]): Deduplicated results from the state.
+
+    Returns:
+        list[str]: One rendered block per result, in state order.
+    """
+    blocks: list[str] = []
+    for number, record in enumerate(records, start=1):
+        highlights: Any = record.get("highlights")
+        if isinstance(highlights, list):
+            highlights = " ... ".join(str(highlight) for highlight in highlights)
+        blocks.append(
+            f"[{number}] {record.get('title')}\n"
+            f"url: {record['url']}\n"
+            f"published_date: {record.get('published_date')} | score: {record.get('score')}\n"
+            f"found by queries: {'; '.join(record['queries'])}\n"
+            f"highlights: {highlights}"
         )
+    return blocks
 
-    return web_search_results
+
+def render_web_search_results(records: list[WebSearchRecord]) -> str:
+    """
+    Render the stored web search results into one text block, "" if there are none yet.
+    """
+    return "\n\n".join(render_web_search_result_blocks(records))
 
 
 async def fetch_gkp_keywords(
@@ -1026,7 +1131,7 @@ async def fetch_gkp_keywords(
     """
     Fetch keyword data from Google Keyword Planner API for given seed keywords and a competitor URL.
 
-    This helper function is used by both google_keyword_planner1 and google_keyword_planner2 nodes to avoid code duplication.
+    This helper function is used by every fanned out google_keyword_planner call.
     It performs an asynchronous API call to the Google Keyword Planner and returns the resulting keyword data.
 
     Args:
@@ -1035,14 +1140,10 @@ async def fetch_gkp_keywords(
 
     Returns:
         list[dict[str, str | int]]: List of keyword data dictionaries returned by the API.
+
+    Raises:
+        Exception: Whatever the GKP client raises (i.e. ConnectError when the microservice is down). The map step lets it
+            fail the node (error event, resumable run), only the speculative prefetch (`gkp.prefetch`) swallows it.
     """
-    planner_list: list[dict[str, str | int]] = []
-    try:
-        # Await the async API call to ensure non-blocking execution in LangGraph's async loop
-        response: list[dict[str, str | int]] = await gkp.generate_keywords(
-            keywords=seed_keywords, url=url
-        )
-        planner_list = response
-    except Exception as e:
-        print(f"Error occurred in fetch_gkp_keywords: {e}")
-    return planner_list
+    # Await the async API call to ensure non-blocking execution in LangGraph's async loop
+    return await gkp.generate_keywords(keywords=seed_keywords, url=url)
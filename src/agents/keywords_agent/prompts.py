@@ -2,14 +2,128 @@
 Write all of the prompts for keywords agent here.
 Don't use any explicit system prompts since some models we use don't support them. 
 Instead create one prompt which has system instructions and input variables for user input and any other variables.
-"""
 
+Prompts are `SectionedPrompt`s: static instructions first, then one named section per input. Instructions must refer to inputs
+by section name ("the USER ARTICLE section") instead of using placeholders, otherwise the prompt fails at import time.
+Keeping the instructions static makes them a stable prefix for the providers' prompt caching.
+"""
 
-ENTITY_EXTRACTOR_PROMPT = """
+import string
+from dataclasses import dataclass
+
+# inputs that can be thousands of tokens. Each may be substituted only once per prompt, instructions refer to its section by name
+LARGE_VARIABLES: frozenset[str] = frozenset(
+    {
+        "user_article",
+        "web_search_results",
+        "competitor_information",
+        "competitor_analysis",
+        "keyword_planner_data",
+        "original_article_draft",
+        "sentence_level_suggestions",
+    }
+)
+
+
+def check_single_substitution(prompt_name: str, template: str) -> None:
+    """
+    Make sure no large variable appears more than once in a template. `str.format` substitutes every occurrence,
+    so a repeated `{user_article}` pastes the whole article into the prompt again.
+
+    Args:
+        prompt_name (str): Name of the prompt, used in the error message.
+        template (str): The full template text.
+
+    Raises:
+        ValueError: If a large variable is used more than once.
+    """
+    field_names: list[str] = [field for _, field, _, _ in string.Formatter().parse(template) if field]
+    repeated: list[str] = sorted(
+        {field for field in field_names if field in LARGE_VARIABLES and field_names.count(field) > 1}
+    )
+    if repeated:
+        raise ValueError(
+            f"{prompt_name} substitutes {repeated} more than once. Put large inputs in a section and refer to the section by name."
+        )
+
+
+@dataclass(frozen=True)
+class PromptSection:
+    """
+    A named data section of a prompt. The instructions refer to it as the "<TITLE> section".
+
+    Attributes:
+        title (str): Section name, i.e. "USER ARTICLE".
+        variable (str): Template variable injected into this section.
+        description (str): Optional line explaining the content or its format.
+    """
+
+    title: str
+    variable: str
+    description: str = ""
+
+    def render(self) -> str:
+        description: str = f"{self.description}\n" if self.description else ""
+        return f"---\n## {self.title}\n{description}{{{self.variable}}}\n"
+
+
+# every prompt gets the time as data (not in its instructions) so the instructions stay identical between requests
+CURRENT_TIME_SECTION = PromptSection(title="CURRENT TIME", variable="current_time", description="Format: %Y-%m-%d %H:%M:%S")
+
+
+class SectionedPrompt:
+    """
+    Prompt made of static instructions followed by named data sections. Large inputs are injected exactly once, in their
+    section, and the instructions only mention the section name. This is checked when the prompt is defined,
+    so a prompt that pastes a large input twice fails at import time.
+
+    The instructions may not contain any placeholder: they form a byte-identical prefix across requests so providers
+    can serve it from their prompt cache, and everything that changes per request follows it.
+
+    Has the same `format(**kwargs)` interface as a plain string template.
+
+    Example:
+        >>> PROMPT = SectionedPrompt(
+        ...     name="PROMPT",
+        ...     instructions="Summarize the USER ARTICLE section.",
+        ...     sections=[PromptSection(title="USER ARTICLE", variable="user_article")],
+        ... )
+        >>> PROMPT.format(user_article="...")
+    """
+
+    def __init__(self, name: str, instructions: str, sections: list[PromptSection]) -> None:
+        """
+        Raises:
+            ValueError: If the instructions contain a placeholder or a large variable is substituted more than once.
+        """
+        # instructions must be fully static so every request starts with the same prefix, which the providers' automatic
+        # prefix caching (OpenAI, Mistral) can serve from cache. All per-request data (even the time) goes in sections after it
+        placeholders: list[str] = [field for _, field, _, _ in string.Formatter().parse(instructions) if field]
+        if placeholders:
+            raise ValueError(
+                f"{name} has placeholders {placeholders} in its instructions. Move them to a section so the instructions stay a static, cacheable prefix."
+            )
+
+        self.name = name
+        self.sections = sections
+        self.static_prefix: str = instructions.rstrip() + "\n\n"
+        self.template: str = self.static_prefix + "\n".join(section.render() for section in sections)
+        check_single_substitution(name, self.template)
+
+    def format(self, **kwargs: object) -> str:
+        return self.template.format(**kwargs)
+
+    def __str__(self) -> str:
+        return self.template
+
+
+ENTITY_EXTRACTOR_PROMPT = SectionedPrompt(
+    name="ENTITY_EXTRACTOR_PROMPT",
+    instructions="""
 You are an expert in Search Engine Optimization (SEO) and keyword research. You are given a draft of a news article.
 Your job is to extract the most important and representative entities from the article.
 
-To understand timeframe of news and articles, the current time in %Y-%m-%d %H:%M:%S format is: {current_time}
+To understand timeframe of news and articles, the current time is given in the CURRENT TIME section.
 
 While extracting the entities, please consider the following:
 1. the entities you extract will be used to generate search queries and find competitor articles written about the same topic. Keep this purpose in mind.
@@ -20,12 +134,16 @@ will be used to find optimal SEO primary and secondary keywords for the article.
 
 Extract 3 entities from the article and output them in the structured format:
 ["entity1", "entity2", "entity3"]
-
-Here is the article:
-{user_article}
-"""
-
-QUERY_GENERATOR_PROMPT = """
+""",
+    sections=[
+        CURRENT_TIME_SECTION,
+        PromptSection(title="ARTICLE", variable="user_article"),
+    ],
+)
+
+QUERY_GENERATOR_PROMPT = SectionedPrompt(
+    name="QUERY_GENERATOR_PROMPT",
+    instructions="""
 # ROLE
 You are a sophisticated SEO Strategist. Your specialty is crafting precise web search queries for competitor analysis.
 
@@ -35,13 +153,13 @@ Generate a structured tool call for the `web_search_tool`. This tool call must c
 # CRITICAL INSTRUCTIONS
 Your primary task is to adapt your query generation strategy based on whether you are attempting the search for the first time or refining a previous attempt.
 
-### Scenario 1: First Attempt (The `web_search_results` input below is empty)
+### Scenario 1: First Attempt (The WEB SEARCH RESULTS section below is empty)
 - Your goal is to cast a wide but relevant net.
 - Generate two distinct queries based on the `QUERY REQUIREMENTS` below, using the initial `entities` and `user_article`.
 
-### Scenario 2: Refinement Attempt (The `web_search_results` input below contains previous results)
+### Scenario 2: Refinement Attempt (The WEB SEARCH RESULTS section below contains previous results)
 - Your goal is to improve upon the last search.
-- **Analyze the `web_search_results` from the previous turn.** Identify what was missing or what kind of irrelevant results were returned. Which part of the previous queries did not yield the desired results?
+- **Analyze the WEB SEARCH RESULTS section from the previous turn.** Identify what was missing or what kind of irrelevant results were returned. Which part of the previous queries did not yield the desired results?
 - **Using this analysis Formulate two NEW and IMPROVED queries.** These new queries should be specifically designed to find the missing information or to filter out the previous irrelevant results.
 - **DO NOT REPEAT QUERIES** from previous attempts.
 
@@ -59,67 +177,60 @@ You must always generate two different types of queries:
     - *Example: "How does Nvidia's B200 compare to the H100?"*
 
 **Timeliness:** Use the current time to add date-based specifiers (e.g., "2024", "June 2024") to your queries if the article's topic is time-sensitive.
-- Current time: {current_time}
+- The current time is given in the CURRENT TIME section.
 
 NOTE: You must output valid tool call for the `web_search_tool`.
-
----
-Here are the extracted entities from the article:
-{entities}
-
----
-Here is our user article:
-{user_article}
-
----
-\nHistory of previous tool calls and their responses (if present):
-{web_search_results}
-"""
-
-ROUTE_QUERY_OR_ANALYSIS_PROMPT = """
+""",
+    sections=[
+        CURRENT_TIME_SECTION,
+        PromptSection(title="EXTRACTED ENTITIES", variable="entities"),
+        PromptSection(title="USER ARTICLE", variable="user_article"),
+        PromptSection(title="WEB SEARCH RESULTS", variable="web_search_results", description="History of previous tool calls and their responses (if present)."),
+    ],
+)
+
+ROUTE_QUERY_OR_ANALYSIS_PROMPT = SectionedPrompt(
+    name="ROUTE_QUERY_OR_ANALYSIS_PROMPT",
+    instructions="""
 # ROLE
 You are an expert SEO Routing Strategist acting as a decision-making node in an automated workflow.
 
 # GOAL
-Your sole responsibility is to analyze the results of a web search and decide the next optimal action. Based on the quality and relevance of the `web_search_results`, you will determine whether to proceed to `competitor_analysis` or to loop back to the `query_generator` for a new search.
+Your sole responsibility is to analyze the results of a web search and decide the next optimal action. Based on the quality and relevance of the WEB SEARCH RESULTS section, you will determine whether to proceed to `competitor_analysis` or to loop back to the `query_generator` for a new search.
 
 # DECISION FRAMEWORK
-Carefully compare the `{user_article}` against the provided `{web_search_results}`. Your decision must be based on the following logic:
+Carefully compare the USER ARTICLE section against the provided WEB SEARCH RESULTS section. Your decision must be based on the following logic:
 
-1.  **Assess Relevance:** For each search result, evaluate its title and snippet. Is it a direct competitor? Does it cover the same core topic and entities as the `{user_article}`? A "good" result is not just tangentially related; it is an article that our content would need to outperform in search rankings.
+1.  **Assess Relevance:** For each search result, evaluate its title and snippet. Is it a direct competitor? Does it cover the same core topic and entities as the USER ARTICLE section? A "good" result is not just tangentially related; it is an article that our content would need to outperform in search rankings.
 
 2.  **Evaluate Sufficiency (The Threshold Test):**
-    - Count the number of "good" competitor articles you found in the `{web_search_results}`.
+    - Count the number of "good" competitor articles you found in the WEB SEARCH RESULTS section.
     - **If a strong majority (e.g., at least 7-8 out of 10) of the results are highly relevant competitors, the data is sufficient.** In this case, you should choose to route to `competitor_analysis`.
     - **If the results are mostly irrelevant, off-topic, or too broad, the data is insufficient.** In this case, you must route to `query_generator` to try a more refined search.
 
 # KEY CONSIDERATIONS
 - **Don't settle for "good enough."** The goal is to gather the best possible set of competitor articles for industry standard research.
-- **Context is everything.** Use the `{entities}` and the full `{user_article}` to understand the specific nuances required. A generic match is not a good match.
-- Use the current time to judge the timeliness of search results if the topic is recent. Current time: {current_time}
+- **Context is everything.** Use the EXTRACTED ENTITIES section and the full USER ARTICLE section to understand the specific nuances required. A generic match is not a good match.
+- Use the current time to judge the timeliness of search results if the topic is recent. The current time is given in the CURRENT TIME section.
 
 Follow the structured output format exactly.
-
----
-Here is the user article:
-{user_article}
-
----
-Here are the extracted entities:
-{entities}
-
----
-Here is the history of previous web queries and their responses:
-{web_search_results}
-
-"""
-
-COMPETITOR_ANALYSIS_AND_STRUCTURED_OUTPUT_PROMPT = """
+""",
+    sections=[
+        CURRENT_TIME_SECTION,
+        PromptSection(title="USER ARTICLE", variable="user_article"),
+        PromptSection(title="EXTRACTED ENTITIES", variable="entities"),
+        PromptSection(title="WEB SEARCH RESULTS", variable="web_search_results", description="History of previous web queries and their responses."),
+    ],
+)
+
+COMPETITOR_ANALYSIS_AND_STRUCTURED_OUTPUT_PROMPT = SectionedPrompt(
+    name="COMPETITOR_ANALYSIS_AND_STRUCTURED_OUTPUT_PROMPT",
+    instructions="""
 You are an Search Engine Optimization (SEO) expert in keyword research and competitor analysis. You will receive a user_article, a list of entities and a history of web queries and their results that were executed to find competitors. 
 
 Your task is to analyze the given information, conduct a thorough competitor analysis and generate a structured output as a response.
 
-To understand timeframe of news and articles and using time or seasonality in your reasoning, the current time in %Y-%m-%d %H:%M:%S format is: {current_time}
+To understand timeframe of news and articles and using time or seasonality in your reasoning, the current time is given in the CURRENT TIME section.
 
 While conducting your analysis, please keep the following in mind:
 1) Like a true SEO expert, you should analyze all given information about the competitor in the web search results i.e. url, titles, date, highlights etc and the queries that were used to find them.
@@ -148,39 +259,36 @@ While conducting your analysis, please keep the following in mind:
 2) You are allowed to be critical and creative in your competitor analysis paragraphs but be very precise and actionable. Put on your expert hat and think like a true SEO expert.
 
 3) Avoid adding long winded justifications or fluff in your output. Make it quick to read and actionable with proper formatting.
+""",
+    sections=[
+        CURRENT_TIME_SECTION,
+        PromptSection(title="USER ARTICLE", variable="user_article"),
+        PromptSection(title="EXTRACTED ENTITIES", variable="entities"),
+        PromptSection(title="WEB SEARCH RESULTS", variable="web_search_results", description="History of previous web queries and their responses."),
+    ],
+)
 
----
-Here is the user article:
-{user_article}
-
----
-\nHere are the extracted entities:
-{entities}
-
----
-\nHere is the history of previous web queries and their responses:
-{web_search_results}
-
-"""
+MASTERLIST_PRIMARY_SECONDARY_KEYWORD_GENERATOR_PROMPT = SectionedPrompt(
+    name="MASTERLIST_PRIMARY_SECONDARY_KEYWORD_GENERATOR_PROMPT",
+    instructions="""
+You are an Search Engine Optimization (SEO) expert in keyword research and competitor analysis. You will be provided a user article, a list of entities representing the main topics of the article, information about the competitors found through web search queries which includes: their URLs, titles, published dates, and highlights from the web page content. We then fed the entities to Google Keyword Planner (GKP) including the top competitor urls and GKP recommended keywords ideal for the provided seed url websites and entities (seed keywords). GKP also gave very useful metrics for each keyword that you must take into account. 
 
-MASTERLIST_PRIMARY_SECONDARY_KEYWORD_GENERATOR_PROMPT = """
-You are an Search Engine Optimization (SEO) expert in keyword research and competitor analysis. You will be provided a user article, a list of entities representing the main topics of the article, information about the competitors found through web search queries which includes: their URLs, titles, published dates, and highlights from the web page content. We then fed the entities to Google Keyword Planner (GKP) including top 2 competitor urls and GKP recommended keywords ideal for the provided seed url websites and entities (seed keywords). GKP also gave very useful metrics for each keyword that you must take into account. 
 
-\nTo understand past year keyword metrics and the seasonality and using time based arguments in your reasoning, you need to understand the current time which in %Y-%m-%d %H:%M:%S format = {current_time}
+To understand past year keyword metrics and the seasonality and using time based arguments in your reasoning, you need to understand the current time which is given in the CURRENT TIME section.
 
 # TASK 1: CREATE THE KEYWORD MASTERLIST
-First, generate a masterlist of the top 10 keywords perfectly suited for the `{user_article}`.
+First, generate a masterlist of the top 10 keywords perfectly suited for the USER ARTICLE section.
 
 ### Selection Criteria for the Masterlist:
 You must select keywords based on a holistic analysis. A keyword is "ideal" if it meets these criteria:
 1.  **High-Value Metrics:** Prioritize keywords with a strong combination of high `average_monthly_searches` and a manageable `competition` level (LOW or MEDIUM is often better than HIGH).
 2.  **Strategic Diversity:** The list must be diverse. Actively avoid selecting multiple minor variations of the same keyword. For example, choose the best performer from a group like "seo tool," "seo tools," and "tools for seo." Be mindful of meaningful but subtle differences (e.g., "Penn medicine" vs. "Penn medicine hospital").
-3.  **Competitive Relevance:** The keyword must be aligned with the topics covered by top competitors (in `{competitor_information}`) and the strategic opportunities identified in the `{competitor_analysis}`.
+3.  **Competitive Relevance:** The keyword must be aligned with the topics covered by top competitors (in the COMPETITOR INFORMATION section) and the strategic opportunities identified in the COMPETITOR ANALYSIS section.
 
 ### Formatting Requirements for Masterlist:
 -   The list must contain exactly 10 keywords, ranked 1 to 10.
 -   It must be sorted in descending order by `average_monthly_searches`.
--   **Data Fidelity is CRITICAL:** The values for `text`, `monthly_search_volume`, `competition`, and `competition_index` for each keyword MUST be copied exactly from the provided `{keyword_planner_data}`. Do not alter or invent data. You will only add the `rank`.
+-   **Data Fidelity is CRITICAL:** The values for `text`, `monthly_search_volume`, `competition`, and `competition_index` for each keyword MUST be copied exactly from the provided KEYWORD PLANNER DATA section. Do not alter or invent data. You will only add the `rank`.
 
 # TASK 2: SELECT & JUSTIFY PRIMARY/SECONDARY KEYWORDS
 From the masterlist you just created, select the most critical keywords for the article's strategy.
@@ -188,7 +296,7 @@ From the masterlist you just created, select the most critical keywords for the
 ### Selection & Grouping:
 -   **Primary Keywords:** Select up to 2-3 keywords that represent the absolute core topic of the article. These are the "must-win" terms for SEO.
 -   **Secondary Keywords:** Select up to 3-5 keywords that target important sub-topics, user questions, or long-tail variations.
--   **Constraint:** If the GKP data is sparse, select fewer keywords as appropriate. Never invent keywords not present in the `{keyword_planner_data}`.
+-   **Constraint:** If the GKP data is sparse, select fewer keywords as appropriate. Never invent keywords not present in the KEYWORD PLANNER DATA section.
 
 ### Reasoning Requirements:
 For each primary and secondary keyword, you must provide a detailed reasoning paragraph. This is the most important part of your analysis. Your reasoning must be a critical and objective analysis, not a simple justification.
@@ -196,8 +304,8 @@ FORMATTING: THIS reasoning paragraph MUST use markdown and **bold** or *italiciz
 
 Each reasoning paragraph **must include**:
 -   **Quantitative Analysis:** Explicitly state the keyword's metrics (`average_monthly_searches`, `competition`, `competition_index`). Use **bold** or *italic* markdown for emphasis.
--   **Qualitative Analysis:** Explain *why* this keyword is a good strategic fit. Reference the `{competitor_analysis}`, the headlines or content themes from `{competitor_information}`, and its relationship to the `{user_article}`.
--   **Seasonal Trends:** Analyze the monthly search volume data from the last year. Note any significant peaks, troughs, or seasonal patterns that could inform publishing or content update strategy.
+-   **Qualitative Analysis:** Explain *why* this keyword is a good strategic fit. Reference the COMPETITOR ANALYSIS section, the headlines or content themes from the COMPETITOR INFORMATION section, and its relationship to the USER ARTICLE section.
+-   **Seasonal Trends:** Analyze the trend columns computed from the last year of monthly search volumes: `yoy_growth` (latest month vs the oldest month in the window, a year earlier when 13 months are available, otherwise 11 months earlier), `momentum_3m` (last 3 months vs the 3 before), `peak_month` and `volatility` (higher means spikier demand). Note any significant growth, decline, or seasonal patterns that could inform publishing or content update strategy.
 -   **Final Verdict:** Conclude with a clear statement on the keyword's role (e.g. "This secondary keyword represents a key opportunity to capture long-tail traffic by addressing a content gap left by competitors.").
 
 For your output, consider the following instructions important:
@@ -208,37 +316,24 @@ VERY IMPORTANT: masterlist information should exactly match the information prov
 VERY IMPORTANT: the primary and secondary keywords must be selected from the masterlist you generated. Their text should match exactly the text from GKP and masterlist.
 
 Caution: keywords may seem very similar but they have slight differences that are very important. I.e. Penn medicine vs Penn medicine hospital are different keywords but they have very different search volumes and competition. This must be considered.
-
----
-Here is the user article:
-{user_article}
-
----
-Here are the extracted entities:
-{entities}
-
----
-Here are the search queries that were executed to find competitors:
-{generated_search_queries}
-
----
-Here are the top web search results obtained for each query:
-{competitor_information}
-
----
-We also conducted brief competitor analysis and here is a paragraph of that to get you started:
-{competitor_analysis}
-
----
-Here is the keyword planner data by Google Keyword Planner:
-{keyword_planner_data}
-
-"""
-
-SUGGESTION_GENERATOR_PROMPT = """
+""",
+    sections=[
+        CURRENT_TIME_SECTION,
+        PromptSection(title="USER ARTICLE", variable="user_article"),
+        PromptSection(title="EXTRACTED ENTITIES", variable="entities"),
+        PromptSection(title="SEARCH QUERIES", variable="generated_search_queries", description="Search queries that were executed to find competitors."),
+        PromptSection(title="COMPETITOR INFORMATION", variable="competitor_information", description="Top web search results obtained for each query."),
+        PromptSection(title="COMPETITOR ANALYSIS", variable="competitor_analysis", description="A brief competitor analysis to get you started."),
+        PromptSection(title="KEYWORD PLANNER DATA", variable="keyword_planner_data", description="Keyword planner data by Google Keyword Planner (one keyword per line, columns separated by \" | \", \"-\" means unknown)."),
+    ],
+)
+
+SUGGESTION_GENERATOR_PROMPT = SectionedPrompt(
+    name="SUGGESTION_GENERATOR_PROMPT",
+    instructions="""
 You are an expert in Search Engine Optimization (SEO) and have deep expertise in generating Keyword-rich url slugs, article titles, and incorporating keywords into articles so that the content can dominate their targeted keywords in search engines. 
 
-To understand timeframe of news and articles and using this for your analysis, the current time in %Y-%m-%d %H:%M:%S format is: {current_time}
+To understand timeframe of news and articles and using this for your analysis, the current time is given in the CURRENT TIME section.
 
 You are provided a news article draft, top competitors found through web search queries, chosen primary and secondary keywords with their reasoning (suggested by Google Keyword Planner). Your job is to finally integrate all of this information into the article so that it can be optimized for search engines and rank high in search results.
 
@@ -275,30 +370,21 @@ For structuring your output, you must follow the structured format provided to y
 2) Article titles are a list of strings.
 3) Revised sentences should be a neatly formatted markdown paragraph spaced properly and easy to read. Each suggestion should show the original sentence and the revised sentence with the keyword inserted and **bolded**. Make it pretty and well formatted and structured. All of this will be one markdown paragraph and should be output as a string as required by the structured format.
 
-7. Finally, we don't want keyword stuffing so only give maximum of 5-7 revised sentences. 
-
----
-Here is the article:
-{user_article}
-
----
-Here are the primary keywords:
-{primary_keywords}
-
----
-Here are the secondary keywords:
-{secondary_keywords}
-
----
-Here is the competitor information:
-{competitor_information}
-
----
-here is a short paragraph of the competitor analysis:
-{competitor_analysis}
-"""
-
-FULL_ARTICLE_SUGGESTION_PROMPT = """
+7. Finally, we don't want keyword stuffing so only give maximum of 5-7 revised sentences.
+""",
+    sections=[
+        CURRENT_TIME_SECTION,
+        PromptSection(title="ARTICLE", variable="user_article"),
+        PromptSection(title="PRIMARY KEYWORDS", variable="primary_keywords"),
+        PromptSection(title="SECONDARY KEYWORDS", variable="secondary_keywords"),
+        PromptSection(title="COMPETITOR INFORMATION", variable="competitor_information"),
+        PromptSection(title="COMPETITOR ANALYSIS", variable="competitor_analysis", description="A short paragraph of the competitor analysis."),
+    ],
+)
+
+FULL_ARTICLE_SUGGESTION_PROMPT = SectionedPrompt(
+    name="FULL_ARTICLE_SUGGESTION_PROMPT",
+    instructions="""
 You are an expert in Search Engine Optimization (SEO) and have deep expertise in revising article drafts by incorporating keyword-rich suggestions to optimize the content for search engines.
 
 You will be provided the original article draft and the sentence level suggestions that were generated after conducting alot of analysis and research. Your job is to generate a full revised article using the sentence level suggestions provided to you.
@@ -309,13 +395,9 @@ You must ensure the following in your output:
 3) Your output should be neatly formatted with headings, subheadings, and paragraphs. Bold the keywords that were inserted in the article.
 
 If either the original article draft or the sentence level suggestions are empty, then you should return "Sorry I was not able to generate the full article suggestions because either the original article draft or the sentence level suggestions are empty."
-
----
-Here is the original article draft:
-{original_article_draft}
-
----
-Here are the sentence level suggestions:
-{sentence_level_suggestions}
-
-"""
\ No newline at end of file
+""",
+    sections=[
+        PromptSection(title="ORIGINAL ARTICLE DRAFT", variable="original_article_draft"),
+        PromptSection(title="SENTENCE LEVEL SUGGESTIONS", variable="sentence_level_suggestions"),
+    ],
+)
@@ -0,0 +1,109 @@
+"""
+Revision-aware runs: reuse the research of the previous revision of a draft that is being edited.
+
+Journalists re-submit a draft after every round of edits. When the topic didn't change, the expensive upstream work
+(search loops, competitor analysis, GKP calls) of the previous revision is still valid and only the keyword masterlist
+and the suggestions have to be generated again for the new text:
+
+1. `load_previous_revision` (before the run) diffs the new draft against the previous one. Drafts that changed too
+   much (`REVISION_MIN_SIMILARITY`) are treated as new articles.
+2. `entity_extractor` always runs, `revision_router` compares its entities with the ones the previous research was
+   done with (`REVISION_MIN_ENTITY_OVERLAP`) and either reuses the research or sends the run through the full pipeline.
+3. `save_revision` (after a run completed) keeps the research of the run for the next revision.
+"""
+
+import difflib
+from typing import Any
+
+from src.agents.keywords_agent.intermediate_state import (
+    get_original_article_draft,
+    get_revision_artifacts,
+    set_revision_artifacts,
+)
+from src.agents.keywords_agent.state import PreviousRevision
+from src.utils.session_store import SessionNotFoundError
+from src.utils.settings import settings
+
+# state fields produced by the nodes between entity_extractor and masterlist_and_primary_keyword_generator that the
+# masterlist and suggestions steps read (web_search_results is not one, competitor_analysis resets it)
+REUSABLE_FIELDS: list[str] = [
+    "generated_search_queries",
+    "competitor_information",
+    "competitive_analysis",
+    "keyword_planner_data",
+]
+
+
+def draft_similarity(previous: str, current: str) -> float:
+    """
+    Word level similarity of two drafts (difflib ratio, 1.0 = same words in the same order).
+    Words instead of characters keep it fast for long articles and ignore whitespace only edits.
+    """
+    return difflib.SequenceMatcher(None, previous.split(), current.split(), autojunk=False).ratio()
+
+
+def entity_overlap(previous: list[str], current: list[str]) -> float:
+    """
+    Jaccard overlap of two entity lists, case and surrounding whitespace are ignored.
+    """
+    previous_set: set[str] = {entity.strip().casefold() for entity in previous if entity.strip()}
+    current_set: set[str] = {entity.strip().casefold() for entity in current if entity.strip()}
+    if not previous_set and not current_set:
+        return 1.0
+    return len(previous_set & current_set) / len(previous_set | current_set)
+
+
+def can_reuse_research(previous_revision: PreviousRevision | None, entities: list[str]) -> bool:
+    """
+    Whether the research of the previous revision is still valid for a draft with these entities.
+    """
+    if not previous_revision:
+        return False
+    return entity_overlap(previous_revision["research_entities"], entities) >= settings.REVISION_MIN_ENTITY_OVERLAP
+
+
+async def load_previous_revision(previous_run_id: str, draft: str) -> PreviousRevision | None:
+    """
+    The research of the previous revision if the new draft is close enough to it to be worth reusing.
+
+    Args:
+        previous_run_id (str): Run of the previous revision.
+        draft (str): The new draft.
+
+    Returns:
+        PreviousRevision | None: None if revision reuse is disabled, the previous run expired or didn't complete,
+        or the draft changed too much.
+    """
+    if not settings.REVISION_REUSE_ENABLED:
+        return None
+
+    try:
+        artifacts: dict[str, Any] | None = await get_revision_artifacts(previous_run_id)
+        previous_draft: str = await get_original_article_draft(previous_run_id)
+    except SessionNotFoundError:
+        return None
+    if artifacts is None:
+        return None
+
+    similarity: float = draft_similarity(previous_draft, draft)
+    if similarity < settings.REVISION_MIN_SIMILARITY:
+        print(f"Draft changed too much since run {previous_run_id} (similarity {similarity:.2f}), running the full pipeline")
+        return None
+
+    return PreviousRevision(
+        run_id=previous_run_id,
+        similarity=round(similarity, 4),
+        research_entities=artifacts.get("research_entities", []),
+        artifacts={field: artifacts[field] for field in REUSABLE_FIELDS if field in artifacts},
+    )
+
+
+async def save_revision(run_id: str, values: dict[str, Any]) -> None:
+    """
+    Keep the research of a completed run (its final state values) for the next revision of the draft.
+    """
+    if not settings.REVISION_REUSE_ENABLED:
+        return
+    artifacts: dict[str, Any] = {field: values[field] for field in REUSABLE_FIELDS if field in values}
+    artifacts["research_entities"] = values.get("research_entities") or values.get("retrieved_entities", [])
+    await set_revision_artifacts(run_id, artifacts)
@@ -1,32 +1,122 @@
 """
 Define the state for the Keyword Agent here.
 """
-from typing import Any, Literal
+from typing import Annotated, Any, Literal, TypedDict
 from langgraph.graph import MessagesState
+from src.tools.search_router import canonicalize_url
+
+
+def merge_planner_results(
+    existing: list[list[dict[str, int | str | dict[str, int]]]] | None,
+    new: list[list[dict[str, int | str | dict[str, int]]]] | None,
+) -> list[list[dict[str, int | str | dict[str, int]]]]:
+    """
+    Reducer for `planner_results`: every fanned out keyword planner call appends its keyword list.
+    Writing None resets the channel (the synthesizer does this to free memory once lists are merged).
+    """
+    if new is None:
+        return []
+    return (existing or []) + new
+
+
+class WebSearchRecord(TypedDict):
+    """
+    One deduplicated web search result in `web_search_results`.
+    """
+    url: str
+    title: str | None
+    score: Any
+    published_date: str | None
+    highlights: Any
+    # every search query that returned this url, in the order they were run (provenance)
+    queries: list[str]
+    # search round (tool_call_count) in which the url was first found
+    round: int
+
+
+def merge_web_search_results(
+    existing: list[WebSearchRecord] | None,
+    new: list[WebSearchRecord] | None,
+) -> list[WebSearchRecord]:
+    """
+    Reducer for `web_search_results`: appends new results in order, deduplicated by canonical url across all search rounds.
+    A url that shows up again only adds its query to the existing record's provenance. Writing None resets the channel.
+    """
+    if new is None:
+        return []
+
+    merged: list[WebSearchRecord] = [WebSearchRecord(**record) for record in existing or []]
+    index_by_url: dict[str, int] = {canonicalize_url(record["url"]): i for i, record in enumerate(merged)}
+
+    for record in new:
+        url: str = canonicalize_url(record["url"])
+        if url not in index_by_url:
+            index_by_url[url] = len(merged)
+            merged.append(WebSearchRecord(**{**record, "queries": list(record["queries"])}))
+            continue
+        # copy before updating so the previous state value is never mutated
+        known: WebSearchRecord = merged[index_by_url[url]]
+        known["queries"] = known["queries"] + [query for query in record["queries"] if query not in known["queries"]]
+
+    return merged
+
+
+class KeywordPlannerTask(TypedDict):
+    """
+    Payload sent to each fanned out `google_keyword_planner` call (one per competitor url).
+    """
+    # seed keywords (retrieved entities) shared by every call
+    seed_keywords: list[str]
+    # competitor url used as seed, "" means a seed-keywords-only call
+    url: str
+    # position of this call in the fan-out (0 = best ranked competitor)
+    index: int
+
+
+class PreviousRevision(TypedDict):
+    """
+    Research of the previous revision of the same draft, offered to `revision_router` for reuse (see revisions.py).
+    """
+    # run that produced the research
+    run_id: str
+    # word level similarity (difflib ratio) of the previous and the new draft
+    similarity: float
+    # entities the research was done with (search queries, GKP seeds)
+    research_entities: list[str]
+    # reusable state fields (revisions.REUSABLE_FIELDS) of the previous run
+    artifacts: dict[str, Any]
 
 
 class KeywordState(MessagesState):
     # user input: draft article
     user_input: str
+    # id of this run, keys the run's session (see intermediate_state.py) and is sent to the client
+    run_id: str
 
     # output from step 1: list of retrieved entities and events from user input
     retrieved_entities: list[str]
 
+    # revision-aware mode: research of the previous revision of this draft (None for a new draft), where revision_router
+    # sends the run (reuse the research or do it again) and the entities the research of this run was done with
+    previous_revision: PreviousRevision | None
+    revision_route: Literal["query_generator", "masterlist_and_primary_keyword_generator"]
+    research_entities: list[str]
+
     # output from step 2: agent generated search queries to find competitors based on retrieved entities
     generated_search_queries: list[str]
     tool_call_count: int
-    web_search_results_accumulated: str
+    # every web search result of every round, deduplicated by url with query provenance (rendered for prompts by render_web_search_results)
+    web_search_results: Annotated[list[WebSearchRecord], merge_web_search_results]
     route_to: Literal["query_generator", "competitor_analysis"]
 
-    # output from step 3: executing search queries: index = rank, dict[str, str | int] = web search result extracted from web_search_results_accumulated
+    # output from step 3: executing search queries: index = rank, dict[str, str | int] = web search result extracted from web_search_results
     competitor_information: list[dict[str, str | int]]
 
     # output from step 4: competitive analysis generated by our agent after comparing our article with competitor content
     competitive_analysis: str
 
-    # output from step 5: google keyword planner data (parallel calls will fill planner_list1 and planner_list2) then a sorter will put them all in keyword_planner_data
-    planner_list1: list[dict[str, int | str | dict[str, int]]]
-    planner_list2: list[dict[str, int | str | dict[str, int]]]
+    # output from step 5: google keyword planner data (parallel calls fanned out over top competitor urls each append one list to planner_results) then a sorter will put them all in keyword_planner_data
+    planner_results: Annotated[list[list[dict[str, int | str | dict[str, int]]]], merge_planner_results]
     keyword_planner_data: list[dict[str, int | str | dict[str, int]]]
 
     # output from step 6: refined keyword masterlist (sorted descending)
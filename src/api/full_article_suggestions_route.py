@@ -1,11 +1,23 @@
+import json
+from typing import AsyncGenerator
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from src.agents.keywords_agent.full_article_generator import suggest_full_article
 
 # Create router with descriptive prefix and tags for API documentation
 router = APIRouter(prefix="/agent/suggestfullarticle", tags=["FULL_ARTICLE_SUGGESTION"])
 
 
+class FullArticleSuggestionRequest(BaseModel):
+    """
+    Request model for full article suggestion API endpoints.
+
+    Attributes:
+        run_id (str): The run id sent by the keyword agent stream ({"type": "run_id", ...} event) of the analysed article
+    """
+    run_id: str
+
+
 class FullArticleSuggestionResponse(BaseModel):
     """
     Response model for full article suggestion API endpoint.
@@ -21,19 +33,23 @@ class FullArticleSuggestionResponse(BaseModel):
 
 
 @router.post("/", response_model=FullArticleSuggestionResponse)
-async def generate_full_article_suggestion() -> FullArticleSuggestionResponse:
+async def generate_full_article_suggestion(request: FullArticleSuggestionRequest) -> FullArticleSuggestionResponse:
     """
     Generate a full article suggestion based on previously processed content.
     
     This endpoint calls the suggest_full_article() method to generate a complete
     article suggestion using the original article draft and sentence-level suggestions
-    that were processed earlier in the workflow.
+    that were processed earlier in the workflow run identified by `request.run_id`.
+    An unknown or expired run id returns success=False.
       Returns:
         FullArticleSuggestionResponse: Response containing the generated article suggestion
     """
+    # imported here so importing the routes (i.e. the mock server) doesn't build the model chain's dependencies
+    from src.agents.keywords_agent.full_article_generator import suggest_full_article
+
     try:
         # Call the suggest_full_article function to generate the article suggestion
-        article_content: str = await suggest_full_article()
+        article_content: str = await suggest_full_article(request.run_id)
         
         # Return successful response with the generated article content
         return FullArticleSuggestionResponse(
@@ -49,4 +65,55 @@ async def generate_full_article_suggestion() -> FullArticleSuggestionResponse:
             success=False,
             article_suggestion="",
             message=f"Failed to generate full article suggestion: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/stream", response_model=None)
+async def stream_full_article_suggestion(request: FullArticleSuggestionRequest) -> StreamingResponse:
+    """
+    Streaming variant of the endpoint above: the article is sent as SSE "data:" frames while the model writes it.
+
+    Frames (same shapes as the keyword agent stream):
+        - {"type": "answer_delta", "event_status": "new", "node": "Full Article Generator", "content": {"field": "article_suggestion", "index": null, "delta": str, "reset": bool}}
+          Append `delta` to the article received so far (replace it if `reset`).
+        - {"type": "complete", "content": str} once the whole article was generated and validated.
+        - {"type": "error", "content": str} if generation failed (same message as the `message` of a failed non streaming response).
+          No frames follow an error.
+    """
+    # imported here so importing the routes (i.e. the mock server) doesn't build the model chain's dependencies
+    from src.agents.keywords_agent.full_article_generator import stream_full_article
+
+    async def event_generator() -> AsyncGenerator[str, None]:
+        """
+        Generates SSE-formatted event strings from the full article stream.
+
+        Yields:
+            str: Properly formatted SSE data frames containing serialized events
+        """
+        try:
+            async for delta in stream_full_article(request.run_id):
+                event: dict = {
+                    "type": "answer_delta",
+                    "event_status": "new",
+                    "node": "Full Article Generator",
+                    "content": delta,
+                }
+                yield f"data: {json.dumps(obj=event)}\n\n"
+
+            yield f"data: {json.dumps(obj={'type': 'complete', 'content': 'Full article suggestion generated successfully'})}\n\n"
+
+        except Exception as e:
+            print(f"Error streaming full article suggestion: {e}")
+            error: dict = {"type": "error", "content": f"Failed to generate full article suggestion: {str(e)}"}
+            yield f"data: {json.dumps(obj=error)}\n\n"
+
+    headers = {
+        "Cache-Control": "no-cache",          # don't cache
+        "Connection": "keep-alive",           # keep the HTTP connection open
+        "X-Accel-Buffering": "no",            # disable buffering in proxies (e.g. Nginx)
+    }
+
+    return StreamingResponse(
+        content=event_generator(),
+        media_type="text/event-stream",
+        headers=headers,
+    )
@@ -9,7 +9,7 @@ Run this server with: python -m src.api.keyword_agent_mock_server
 # import static data and request model
 from src.api.keyword_agent_route import KeywordAgentRequest, router
 from src.api.mock_server_data import STATIC_DATA, MOCK_FULL_ARTICLE_SUGGESTION
-from src.api.full_article_suggestions_route import FullArticleSuggestionResponse
+from src.api.full_article_suggestions_route import FullArticleSuggestionRequest, FullArticleSuggestionResponse
 
 import asyncio
 import json
@@ -39,6 +39,9 @@ router: APIRouter = APIRouter(prefix="/api/test/keyword", tags=["AGENT"])
 @router.post("/stream", response_model=None)
 async def stream_mock_keyword_agent(request: KeywordAgentRequest) -> StreamingResponse:
     async def event_generator() -> AsyncGenerator[str, None]:
+        # the real agent sends its run id first, the mock full article endpoint accepts any id
+        yield f"data: {json.dumps(obj={'type': 'run_id', 'content': 'mock-run'})}\n\n"
+
         counter: int = 0
         for event in STATIC_DATA:
             payload: str = json.dumps(obj=event)
@@ -79,7 +82,7 @@ async def stream_mock_keyword_agent(request: KeywordAgentRequest) -> StreamingRe
 
 
 @router.post("/suggestfullarticle", response_model=FullArticleSuggestionResponse)
-async def mock_generate_full_article_suggestion() -> FullArticleSuggestionResponse:
+async def mock_generate_full_article_suggestion(request: FullArticleSuggestionRequest) -> FullArticleSuggestionResponse:
     """
     Mock endpoint for generating full article suggestions.
 
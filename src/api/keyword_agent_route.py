@@ -3,7 +3,6 @@ from typing import AsyncGenerator
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from src.agents.keywords_agent.graph import run_keyword_agent_stream
 
 router = APIRouter(prefix=f"/agent/keyword", tags=["KEYWORD_AGENT"])
 
@@ -13,9 +12,23 @@ class KeywordAgentRequest (BaseModel):
     
     Attributes:
         user_article (str): The user's input query string to be processed by the agent.
+        session_id (str | None): Editing session of the draft (i.e. the document id). Re-submissions of an edited draft
+            with the same session_id reuse the research of the previous revision when the topic didn't change.
     """
     user_article: str
-    
+    session_id: str | None = None
+
+
+class KeywordAgentResumeRequest(BaseModel):
+    """
+    Request model to resume a failed or interrupted run.
+
+    Attributes:
+        run_id (str): The run id sent as the first event ({"type": "run_id", ...}) of the run to resume.
+    """
+    run_id: str
+
+
 @router.post("/stream", response_model=None)
 async def stream_keyword_agent(request: KeywordAgentRequest) -> StreamingResponse:
     
@@ -26,8 +39,11 @@ async def stream_keyword_agent(request: KeywordAgentRequest) -> StreamingRespons
         Yields:
             str: Properly formatted SSE data frames containing serialized events
         """
-        # Call the agent workflow stream with the user's input query
-        async for event in run_keyword_agent_stream(user_input=request.user_article):
+        # imported here so importing the routes (i.e. the mock server) doesn't pull in the graph, nodes and models
+        from src.agents.keywords_agent.graph import run_shared_keyword_agent_stream
+
+        # Call the agent workflow stream with the user's input query (identical articles share one run)
+        async for event in run_shared_keyword_agent_stream(user_input=request.user_article, session_id=request.session_id):
             """
             run_keyword_agent_stream will break the loop if an error occurs or the agent completes its workflow
             """
@@ -49,3 +65,35 @@ async def stream_keyword_agent(request: KeywordAgentRequest) -> StreamingRespons
         headers=headers,
     )
 
+
+@router.post("/resume", response_model=None)
+async def resume_keyword_agent(request: KeywordAgentResumeRequest) -> StreamingResponse:
+    """
+    Continue a run that failed or whose connection dropped, from its last completed step.
+    Streams the same SSE frames as /stream, but only for the nodes that still have to run.
+    """
+
+    async def event_generator() -> AsyncGenerator[str, None]:
+        """
+        Generates SSE-formatted event strings from the resumed agent workflow stream.
+
+        Yields:
+            str: Properly formatted SSE data frames containing serialized events
+        """
+        # imported here so importing the routes (i.e. the mock server) doesn't pull in the graph, nodes and models
+        from src.agents.keywords_agent.graph import resume_keyword_agent_stream
+
+        async for event in resume_keyword_agent_stream(run_id=request.run_id):
+            yield f"data: {json.dumps(obj=event)}\n\n"
+
+    headers = {
+        "Cache-Control": "no-cache",          # don't cache
+        "Connection": "keep-alive",           # keep the HTTP connection open
+        "X-Accel-Buffering": "no",            # disable buffering in proxies (e.g. Nginx)
+    }
+
+    return StreamingResponse(
+        content=event_generator(),
+        media_type="text/event-stream",
+        headers=headers,
+    )
@@ -0,0 +1,47 @@
+"""
+Read-only endpoint exposing runtime counters (cache hit rates etc.) so we can see how the performance layers behave in production.
+"""
+from typing import Any
+from fastapi import APIRouter
+from src.tools.google_keywords_api import gkp
+from src.tools.web_search_tool import search_router, web_search_cache, web_search_flight
+from src.utils.models_initializer import search_clients
+from src.utils.rate_limiter import rate_limits
+from src.utils.prompt_budget import prompt_builder
+from src.utils.llm_usage import llm_usage
+from src.utils.llm_cache import llm_cache
+from src.utils.model_router import model_health, node_latency
+from src.utils.session_store import session_store
+from src.utils.checkpointer import graph_checkpointer
+from src.utils.shared_runs import shared_runs
+from src.tools.competitor_relevance import competitor_scorer
+
+router = APIRouter(prefix="/stats", tags=["STATS"])
+
+
+@router.get("/")
+async def get_stats() -> dict[str, Any]:
+    """
+    Return a snapshot of the runtime counters of the shared clients and caches.
+
+    Returns:
+        dict[str, Any]: One entry per component. Components that are disabled report None.
+    """
+    return {
+        "gkp_cache": gkp.cache.stats() if gkp.cache is not None else None,
+        "gkp_single_flight": gkp.single_flight.stats(),
+        "web_search_cache": web_search_cache.stats() if web_search_cache is not None else None,
+        "web_search_single_flight": web_search_flight.stats(),
+        "web_search_clients": search_clients.stats(),
+        "web_search_router": search_router.stats(),
+        "rate_limits": rate_limits.stats(),
+        "prompt_tokens": prompt_builder.stats(),
+        "llm_usage": llm_usage.stats(),
+        "llm_cache": llm_cache.stats() if llm_cache is not None else None,
+        "llm_hedging": node_latency.stats(),
+        "llm_routing": model_health.stats(),
+        "router_scorer": competitor_scorer.stats(),
+        "sessions": session_store.stats(),
+        "shared_runs": shared_runs.stats() if shared_runs is not None else None,
+        "checkpoints": graph_checkpointer.stats() if graph_checkpointer is not None else None,
+    }
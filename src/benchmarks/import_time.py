@@ -0,0 +1,125 @@
+"""
+Cold start benchmark: how long importing our entry point modules takes in a fresh interpreter.
+
+Autoscaled workers and the LangGraph dev server pay this on every start, so models, the graph and the tracer are built
+lazily and provider SDKs are imported only when a provider is used. This script guards that:
+
+- every module must import within its time budget (median of a few fresh interpreters),
+- the modules listed in `FORBIDDEN_AT_IMPORT` (provider SDKs, the tracer) must not be imported by it.
+
+It exits with status 1 when a check fails, so it can run in CI.
+
+Run with: python -m src.benchmarks.import_time [--repeat 5] [--budget-scale 1.0] [--top 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# entry point module -> import time budget in seconds (measured on a dev laptop with some headroom)
+IMPORT_BUDGETS: dict[str, float] = {
+    "src.api.keyword_agent_mock_server": 1.0,
+    "src.agents.keywords_agent.graph": 2.5,
+    "src.main": 3.0,
+}
+
+# modules that should only be imported when a request actually needs them
+FORBIDDEN_AT_IMPORT: list[str] = [
+    "langchain_openai",
+    "langchain_mistralai",
+    "langchain_groq",
+    "langchain_google_genai",
+    "tavily",
+    "exa_py",
+    "opik",
+]
+
+# runs in the child interpreter: time the import and report which forbidden modules got loaded
+CHILD_SCRIPT: str = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [name for name in {forbidden!r} if name in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int) -> tuple[float, list[str]]:
+    """
+    Import a module in `repeat` fresh interpreters.
+
+    Returns:
+        tuple[float, list[str]]: median import time in seconds and the forbidden modules it loaded.
+    """
+    timings: list[float] = []
+    loaded: list[str] = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", CHILD_SCRIPT.format(module=module, forbidden=FORBIDDEN_AT_IMPORT)],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": os.getcwd()},
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+        # the report is the last line, modules may print while importing
+        report: dict = json.loads(result.stdout.strip().splitlines()[-1])
+        timings.append(report["seconds"])
+        loaded = report["loaded"]
+    return statistics.median(timings), loaded
+
+
+def heaviest_imports(module: str, top: int) -> list[tuple[str, float]]:
+    """
+    Third party packages that take the longest to import (from `python -X importtime`), to see what to make lazy next.
+    """
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+    )
+    # top level package -> largest cumulative time of any of its modules (that is the time to import the package)
+    packages: dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        # format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        package: str = name.strip().split(".")[0]
+        # our own package contains everything else, skip it
+        if package == module.split(".")[0]:
+            continue
+        packages[package] = max(packages.get(package, 0.0), int(cumulative) / 1_000_000)
+    return sorted(packages.items(), key=lambda row: row[1], reverse=True)[:top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Guard the import (cold start) time of our entry points.")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module, the median is used")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply every budget, i.e. for slow CI machines")
+    parser.add_argument("--top", type=int, default=10, help="heaviest imports to list for modules over budget (0 to skip)")
+    args = parser.parse_args()
+
+    failed: bool = False
+    for module, budget in IMPORT_BUDGETS.items():
+        budget *= args.budget_scale
+        seconds, loaded = measure(module, args.repeat)
+        over_budget: bool = seconds > budget
+        status: str = "FAIL" if over_budget or loaded else "ok"
+        print(f"[{status}] {module}: {seconds:.3f}s (budget {budget:.2f}s)")
+        if loaded:
+            print(f"       imported eagerly: {', '.join(loaded)}")
+        if over_budget and args.top:
+            for name, cumulative in heaviest_imports(module, args.top):
+                print(f"       {cumulative:7.3f}s  {name}")
+        failed = failed or status == "FAIL"
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,17 +3,86 @@ This is the main FastAPI entrypoint to be run for starting the server
 
 Run python -m src.main
 """
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.api.keyword_agent_route import router as keyword_agent_router
 from src.api.full_article_suggestions_route import router as full_article_suggestions_router
+from src.api.stats_route import router as stats_router
+from src.tools.google_keywords_api import gkp
+from src.tools.web_search_tool import web_search_cache
+from src.utils.models_initializer import search_clients, warm_up_models
+from src.utils.prompt_budget import count_tokens
+from src.utils.llm_cache import llm_cache
+from src.utils.session_store import session_store
+from src.utils.checkpointer import graph_checkpointer
+from src.utils.shared_runs import shared_runs
+from src.utils.settings import settings
+
+
+def warm_up_agent() -> None:
+    """
+    Import and build the agent graph, its tracer and every node model chain. They are all lazy so that the server starts
+    (and passes health checks) quickly, this builds them in a worker thread right after startup instead of in the first request.
+    """
+    try:
+        from src.agents.keywords_agent.graph import get_keyword_agent, get_tracer
+        import src.agents.keywords_agent.full_article_generator  # noqa: F401 (registers its lazy model chain)
+
+        get_keyword_agent()
+        get_tracer()
+        warm_up_models()
+    except Exception as e:
+        print(f"Error warming up the agent: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Startup and shutdown hooks for long-lived resources shared across requests.
+    Everything opened before `yield` lives for the whole server process and is closed after it.
+    """
+    # open the shared Google Keyword Planner connection pool
+    await gkp.start()
+    # load the tokenizer used for prompt budgets now (tiktoken may download its encoding) instead of inside the first request
+    await asyncio.to_thread(count_tokens, "")
+    # build the graph, tracer and models in the background, the server accepts requests meanwhile
+    warm_up: asyncio.Future[None] | None = (
+        asyncio.ensure_future(asyncio.to_thread(warm_up_agent)) if settings.WARM_UP_ON_STARTUP else None
+    )
+    try:
+        yield
+    finally:
+        if warm_up is not None and not warm_up.done():
+            warm_up.cancel()
+        # stop shared runs first, they still use the clients and caches closed below
+        if shared_runs is not None:
+            await shared_runs.aclose()
+        # stop the speculative GKP calls before their client is closed
+        await gkp.cancel_prefetches()
+        # close pooled connections and the on-disk cache so the server shuts down cleanly
+        await gkp.aclose()
+        await search_clients.aclose()
+        if gkp.cache is not None:
+            gkp.cache.close()
+        if web_search_cache is not None:
+            web_search_cache.close()
+        if llm_cache is not None:
+            llm_cache.close()
+        session_store.close()
+        if graph_checkpointer is not None:
+            await graph_checkpointer.aclose()
 
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Test Agent API",
         version="1.0.0",
+        lifespan=lifespan,
     )
 
     # allow all origins — will adjust in production!
@@ -26,6 +95,7 @@ def create_app() -> FastAPI:
     )    # mount routes here
     app.include_router(keyword_agent_router)
     app.include_router(full_article_suggestions_router)
+    app.include_router(stats_router)
     return app
 
 # initialize the FastAPI app
@@ -0,0 +1,297 @@
+"""
+Local relevance scorer for web search results, used by `router_and_state_updater` instead of the router LLM when the
+decision is clear.
+
+After a search round the router decides whether the competitors found so far are good enough for competitor analysis
+(the router prompt's rule: a strong majority, about 7 out of 10, of the results are real competitors of the article).
+Most rounds are clear cases, so the decision is made from the text we already have:
+
+- text relevance: BM25 of each result (title + highlights) against the article's most frequent terms (tf weighted)
+  and the entities, normalized to 0-1,
+- entity coverage: share of the entities whose words all appear in the result,
+- recency: exponential decay of the result's age (`published_date`), unknown dates count as neutral.
+
+A result's relevance is its topicality (weighted sum of text relevance and entity coverage) discounted by recency: an
+old result on the topic loses up to RECENCY_DISCOUNT of it, a recent result on another topic doesn't gain any. A result
+is "good" when its relevance reaches `ROUTER_SCORER_GOOD_RESULT`. When the share of good results is clearly high or
+clearly low the route is decided locally, in between the router LLM is still asked.
+
+The defaults are calibrated in tests/test_competitor_relevance.py, on the sample searches in
+reference_docs/web_search_responses.txt and on results written for the test (a second story, the Harvard funding freeze,
+and near-topic results for both stories). The groups overlap, the good result threshold of 0.25 is no clean cut:
+
+- results about the story score 0.30-0.80 (Penn / Title IX) and 0.47-0.75 (Harvard), but a result only partly about it
+  can score less (the DP's federal impacts page on Penn: 0.18),
+- unrelated results (college jobs market, Penn State, Pittsburgh sports, RAG tools) and other stories about the same
+  university or law score 0.23 or less, only 0.02 under the threshold,
+- the same kind of story at another institution (other transgender athlete Title IX cases, another university's funding
+  fight) scores like the story itself (0.26-0.62): the scorer matches topics, not stories.
+
+Single results near the threshold are unreliable, so only clear majorities are decided locally: with the default shares,
+competitor analysis needs 4 of 5 good results (8 of 10 after two rounds) and another search round at most 1 of 5,
+everything in between is left to the router LLM.
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Literal
+
+import numpy as np
+
+from src.utils.settings import settings
+
+Route = Literal["query_generator", "competitor_analysis"]
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# common english words that carry no topic (articles, pronouns, auxiliaries, news filler)
+STOPWORDS: frozenset[str] = frozenset(
+    """
+    a about above after again against all also am an and any are as at be because been before being below between both
+    but by can could did do does doing down during each few for from further had has have having he her here hers him
+    his how i if in into is it its itself just me more most my no nor not now of off on once only or other our ours out
+    over own said same she should so some such than that the their theirs them then there these they this those through
+    to too under until up very was we were what when where which while who whom why will with would you your yours
+    new news says year years one two three first last week day time like get told according
+    """.split()
+)
+
+# BM25 parameters (the usual defaults)
+BM25_K1: float = 1.2
+BM25_B: float = 0.75
+# entity words weigh more than article words in the query, they are what the article is about
+ENTITY_TERM_WEIGHT: float = 2.0
+# weights of text relevance and entity coverage in a result's topicality
+TOPIC_WEIGHTS: tuple[float, float] = (0.55, 0.45)
+# share of its topicality a result loses at recency 0. Recency only discounts, an added recency term lifted fresh
+# off-topic results (every sample search result is a few days old) into the range of on-topic ones
+RECENCY_DISCOUNT: float = 0.2
+# recency of results without (parseable) date
+UNKNOWN_RECENCY: float = 0.5
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercase word tokens without stopwords and single characters.
+    """
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+def parse_published_date(value: Any) -> datetime | None:
+    """
+    Parse the dates search providers return: RFC 2822 ("Fri, 16 May 2025 10:40:01 GMT") or ISO 8601.
+
+    Returns:
+        datetime | None: timezone aware datetime, None if the value can't be parsed.
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        parsed: datetime = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def _result_text(record: dict[str, Any]) -> str:
+    highlights: Any = record.get("highlights")
+    if isinstance(highlights, list):
+        highlights = " ".join(str(highlight) for highlight in highlights)
+    return f"{record.get('title') or ''} {highlights or ''}"
+
+
+@dataclass
+class RelevanceDecision:
+    """
+    Outcome of scoring a set of search results.
+
+    Attributes:
+        route (Route | None): The decided route, None if the case is ambiguous and the router LLM should decide.
+        good_share (float): Share of results that count as real competitors.
+        relevance (list[float]): Relevance (0-1) of each result, in input order.
+    """
+
+    route: Route | None
+    good_share: float
+    relevance: list[float]
+
+
+class CompetitorRelevanceScorer:
+    """
+    Scores web search results against the article and decides the router's route when the case is clear.
+
+    Example:
+        >>> decision = competitor_scorer.decide(article, entities, web_search_results)
+        >>> route = decision.route or await ask_router_llm()
+    """
+
+    def __init__(
+        self,
+        good_result: float,
+        analysis_share: float,
+        retry_share: float,
+        recency_half_life_days: float,
+        article_terms: int,
+    ) -> None:
+        """
+        Args:
+            good_result (float): Relevance from which a result counts as a real competitor.
+            analysis_share (float): Share of good results from which competitor analysis is decided locally.
+            retry_share (float): Share of good results up to which another search round is decided locally.
+            recency_half_life_days (float): Age in days at which a result's recency is 0.5.
+            article_terms (int): Number of the article's most frequent terms used in the query.
+        """
+        self.good_result = good_result
+        self.analysis_share = analysis_share
+        self.retry_share = retry_share
+        self.recency_half_life_days = recency_half_life_days
+        self.article_terms = article_terms
+
+        # counters
+        self.local_decisions: dict[str, int] = {"competitor_analysis": 0, "query_generator": 0}
+        self.ambiguous: int = 0
+
+    def _query(self, article: str, entities: list[str]) -> dict[str, float]:
+        """
+        Query term -> weight: the article's most frequent terms weighted by 1 + log(frequency) (the tf part of tf-idf)
+        and every entity word with ENTITY_TERM_WEIGHT.
+        """
+        query: dict[str, float] = {
+            term: 1.0 + math.log(count) for term, count in Counter(tokenize(article)).most_common(self.article_terms)
+        }
+        for entity in entities:
+            for term in tokenize(entity):
+                query[term] = max(query.get(term, 0.0), ENTITY_TERM_WEIGHT)
+        return query
+
+    @staticmethod
+    def text_relevance(query: dict[str, float], documents: list[list[str]]) -> np.ndarray:
+        """
+        BM25 score of each document for the weighted query, divided by the score of an average length document that
+        contains every query term once (clipped to 1), so 0 = no match and 1 = the whole query matched.
+
+        The idf part of BM25 is left out on purpose: the results all come from searches for this topic, so the terms
+        that appear in every result are the topic itself, a corpus idf would count exactly those as noise.
+        """
+        if not documents or not query:
+            return np.zeros(len(documents))
+
+        terms: list[str] = list(query)
+        weights: np.ndarray = np.array([query[term] for term in terms])
+        # term frequencies, shape (documents, terms)
+        counters: list[Counter[str]] = [Counter(document) for document in documents]
+        tf: np.ndarray = np.array([[counter[term] for term in terms] for counter in counters], dtype=float)
+        lengths: np.ndarray = np.array([len(document) for document in documents], dtype=float)
+        average_length: float = float(lengths.mean()) or 1.0
+
+        length_norm: np.ndarray = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+        scores: np.ndarray = (tf * (BM25_K1 + 1) / (tf + length_norm[:, None])) @ weights
+        # a term found once in an average length document contributes exactly its weight
+        return np.minimum(scores / weights.sum(), 1.0)
+
+    @staticmethod
+    def entity_coverage(entities: list[str], documents: list[list[str]]) -> np.ndarray:
+        """
+        Share of the entities whose words all appear in each document (1 if there are no entities).
+        """
+        entity_terms: list[set[str]] = [set(tokenize(entity)) for entity in entities]
+        entity_terms = [terms for terms in entity_terms if terms]
+        if not entity_terms:
+            return np.ones(len(documents))
+        document_sets: list[set[str]] = [set(document) for document in documents]
+        return np.array(
+            [sum(terms <= document for terms in entity_terms) / len(entity_terms) for document in document_sets]
+        )
+
+    def recency(self, records: list[dict[str, Any]], now: datetime) -> np.ndarray:
+        """
+        0.5 ** (age / half life) of each result, UNKNOWN_RECENCY when the date is missing.
+        """
+        values: list[float] = []
+        for record in records:
+            published: datetime | None = parse_published_date(record.get("published_date"))
+            if published is None:
+                values.append(UNKNOWN_RECENCY)
+                continue
+            age_days: float = max((now - published).total_seconds() / 86400, 0.0)
+            values.append(math.pow(0.5, age_days / self.recency_half_life_days))
+        return np.array(values)
+
+    def decide(
+        self,
+        article: str,
+        entities: list[str],
+        records: list[dict[str, Any]],
+        now: datetime | None = None,
+    ) -> RelevanceDecision:
+        """
+        Score the results and decide the route if the share of good results is clearly high or low.
+
+        Args:
+            article (str): The user's article.
+            entities (list[str]): The extracted entities.
+            records (list[dict[str, Any]]): Every web search result so far (WebSearchRecord).
+            now (datetime | None): Reference time for recency. Defaults to the current time.
+
+        Returns:
+            RelevanceDecision: The route (None if ambiguous), the share of good results and each result's relevance.
+        """
+        if not records:
+            # nothing found at all, another search round is the only sensible option
+            self.local_decisions["query_generator"] += 1
+            return RelevanceDecision(route="query_generator", good_share=0.0, relevance=[])
+
+        documents: list[list[str]] = [tokenize(_result_text(record)) for record in records]
+        text_weight, entity_weight = TOPIC_WEIGHTS
+        topicality: np.ndarray = (
+            text_weight * self.text_relevance(self._query(article, entities), documents)
+            + entity_weight * self.entity_coverage(entities, documents)
+        )
+        recency: np.ndarray = self.recency(records, now or datetime.now(timezone.utc))
+        relevance: np.ndarray = topicality * (1 - RECENCY_DISCOUNT * (1 - recency))
+        good_share: float = float((relevance >= self.good_result).mean())
+
+        route: Route | None = None
+        if good_share >= self.analysis_share:
+            route = "competitor_analysis"
+        elif good_share <= self.retry_share:
+            route = "query_generator"
+
+        if route is None:
+            self.ambiguous += 1
+        else:
+            self.local_decisions[route] += 1
+        return RelevanceDecision(
+            route=route, good_share=round(good_share, 4), relevance=[round(float(value), 4) for value in relevance]
+        )
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: local decisions per route and ambiguous cases left to the router LLM.
+        """
+        local: int = sum(self.local_decisions.values())
+        total: int = local + self.ambiguous
+        return {
+            "local_decisions": dict(self.local_decisions),
+            "ambiguous": self.ambiguous,
+            "local_ratio": round(local / total, 4) if total else 0.0,
+        }
+
+
+# *******************************************************
+# Singleton scorer to be used throughout the application
+# *******************************************************
+competitor_scorer = CompetitorRelevanceScorer(
+    good_result=settings.ROUTER_SCORER_GOOD_RESULT,
+    analysis_share=settings.ROUTER_SCORER_ANALYSIS_SHARE,
+    retry_share=settings.ROUTER_SCORER_RETRY_SHARE,
+    recency_half_life_days=settings.ROUTER_SCORER_RECENCY_HALF_LIFE_DAYS,
+    article_terms=settings.ROUTER_SCORER_ARTICLE_TERMS,
+)
@@ -1,8 +1,17 @@
 import os
+import asyncio
+import importlib.util
 from typing import Any
+from urllib.parse import urlsplit, urlunsplit
 import httpx  # Use httpx for async HTTP requests
 from httpx import Response, RequestError, TimeoutException, ConnectError
 
+from src.tools.keyword_metrics import KeywordMetricsTable
+from src.utils.cache import TieredCache, make_cache_key
+from src.utils.single_flight import SingleFlight
+from src.utils.rate_limiter import rate_limits
+from src.utils.settings import settings
+
 # Get base url from environment variable
 BASE_URL = os.getenv("GKP_URL", "")
 
@@ -13,21 +22,102 @@ class GoogleKeywordsAPI:
     This class provides methods to generate keyword ideas, retrieve static test data,
     and check the API status.
 
+    The client owns one long-lived `httpx.AsyncClient` so every call reuses the same keep-alive
+    connection pool instead of paying DNS, TCP and TLS setup again. The pool is created lazily on first use
+    (or eagerly with `start()`) and must be released with `aclose()`, which the FastAPI lifespan does on shutdown.
+
+    Results of `generate_keywords` can optionally be cached (see `cache`) because Keyword Planner metrics only change monthly,
+    and identical requests that are in flight at the same time are coalesced into one upstream call (see `single_flight`).
+    Only the upstream requests go through the "gkp" rate limit governor (the one bound on GKP concurrency), calls served
+    by the cache or by an in-flight call don't.
+
     Attributes:
         base_url: The base URL of the Google Keywords API.
         timeout: The timeout for API requests in seconds.
+        limits: Connection pool limits shared by all requests made through this client.
+        http2: Whether HTTP/2 is negotiated with the microservice.
+        cache: Optional TTL cache in front of `generate_keywords`. None disables caching.
+        single_flight: Coalesces concurrent identical `generate_keywords` calls. Results are shared, treat them as read-only.
     """
 
-    def __init__(self, base_url: str = BASE_URL, timeout: int = 45) -> None:
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        timeout: int = 45,
+        max_connections: int = settings.GKP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = settings.GKP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = settings.GKP_KEEPALIVE_EXPIRY,
+        http2: bool = settings.GKP_HTTP2,
+        cache: TieredCache | None = None,
+    ) -> None:
         """
         Initialize the Google Keywords API client.
 
         Args:
             base_url: The base URL of the API. Defaults to the value of the GKP_URL environment variable.
             timeout: The timeout for API requests in seconds. Defaults to 45.
+            max_connections: Maximum number of concurrent connections in the pool. Defaults to settings.GKP_MAX_CONNECTIONS.
+            max_keepalive_connections: Maximum number of idle connections kept alive. Defaults to settings.GKP_MAX_KEEPALIVE_CONNECTIONS.
+            keepalive_expiry: Seconds an idle connection is kept before it is closed. Defaults to settings.GKP_KEEPALIVE_EXPIRY.
+            http2: Whether to enable HTTP/2. Requires the optional `h2` package, otherwise we fall back to HTTP/1.1.
+            cache: Optional TieredCache used to memoize `generate_keywords`. Defaults to None (no caching).
         """
         self.base_url = base_url
         self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+
+        # httpx only supports HTTP/2 when the `h2` package is installed, so we don't want a missing extra to crash the app
+        if http2 and importlib.util.find_spec("h2") is None:
+            print("HTTP/2 requested for Google Keywords API but `h2` is not installed. Falling back to HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+
+        # created lazily so the client can be constructed at import time outside of a running event loop
+        self._client: httpx.AsyncClient | None = None
+
+        self.cache = cache
+        self.single_flight = SingleFlight(name="gkp")
+
+        # background calls started by `prefetch`, per run id (referenced here so they aren't garbage collected mid-flight)
+        self._prefetches: dict[str, set[asyncio.Task[None]]] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Return the shared async HTTP client, creating it (and its connection pool) on first use.
+
+        Returns:
+            The pooled httpx.AsyncClient used for every request made by this instance.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+            )
+        return self._client
+
+    async def start(self) -> None:
+        """
+        Eagerly open the connection pool. Called from the FastAPI lifespan on startup so the first request
+        doesn't pay for client construction.
+        """
+        self._get_client()
+
+    async def aclose(self) -> None:
+        """
+        Close the shared HTTP client and every pooled connection. Safe to call more than once.
+        Upstream calls that are still in flight are cancelled first, so none of them uses the closed client.
+        Called from the FastAPI lifespan on shutdown (after `cancel_prefetches`).
+        """
+        await self.single_flight.cancel()
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
 
     async def check_api_status(self) -> dict[str, str]:
         """
@@ -45,17 +135,15 @@ class GoogleKeywordsAPI:
             >>> await api.check_api_status()
             {'message': 'Google Ads Keyword Microservice is running'}
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response: Response = await client.get(
-                    url=f"{self.base_url}/"
-                )
-                response.raise_for_status()
-                return response.json()
-            except ConnectError:
-                raise ConnectError("Google Keywords API is not reachable")
-            except RequestError as e:
-                raise
+        client = self._get_client()
+        try:
+            response: Response = await client.get(url="/")
+            response.raise_for_status()
+            return response.json()
+        except ConnectError:
+            raise ConnectError("Google Keywords API is not reachable")
+        except RequestError as e:
+            raise
 
     async def generate_keywords(
         self,
@@ -87,14 +175,77 @@ class GoogleKeywordsAPI:
             >>> print(results[0]["text"])
             'coffee'
         """
-        return await self._execute_keyword_request(
-            endpoint="/keywords/generate",
-            keywords=keywords,
-            url=url,
-            location_id=location_id,
-            language_id=language_id
+        # empty seeds are rejected by _execute_keyword_request, no need to look anything up
+        if not keywords:
+            raise ValueError("Keywords list cannot be empty")
+
+        request_key: str = self._request_key(
+            keywords=keywords, url=url, location_id=location_id, language_id=language_id
         )
 
+        # serve from cache if the same (normalized) request was made within the TTL
+        if self.cache is not None:
+            cached: list[dict[str, Any]] | None = await self.cache.get(request_key)
+            if cached is not None:
+                return cached
+
+        async def fetch_and_store() -> list[dict[str, Any]]:
+            # the governor slot (see _execute_keyword_request) covers the upstream request only, waiters don't hold one
+            results: list[dict[str, Any]] = await self._execute_keyword_request(
+                endpoint="/keywords/generate",
+                keywords=keywords,
+                url=url,
+                location_id=location_id,
+                language_id=language_id
+            )
+            # only successful responses reach this point, errors are never cached
+            if self.cache is not None:
+                await self.cache.set(request_key, results)
+            return results
+
+        # identical requests that are already in flight (i.e. concurrent runs on the same story) share one upstream call
+        return await self.single_flight.do(request_key, fetch_and_store)
+
+    def prefetch(self, keywords: list[str], url: str, run_id: str) -> None:
+        """
+        Start `generate_keywords` in the background. The identical call made later is served by the single flight while
+        the prefetch runs and by the cache once it is done. Errors are only printed, the later call makes the request again.
+
+        Args:
+            keywords: Seed keywords.
+            url: Seed url ("" for seeds only).
+            run_id: The agent run the prefetch belongs to, see `cancel_prefetches`.
+        """
+
+        async def run() -> None:
+            try:
+                await self.generate_keywords(keywords=keywords, url=url)
+            except Exception as e:
+                print(f"Error occurred in GKP prefetch (url={url}): {e}")
+
+        task: asyncio.Task[None] = asyncio.ensure_future(run())
+        self._prefetches.setdefault(run_id, set()).add(task)
+        task.add_done_callback(lambda done: self._forget_prefetch(run_id, done))
+
+    def _forget_prefetch(self, run_id: str, task: asyncio.Task[None]) -> None:
+        tasks: set[asyncio.Task[None]] | None = self._prefetches.get(run_id)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._prefetches[run_id]
+
+    async def cancel_prefetches(self, run_id: str | None = None) -> None:
+        """
+        Cancel the prefetches of a run that ended (every run's on shutdown when run_id is None) and wait for them.
+        Only the prefetch stops waiting, an upstream request it started keeps going for the other callers (single flight)
+        and still lands in the cache, where a resume of the run finds it.
+        """
+        runs: list[str] = list(self._prefetches) if run_id is None else [run_id]
+        tasks: list[asyncio.Task[None]] = [task for run in runs for task in self._prefetches.get(run, ())]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
     async def get_static_keywords(
         self,
         keywords: list[str],
@@ -172,65 +323,89 @@ class GoogleKeywordsAPI:
             "language_id": language_id
         }
 
-        # Use async HTTP client to make POST request
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
+        # Use the pooled async HTTP client to make POST request (connections are reused across calls)
+        client = self._get_client()
+        try:
+            # wait for the GKP rate limit governor so concurrent runs queue instead of tripping the API's quota
+            async with rate_limits.slot("gkp"):
                 response: Response = await client.post(
-                    url=f"{self.base_url}{endpoint}",
+                    url=endpoint,
                     json=payload
                 )
                 response.raise_for_status()
-                # Parse and transform the response
-                return await self._parse_keywords_response(response.json())
-            except ConnectError:
-                raise ConnectError(f"Google Keywords API is not reachable at {endpoint}")
-            except TimeoutException:
-                raise TimeoutException(f"Request to {endpoint} timed out after {self.timeout} seconds")
-            except RequestError as e:
-                raise
+            # Parse and transform the response
+            return await self._parse_keywords_response(response.json())
+        except ConnectError:
+            raise ConnectError(f"Google Keywords API is not reachable at {endpoint}")
+        except TimeoutException:
+            raise TimeoutException(f"Request to {endpoint} timed out after {self.timeout} seconds")
+        except RequestError as e:
+            raise
+
+    @staticmethod
+    def _request_key(keywords: list[str], url: str, location_id: str, language_id: str) -> str:
+        """
+        Build the key for a keyword request from normalized inputs so that requests which only differ in
+        seed order, casing, whitespace or url formatting share one cache entry and one in-flight call.
+
+        Args:
+            keywords: Seed keywords.
+            url: Seed url (may be empty).
+            location_id: The location ID string.
+            language_id: The language ID string.
+
+        Returns:
+            The request key string.
+        """
+        # lowercase, collapse whitespace, drop empties and duplicates, order independent
+        normalized_keywords: list[str] = sorted(
+            {" ".join(keyword.lower().split()) for keyword in keywords if keyword.strip()}
+        )
+
+        # lowercase scheme and host, drop fragment and trailing slash. Path and query are kept as is (they are case sensitive)
+        normalized_url: str = url.strip()
+        if normalized_url:
+            parts = urlsplit(normalized_url)
+            normalized_url = urlunsplit(
+                (parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, "")
+            )
 
-    async def _parse_keywords_response(self, response_data: dict[str, Any]) -> list[dict[str, int | str | dict[str, int]]]:
+        return make_cache_key("gkp", normalized_keywords, normalized_url, location_id.strip(), language_id.strip())
+
+    async def _parse_keywords_response(self, response_data: dict[str, Any]) -> list[dict[str, Any]]:
         """
         Parse and transform the API response into a simplified format.
         Reference to `reference_docs/gkp_raw_sample_response.json` to understand the input to this method.
         Reference to `reference_docs/gkp_refined_response.json` to understand the output of this method.
 
+        The raw results are loaded into a columnar KeywordMetricsTable, so trend features are computed for all keywords
+        at once and the top 25 are selected with a partial sort instead of sorting the full list.
+
         Args:
             response_data: The raw API response data.
 
         Returns:
-            A list of dictionaries containing simplified keyword data, sorted by 
-            average monthly searches (highest to lowest) and limited to top 25 results.
-        """
-        results = []
-        # Process each keyword in the results
-        for keyword_data in response_data.get("results", []):
-            keyword_text = keyword_data.get("text", "")
-            metrics = keyword_data.get("keyword_idea_metrics", {})
-            
-            # Format monthly search volumes
-            monthly_volumes = {}
-            for volume in metrics.get("monthly_search_volumes", []):
-                month = volume.get("month", "").capitalize()
-                year = volume.get("year", "")
-                searches = volume.get("monthly_searches", "0")
-                # Format as "Month Year": searches
-                date_key = f"{month} {year}"
-                monthly_volumes[date_key] = int(searches)
-                
-            # Create simplified keyword object
-            keyword_obj = {
-                "text": keyword_text,
-                "competition": metrics.get("competition", ""),
-                "average_monthly_searches": int(metrics.get("avg_monthly_searches", "0")),
-                "competition_index": int(metrics.get("competition_index", "0")),
-                "monthly_search_volumes": monthly_volumes
-            }
-            
-            results.append(keyword_obj)
-            
-        # Sort by average_monthly_searches (highest to lowest)
-        results.sort(key=lambda x: x["average_monthly_searches"], reverse=True)
-        
-        # Limit to top 25 results
-        return results[:25]
+            A list of dictionaries containing simplified keyword data plus trend features (yoy_growth, momentum_3m,
+            peak_month, volatility), sorted by average monthly searches (highest to lowest) and limited to top 25 results.
+        """
+        table = KeywordMetricsTable.from_gkp_results(response_data.get("results", []))
+
+        # Limit to top 25 results sorted by average_monthly_searches (highest to lowest)
+        return table.top_k(25).to_records()
+
+
+# *******************************************************
+# Shared instance so the whole app reuses one connection pool and one result cache.
+# Its lifecycle is tied to the FastAPI lifespan in src/main.py
+# *******************************************************
+gkp_cache: TieredCache | None = (
+    TieredCache(
+        namespace="gkp",
+        default_ttl=settings.GKP_CACHE_TTL_SECONDS,
+        max_memory_entries=settings.GKP_CACHE_MAX_MEMORY_ENTRIES,
+        sqlite_path=settings.CACHE_DB_PATH if settings.CACHE_PERSISTENT else None,
+    )
+    if settings.GKP_CACHE_ENABLED
+    else None
+)
+gkp = GoogleKeywordsAPI(cache=gkp_cache)
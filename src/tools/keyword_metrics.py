@@ -0,0 +1,356 @@
+"""
+Columnar (NumPy backed) representation of Google Keyword Planner (GKP) results.
+
+Instead of one dict per keyword we keep parallel arrays (one entry per keyword) plus a keyword x month search volume
+matrix. This lets us compute trend features for every keyword at once, pick the top-k keywords with a partial sort and
+render the data compactly for prompts. It scales to the hundreds of keywords the keyword planner fan-out can return.
+
+Reference to `reference_docs/gkp_raw_sample_response.json` for the raw input and
+`reference_docs/gkp_refined_response.py` for the record format (`to_records`) used in the graph state.
+"""
+
+import warnings
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import numpy as np
+
+MONTH_NAMES: list[str] = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+_MONTH_NUMBER: dict[str, int] = {name.upper(): number for number, name in enumerate(MONTH_NAMES, start=1)}
+
+# columns rendered by `render_compact`, names match the keys of `to_records` so LLMs can copy values exactly
+COMPACT_COLUMNS: list[str] = [
+    "text",
+    "average_monthly_searches",
+    "competition",
+    "competition_index",
+    "yoy_growth",
+    "momentum_3m",
+    "peak_month",
+    "volatility",
+]
+
+
+@dataclass
+class KeywordMetricsTable:
+    """
+    Array-backed GKP results. Row i of every array (and of `volumes`) describes keyword i.
+
+    Attributes:
+        keywords (np.ndarray): keyword texts, shape (n,), dtype object.
+        competition (np.ndarray): competition level ("LOW", "MEDIUM", "HIGH" or ""), shape (n,), dtype object.
+        competition_index (np.ndarray): competition index 0-100, shape (n,), dtype int64.
+        average_monthly_searches (np.ndarray): average monthly searches, shape (n,), dtype int64.
+        months (list[tuple[int, int]]): chronologically sorted (year, month) of each volume column.
+        volumes (np.ndarray): monthly searches, shape (n, len(months)), dtype float64. NaN where GKP gave no value.
+    """
+
+    keywords: np.ndarray
+    competition: np.ndarray
+    competition_index: np.ndarray
+    average_monthly_searches: np.ndarray
+    months: list[tuple[int, int]]
+    volumes: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.keywords.shape[0])
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    @classmethod
+    def _build(
+        cls,
+        keywords: list[str],
+        competition: list[str],
+        competition_index: list[int],
+        average_monthly_searches: list[int],
+        monthly: list[dict[tuple[int, int], float]],
+    ) -> "KeywordMetricsTable":
+        """
+        Build the table from per keyword python lists. `monthly` maps (year, month) -> searches for each keyword.
+        """
+        months: list[tuple[int, int]] = sorted({month for row in monthly for month in row})
+        column: dict[tuple[int, int], int] = {month: index for index, month in enumerate(months)}
+
+        volumes = np.full((len(keywords), len(months)), np.nan, dtype=np.float64)
+        for row_index, row in enumerate(monthly):
+            for month, searches in row.items():
+                volumes[row_index, column[month]] = searches
+
+        return cls(
+            keywords=np.array(keywords, dtype=object),
+            competition=np.array(competition, dtype=object),
+            competition_index=np.array(competition_index, dtype=np.int64),
+            average_monthly_searches=np.array(average_monthly_searches, dtype=np.int64),
+            months=months,
+            volumes=volumes,
+        )
+
+    @classmethod
+    def from_gkp_results(cls, results: list[dict[str, Any]]) -> "KeywordMetricsTable":
+        """
+        Build the table from the raw `results` list returned by the GKP microservice.
+
+        Args:
+            results (list[dict[str, Any]]): raw GKP results, each with "text" and "keyword_idea_metrics".
+
+        Returns:
+            KeywordMetricsTable: one row per keyword in the same order as the input.
+        """
+        keywords: list[str] = []
+        competition: list[str] = []
+        competition_index: list[int] = []
+        average_monthly_searches: list[int] = []
+        monthly: list[dict[tuple[int, int], float]] = []
+
+        for keyword_data in results:
+            metrics: dict[str, Any] = keyword_data.get("keyword_idea_metrics", {})
+            keywords.append(keyword_data.get("text", ""))
+            competition.append(metrics.get("competition", ""))
+            competition_index.append(int(metrics.get("competition_index", "0")))
+            average_monthly_searches.append(int(metrics.get("avg_monthly_searches", "0")))
+
+            row: dict[tuple[int, int], float] = {}
+            for volume in metrics.get("monthly_search_volumes", []):
+                month_number: int | None = _MONTH_NUMBER.get(str(volume.get("month", "")).upper())
+                year: str = str(volume.get("year", ""))
+                if month_number is None or not year.isdigit():
+                    continue
+                row[(int(year), month_number)] = float(volume.get("monthly_searches", "0"))
+            monthly.append(row)
+
+        return cls._build(keywords, competition, competition_index, average_monthly_searches, monthly)
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict[str, Any]]) -> "KeywordMetricsTable":
+        """
+        Build the table from refined keyword records (the format stored in the graph state, see `to_records`).
+        Trend feature keys in the records are ignored, they are always recomputed from the monthly volumes.
+
+        Args:
+            records (Iterable[dict[str, Any]]): records with text, competition, competition_index,
+                average_monthly_searches and monthly_search_volumes ({"May 2025": 1000, ...}).
+
+        Returns:
+            KeywordMetricsTable: one row per record in the same order as the input.
+        """
+        keywords: list[str] = []
+        competition: list[str] = []
+        competition_index: list[int] = []
+        average_monthly_searches: list[int] = []
+        monthly: list[dict[tuple[int, int], float]] = []
+
+        for record in records:
+            keywords.append(str(record.get("text", "")))
+            competition.append(str(record.get("competition", "")))
+            competition_index.append(int(record.get("competition_index", 0)))  # type: ignore
+            average_monthly_searches.append(int(record.get("average_monthly_searches", 0)))  # type: ignore
+
+            row: dict[tuple[int, int], float] = {}
+            monthly_volumes: dict[str, int] = record.get("monthly_search_volumes", {}) or {}  # type: ignore
+            for date_key, searches in monthly_volumes.items():
+                # keys look like "May 2025"
+                month_name, _, year = date_key.partition(" ")
+                month_number: int | None = _MONTH_NUMBER.get(month_name.upper())
+                if month_number is None or not year.isdigit():
+                    continue
+                row[(int(year), month_number)] = float(searches)
+            monthly.append(row)
+
+        return cls._build(keywords, competition, competition_index, average_monthly_searches, monthly)
+
+    # ------------------------------------------------------------------
+    # Row selection
+    # ------------------------------------------------------------------
+    def take(self, indices: np.ndarray) -> "KeywordMetricsTable":
+        """
+        Return a new table with the rows at `indices` (in that order).
+        """
+        return KeywordMetricsTable(
+            keywords=self.keywords[indices],
+            competition=self.competition[indices],
+            competition_index=self.competition_index[indices],
+            average_monthly_searches=self.average_monthly_searches[indices],
+            months=self.months,
+            volumes=self.volumes[indices],
+        )
+
+    def deduplicate(self) -> "KeywordMetricsTable":
+        """
+        Drop empty keywords and repeated keywords, keeping the first occurrence (same rule as before: exact text match).
+        """
+        if len(self) == 0:
+            return self
+        _, first_indices = np.unique(self.keywords.astype(str), return_index=True)
+        keep: np.ndarray = np.sort(first_indices)
+        keep = keep[self.keywords[keep] != ""]
+        return self.take(keep)
+
+    def top_k(self, k: int) -> "KeywordMetricsTable":
+        """
+        Keep the k keywords with the highest average monthly searches, sorted descending.
+        Uses a partial sort (argpartition) so only the selected k rows get fully sorted. Ties keep the input order.
+
+        Args:
+            k (int): number of keywords to keep.
+        """
+        n: int = len(self)
+        if n == 0 or k <= 0:
+            return self.take(np.array([], dtype=np.int64))
+        if k < n:
+            candidates: np.ndarray = np.argpartition(-self.average_monthly_searches, k - 1)[:k]
+            # argpartition is not stable, so on ties at the cut-off it can drop an earlier row for a later one.
+            # Pull in every row tied with the k-th value, then the stable sort below decides by input order.
+            threshold: np.int64 = self.average_monthly_searches[candidates].min()
+            candidates = np.union1d(
+                candidates[self.average_monthly_searches[candidates] > threshold],
+                np.flatnonzero(self.average_monthly_searches == threshold),
+            )
+        else:
+            candidates = np.arange(n)
+        # lexsort sorts by the last key first: searches descending, then original position for stable ties
+        order: np.ndarray = np.lexsort((candidates, -self.average_monthly_searches[candidates]))
+        return self.take(candidates[order][:k])
+
+    def sort_by_searches(self) -> "KeywordMetricsTable":
+        """
+        Sort all rows by average monthly searches descending (stable).
+        """
+        return self.top_k(len(self))
+
+    # ------------------------------------------------------------------
+    # Trend features
+    # ------------------------------------------------------------------
+    def trend_features(self) -> dict[str, np.ndarray]:
+        """
+        Compute trend features for every keyword at once from the volume matrix.
+
+        - yoy_growth: growth of the latest month vs the same month a year earlier. GKP usually returns exactly 12 months,
+          in which case the first month of the window is used as the base instead, so it is an 11 month change (the
+          prompt that shows this column says so).
+        - momentum_3m: mean of the last 3 months vs mean of the 3 months before them (needs 6 months).
+        - peak_month: month index (column) with the highest searches, -1 if the keyword has no monthly data.
+        - volatility: coefficient of variation (std / mean) of the monthly searches.
+
+        Growth values are fractions (0.25 = +25%). Values that can't be computed (no data, zero base) are NaN.
+
+        Returns:
+            dict[str, np.ndarray]: feature name -> array of shape (n,).
+        """
+        n, m = self.volumes.shape
+        nan_column = np.full(n, np.nan)
+        if m == 0:
+            return {
+                "yoy_growth": nan_column,
+                "momentum_3m": nan_column.copy(),
+                "peak_month": np.full(n, -1, dtype=np.int64),
+                "volatility": nan_column.copy(),
+            }
+
+        volumes: np.ndarray = self.volumes
+        # all-NaN slices (keywords without monthly data) are expected and end up as NaN features, silence numpy about them
+        with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            latest: np.ndarray = volumes[:, -1]
+            base: np.ndarray = volumes[:, -13] if m >= 13 else volumes[:, 0]
+            yoy_growth: np.ndarray = np.where(base > 0, (latest - base) / base, np.nan)
+
+            if m >= 6:
+                recent: np.ndarray = np.nanmean(volumes[:, -3:], axis=1)
+                previous: np.ndarray = np.nanmean(volumes[:, -6:-3], axis=1)
+                momentum_3m: np.ndarray = np.where(previous > 0, recent / previous - 1.0, np.nan)
+            else:
+                momentum_3m = nan_column.copy()
+
+            has_data: np.ndarray = ~np.all(np.isnan(volumes), axis=1)
+            # fill NaN with -1 so argmax skips missing months, rows without any data get -1
+            peak_month: np.ndarray = np.where(has_data, np.argmax(np.nan_to_num(volumes, nan=-1.0), axis=1), -1)
+
+            safe: np.ndarray = np.where(has_data[:, None], volumes, 0.0)
+            mean: np.ndarray = np.nanmean(safe, axis=1)
+            std: np.ndarray = np.nanstd(safe, axis=1)
+            volatility: np.ndarray = np.where(has_data & (mean > 0), std / mean, np.nan)
+
+        return {
+            "yoy_growth": yoy_growth,
+            "momentum_3m": momentum_3m,
+            "peak_month": peak_month.astype(np.int64),
+            "volatility": volatility,
+        }
+
+    def _month_label(self, column: int) -> str:
+        if column < 0:
+            return ""
+        year, month = self.months[column]
+        return f"{MONTH_NAMES[month - 1]} {year}"
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def to_records(self) -> list[dict[str, int | str | float | dict[str, int] | None]]:
+        """
+        Convert to JSON serializable records for the graph state (one dict per keyword).
+        Keeps the original keys (text, competition, average_monthly_searches, competition_index, monthly_search_volumes)
+        and adds the trend features (growths as rounded fractions, peak_month as "Month Year", None when unknown).
+        """
+        features: dict[str, np.ndarray] = self.trend_features()
+        month_labels: list[str] = [self._month_label(column) for column in range(len(self.months))]
+
+        records: list[dict[str, int | str | float | dict[str, int] | None]] = []
+        for row in range(len(self)):
+            monthly_volumes: dict[str, int] = {
+                month_labels[column]: int(value)
+                for column, value in enumerate(self.volumes[row])
+                if not np.isnan(value)
+            }
+            records.append(
+                {
+                    "text": str(self.keywords[row]),
+                    "competition": str(self.competition[row]),
+                    "average_monthly_searches": int(self.average_monthly_searches[row]),
+                    "competition_index": int(self.competition_index[row]),
+                    "monthly_search_volumes": monthly_volumes,
+                    "yoy_growth": _round_or_none(features["yoy_growth"][row], 3),
+                    "momentum_3m": _round_or_none(features["momentum_3m"][row], 3),
+                    "peak_month": self._month_label(int(features["peak_month"][row])) or None,
+                    "volatility": _round_or_none(features["volatility"][row], 2),
+                }
+            )
+        return records
+
+    def render_compact(self) -> str:
+        """
+        Render the table as a compact pipe separated text table for prompts: one header line and one line per keyword.
+        Much smaller than json.dumps(records, indent=2) because the 12 monthly volumes per keyword are summarized by
+        the trend features. Growths are rendered as signed percentages, unknown values as "-".
+        """
+        features: dict[str, np.ndarray] = self.trend_features()
+        lines: list[str] = [" | ".join(COMPACT_COLUMNS)]
+        for row in range(len(self)):
+            lines.append(
+                " | ".join(
+                    [
+                        str(self.keywords[row]),
+                        str(int(self.average_monthly_searches[row])),
+                        str(self.competition[row]) or "-",
+                        str(int(self.competition_index[row])),
+                        _format_percent(features["yoy_growth"][row]),
+                        _format_percent(features["momentum_3m"][row]),
+                        self._month_label(int(features["peak_month"][row])) or "-",
+                        "-" if np.isnan(features["volatility"][row]) else f"{features['volatility'][row]:.2f}",
+                    ]
+                )
+            )
+        return "\n".join(lines)
+
+
+def _round_or_none(value: float, digits: int) -> float | None:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def _format_percent(value: float) -> str:
+    return "-" if np.isnan(value) else f"{value * 100:+.0f}%"
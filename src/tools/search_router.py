@@ -0,0 +1,290 @@
+"""
+Hedged multi-provider web search router (Tavily + Exa).
+
+Instead of picking one provider for the whole process, every search goes through `SearchRouter.search`:
+
+1. Providers are ranked by observed EWMA latency, EWMA error rate and remaining monthly quota (the configured
+   `chat_client` gets a small preference so behaviour is unchanged while both providers are healthy).
+2. The request goes to the best provider. If it hasn't answered after the hedge delay (a multiple of its EWMA latency),
+   the same request is fired at the next provider (a hedged request) and whichever answers first wins.
+   If the first provider fails outright we fail over to the next one immediately.
+3. If the other provider answers within a short grace period too, both result lists are merged and deduplicated by url.
+   Otherwise the slower request is cancelled.
+"""
+
+import asyncio
+import datetime
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlsplit, urlunsplit
+
+from src.utils.settings import settings
+
+# signature of the function that performs one search against one provider and returns parsed results
+SearchFn = Callable[[str, str], Awaitable[list[dict[str, Any]]]]
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of a url used to detect duplicate search results: lowercase scheme and host, no "www.",
+    no fragment and no trailing slash. Path and query are kept as is.
+
+    Args:
+        url (str): The url returned by the search provider.
+
+    Returns:
+        str: The canonical url.
+    """
+    parts = urlsplit(url.strip())
+    host: str = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return urlunsplit((parts.scheme.lower() or "https", host, parts.path.rstrip("/"), parts.query, ""))
+
+
+def merge_results(*result_lists: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Merge result lists keeping the order of the lists given and dropping results whose canonical url was already seen.
+    """
+    seen_urls: set[str] = set()
+    merged: list[dict[str, Any]] = []
+    for results in result_lists:
+        for result in results:
+            url: str = canonicalize_url(str(result.get("url") or ""))
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+            merged.append(result)
+    return merged
+
+
+@dataclass
+class ProviderStats:
+    """
+    Running health statistics of one search provider.
+
+    Attributes:
+        name (str): "tavily" or "exa".
+        monthly_quota (int): searches allowed per calendar month (0 = unlimited).
+        ewma_latency (float | None): exponentially weighted moving average of successful request latency in seconds.
+        ewma_error_rate (float): exponentially weighted moving average of failures (0 = healthy, 1 = always failing).
+    """
+
+    name: str
+    monthly_quota: int
+    ewma_latency: float | None = None
+    ewma_error_rate: float = 0.0
+    requests: int = 0
+    errors: int = 0
+    hedged_requests: int = 0
+    wins: int = 0
+    merges: int = 0
+    # usage is tracked per calendar month in this process (providers don't report remaining quota through the SDKs)
+    quota_month: str = field(default_factory=lambda: datetime.date.today().strftime("%Y-%m"))
+    quota_used: int = 0
+
+    def record(self, latency: float, success: bool, alpha: float) -> None:
+        """
+        Update the moving averages with the outcome of one request.
+        """
+        self.requests += 1
+        self._roll_quota_month()
+        self.quota_used += 1
+        self.ewma_error_rate = (1 - alpha) * self.ewma_error_rate + alpha * (0.0 if success else 1.0)
+        if success:
+            self.ewma_latency = latency if self.ewma_latency is None else (1 - alpha) * self.ewma_latency + alpha * latency
+        else:
+            self.errors += 1
+
+    def record_cancelled(self, elapsed: float, alpha: float) -> None:
+        """
+        A request that lost a hedge was cancelled after `elapsed` seconds. Its real latency is at least that long, so
+        fold it into the latency average (otherwise a slow provider that always loses would never look slow).
+        The request still counts against the quota since the provider already received it.
+        """
+        self.requests += 1
+        self._roll_quota_month()
+        self.quota_used += 1
+        if self.ewma_latency is None or elapsed > self.ewma_latency:
+            self.ewma_latency = elapsed if self.ewma_latency is None else (1 - alpha) * self.ewma_latency + alpha * elapsed
+
+    def remaining_quota(self) -> int | None:
+        """
+        Searches left this month, None if the provider has no configured quota.
+        """
+        if self.monthly_quota <= 0:
+            return None
+        self._roll_quota_month()
+        return max(self.monthly_quota - self.quota_used, 0)
+
+    def _roll_quota_month(self) -> None:
+        month: str = datetime.date.today().strftime("%Y-%m")
+        if month != self.quota_month:
+            self.quota_month = month
+            self.quota_used = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ewma_latency": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            "ewma_error_rate": round(self.ewma_error_rate, 4),
+            "requests": self.requests,
+            "errors": self.errors,
+            "hedged_requests": self.hedged_requests,
+            "wins": self.wins,
+            "merges": self.merges,
+            "quota_used": self.quota_used,
+            "remaining_quota": self.remaining_quota(),
+        }
+
+
+class SearchRouter:
+    """
+    Routes each search to the healthiest provider and hedges slow requests with a second provider.
+
+    Example:
+        >>> router = SearchRouter(providers=["tavily", "exa"], preferred="tavily")
+        >>> results = await router.search(query="penn state campus closures", search_fn=web_search._asearch)
+    """
+
+    def __init__(self, providers: list[str], preferred: str) -> None:
+        """
+        Args:
+            providers (list[str]): Providers that can be used (i.e. the ones with an API key configured).
+            preferred (str): Provider that wins ties while both are healthy.
+        """
+        quotas: dict[str, int] = {
+            "tavily": settings.TAVILY_MONTHLY_QUOTA,
+            "exa": settings.EXA_MONTHLY_QUOTA,
+        }
+        self.preferred = preferred
+        self.providers: dict[str, ProviderStats] = {
+            provider: ProviderStats(name=provider, monthly_quota=quotas.get(provider, 0)) for provider in providers
+        }
+
+    def rank_providers(self) -> list[str]:
+        """
+        Order providers from best to worst. Lower score is better: expected latency inflated by the error rate,
+        providers close to their monthly quota are pushed back and exhausted ones go last.
+        """
+        default_latency: float = settings.WEB_SEARCH_HEDGE_DELAY_SECONDS
+
+        def score(provider: ProviderStats) -> tuple[int, float]:
+            remaining: int | None = provider.remaining_quota()
+            exhausted: int = 1 if remaining == 0 else 0
+            latency: float = provider.ewma_latency if provider.ewma_latency is not None else default_latency
+            value: float = latency * (1 + settings.WEB_SEARCH_ERROR_PENALTY * provider.ewma_error_rate)
+            if provider.name == self.preferred:
+                value *= settings.WEB_SEARCH_PREFERRED_PROVIDER_BONUS
+            if remaining is not None and remaining < provider.monthly_quota * settings.WEB_SEARCH_QUOTA_RESERVE_RATIO:
+                value *= 10
+            return exhausted, value
+
+        return sorted(self.providers, key=lambda name: score(self.providers[name]))
+
+    def hedge_delay(self, provider: str) -> float:
+        """
+        Seconds to wait for a provider before hedging: a multiple of its EWMA latency, never below the configured delay.
+        """
+        ewma_latency: float | None = self.providers[provider].ewma_latency
+        if ewma_latency is None:
+            return settings.WEB_SEARCH_HEDGE_DELAY_SECONDS
+        return max(settings.WEB_SEARCH_HEDGE_DELAY_SECONDS, ewma_latency * settings.WEB_SEARCH_HEDGE_LATENCY_MULTIPLIER)
+
+    async def search(self, query: str, search_fn: SearchFn) -> list[dict[str, Any]]:
+        """
+        Run a search with hedging and failover across providers.
+
+        Args:
+            query (str): The search query.
+            search_fn (SearchFn): Coroutine function (provider, query) -> parsed results for one provider.
+
+        Returns:
+            list[dict[str, Any]]: Parsed results of the winning provider, merged with the other provider's results if both answered.
+
+        Raises:
+            Exception: The last provider error if every provider failed.
+        """
+        if not self.providers:
+            raise ValueError("No web search provider is configured. Set TAVILY_API_KEY or EXA_API_KEY")
+
+        ranked: list[str] = self.rank_providers()
+        alpha: float = settings.WEB_SEARCH_EWMA_ALPHA
+        tasks: dict[asyncio.Task[list[dict[str, Any]]], tuple[str, float]] = {}
+
+        def launch(provider: str) -> None:
+            task = asyncio.ensure_future(search_fn(provider, query))
+            tasks[task] = (provider, time.perf_counter())
+
+        def finish(task: asyncio.Task[list[dict[str, Any]]]) -> bool:
+            """
+            Record the outcome of a finished task. Returns True if it succeeded.
+            """
+            provider, started = tasks.pop(task)
+            success: bool = task.exception() is None
+            self.providers[provider].record(latency=time.perf_counter() - started, success=success, alpha=alpha)
+            if not success:
+                print(f"Web search with {provider} failed: {task.exception()}")
+            return success
+
+        remaining: list[str] = list(ranked)
+        launch(remaining.pop(0))
+        last_error: BaseException | None = None
+
+        try:
+            while tasks:
+                # wait for the running request(s). Only while a backup provider is left do we use the hedge delay as a timeout
+                primary_provider: str = next(iter(tasks.values()))[0]
+                timeout: float | None = (
+                    self.hedge_delay(primary_provider)
+                    if remaining and settings.WEB_SEARCH_HEDGING_ENABLED
+                    else None
+                )
+                done, _ = await asyncio.wait(tasks.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # the provider is slow: hedge with the next best one and take whichever answers first
+                    hedge_provider: str = remaining.pop(0)
+                    self.providers[hedge_provider].hedged_requests += 1
+                    launch(hedge_provider)
+                    continue
+
+                for task in done:
+                    provider: str = tasks[task][0]
+                    if not finish(task):
+                        last_error = task.exception()
+                        continue
+
+                    # winner found. Give the other request(s) a short grace period so we can merge their results too
+                    self.providers[provider].wins += 1
+                    results: list[dict[str, Any]] = task.result()
+                    if tasks:
+                        others, _ = await asyncio.wait(tasks.keys(), timeout=settings.WEB_SEARCH_MERGE_GRACE_SECONDS)
+                        for other in others:
+                            other_provider: str = tasks[other][0]
+                            if finish(other):
+                                self.providers[other_provider].merges += 1
+                                results = merge_results(results, other.result())
+                    return results
+
+                # every finished request failed: fail over to the next provider right away
+                if not tasks and remaining:
+                    launch(remaining.pop(0))
+
+            raise last_error if last_error is not None else RuntimeError("Web search failed with every provider")
+
+        finally:
+            # cancel whatever is still running (the loser of a hedge or requests of a cancelled caller)
+            for task, (provider, started) in tasks.items():
+                task.cancel()
+                self.providers[provider].record_cancelled(elapsed=time.perf_counter() - started, alpha=alpha)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: current provider ranking and health statistics per provider.
+        """
+        return {
+            "ranking": self.rank_providers(),
+            "providers": {name: provider.stats() for name, provider in self.providers.items()},
+        }
@@ -1,7 +1,12 @@
 import asyncio
-from typing import Any, Literal, Optional
-
-from src.utils.models_initializer import get_tavily_client, get_exa_client
+from typing import Any, Literal, Optional, TypedDict
+
+from src.utils.models_initializer import get_tavily_client, get_exa_client, search_clients
+from src.utils.cache import TieredCache, make_cache_key
+from src.utils.single_flight import SingleFlight
+from src.utils.rate_limiter import rate_limits
+from src.tools.search_router import SearchRouter
+from src.utils.settings import settings
 from pydantic import BaseModel, Field
 from langchain_core.callbacks import (
     AsyncCallbackManagerForToolRun,
@@ -11,7 +16,8 @@ from langchain_core.tools import BaseTool
 from langchain_core.tools.base import ArgsSchema
 from langchain_core.tools import tool
 
-# For now we choose manually whether to use Tavily or Exa, later we will use a rate limiter to switch between them based on usage patterns
+# `chat_client` is the preferred provider. Async searches go through `search_router` which switches to (or hedges with) the other
+# provider based on observed latency, error rate and remaining quota. The sync `_run` path only uses `chat_client`.
 """
 Tavily Docs: https://docs.tavily.com/sdk/python/reference#tavily-search
 
@@ -42,6 +48,111 @@ web_search_params = {
 }
 
 
+# identical searches that are in flight at the same time (i.e. concurrent runs on the same breaking story) share one API call
+web_search_flight = SingleFlight(name="web_search")
+
+
+def configured_providers() -> list[Literal["tavily", "exa"]]:
+    """
+    Providers that have an API key configured, preferred provider first.
+    """
+    api_keys = {"tavily": settings.TAVILY_API_KEY, "exa": settings.EXA_API_KEY}
+    providers: list[Literal["tavily", "exa"]] = [chat_client, "exa" if chat_client == "tavily" else "tavily"]
+    return [provider for provider in providers if api_keys[provider] is not None]
+
+
+# routes every async search to the healthiest provider and hedges slow requests with the other one
+search_router = SearchRouter(providers=configured_providers(), preferred=chat_client)
+
+
+def freshness_window_seconds(provider: str) -> int:
+    """
+    Length of the news window the provider searches in, in seconds (Tavily's "days" param, otherwise the default window).
+
+    Args:
+        provider (str): "tavily" or "exa".
+    """
+    days: int = int(web_search_params[provider].get("days", settings.WEB_SEARCH_DEFAULT_WINDOW_DAYS))
+    return days * 24 * 60 * 60
+
+
+def web_search_cache_ttl(provider: str) -> float:
+    """
+    Cache TTL derived from the freshness window. Results for a N day window only change at the leading edge of the window
+    (new articles), so a result that is a small fraction of the window old is still almost entirely valid.
+    With the defaults a 14 day window gives a 12 hour TTL.
+
+    Args:
+        provider (str): "tavily" or "exa".
+    """
+    return freshness_window_seconds(provider) * settings.WEB_SEARCH_CACHE_TTL_RATIO
+
+
+def routed_web_search_cache_ttl() -> float:
+    """
+    Cache TTL for routed results, which may come from either provider (or both merged): the shortest TTL of the routed providers.
+    """
+    providers: list[str] = list(search_router.providers) or [chat_client]
+    return min(web_search_cache_ttl(provider) for provider in providers)
+
+
+# cache for parsed search results. Repeated and near-identical queries (same normalized query) are common on busy beats
+web_search_cache: TieredCache | None = (
+    TieredCache(
+        namespace="web_search",
+        default_ttl=routed_web_search_cache_ttl(),
+        max_memory_entries=settings.WEB_SEARCH_CACHE_MAX_MEMORY_ENTRIES,
+        sqlite_path=settings.CACHE_DB_PATH if settings.CACHE_PERSISTENT else None,
+    )
+    if settings.WEB_SEARCH_CACHE_ENABLED
+    else None
+)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query so trivially different queries (casing, extra whitespace, surrounding quotes or
+    trailing punctuation) map to the same request key.
+
+    Args:
+        query (str): The raw search query generated by the LLM.
+
+    Returns:
+        str: The normalized query.
+    """
+    return " ".join(query.lower().split()).strip("\"'").rstrip("?.!").strip()
+
+
+def web_search_request_key(query: str) -> str:
+    """
+    Key identifying a web search request: normalized query and the search params of every provider.
+    The provider is not part of the key because the router decides which provider answers.
+
+    Args:
+        query (str): The raw search query.
+
+    Returns:
+        str: The request key.
+    """
+    return make_cache_key("web_search", normalize_query(query), web_search_params)
+
+
+class WebSearchArtifact(TypedDict):
+    """
+    Artifact attached to every web search ToolMessage: the query that was run and its parsed results.
+    """
+    query: str
+    results: list[dict[str, Any]]
+
+
+def tool_response(query: str, results: list[dict[str, Any]]) -> tuple[str, WebSearchArtifact]:
+    """
+    Build the (content, artifact) pair returned by the web search tools. The content is only a short summary,
+    prompts are rendered from the artifacts stored in the graph state.
+    """
+    return f"{len(results)} results for: {query}", WebSearchArtifact(query=query, results=results)
+
+
 class WebSearchToolSchema(BaseModel):
     query: str = Field(
         ...,
@@ -52,15 +163,17 @@ class WebSearchToolSchema(BaseModel):
 class WebSearch(BaseTool):
     name: str = "web_search_tool"
     description: str = (
-        f"Conducts a web search using {chat_client} API for the given query. Keep the 'query' concise (under 300 characters)."
+        "Conducts a web search using the Tavily or Exa API for the given query. Keep the 'query' concise (under 300 characters)."
         "The result contains a 'score' which is a relevance score of the search result to the query."
         "The tool result also contains highlights which are snippets of the content from each url that are relevant to the query."
     )
     args_schema: Optional[ArgsSchema] = WebSearchToolSchema
+    # the ToolMessage content is a short summary, the parsed results travel as the artifact so nodes don't have to re-parse text
+    response_format: Literal["content", "content_and_artifact"] = "content_and_artifact"
 
     def _run(
         self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None
-    ) -> str:
+    ) -> tuple[str, WebSearchArtifact]:
         """
         Run the web search tool with the given query.
         """
@@ -78,43 +191,70 @@ class WebSearch(BaseTool):
             )
             response = self._parse_exa_response(response)
 
-        return response
+        return tool_response(query=query, results=response)
 
     async def _arun(
         self, query: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None
-    ) -> str:
+    ) -> tuple[str, WebSearchArtifact]:
         """
         Asynchronously run the web search tool with the given query.
+        Results are served from the web search cache when possible and concurrent identical queries are coalesced into one API call.
+        The search itself goes through `search_router`, which picks the provider and hedges slow requests with the other one.
         """
-        search_params = {}
-        if chat_client == "tavily":
-            client = get_tavily_client(return_async=True)
-            response = await client.search(
-                query=query, **web_search_params["tavily"]  # type: ignore
-            )
-            response = self._parse_tavily_response(response)
+        request_key: str = web_search_request_key(query=query)
+
+        if web_search_cache is not None:
+            cached: list[dict[str, Any]] | None = await web_search_cache.get(request_key)
+            if cached is not None:
+                return tool_response(query=query, results=cached)
+
+        async def search_and_store() -> list[dict[str, Any]]:
+            results: list[dict[str, Any]] = await search_router.search(query=query, search_fn=self._asearch)
+            if web_search_cache is not None:
+                await web_search_cache.set(request_key, results, ttl=routed_web_search_cache_ttl())
+            return results
+
+        results: list[dict[str, Any]] = await web_search_flight.do(request_key, search_and_store)
+        # single-flight waiters share the result object, give each ToolMessage its own copy
+        return tool_response(query=query, results=[dict(result) for result in results])
+
+    async def _asearch(self, provider: Literal["tavily", "exa"], query: str) -> list[dict[str, Any]]:
+        """
+        Call the given provider's async client and parse the response.
+        The call waits for the provider's rate limit governor, so bursts of searches queue instead of hitting 429s.
+        """
+        # shared clients from the registry so we don't build a new SDK client and HTTP session per call
+        client = search_clients.get(provider)
+        async with rate_limits.slot(provider):
+            if provider == "tavily":
+                response = await client.search(
+                    query=query, **web_search_params["tavily"]  # type: ignore
+                )
+            else:
+                response = await client.search_and_contents(
+                    query=query, **web_search_params["exa"]  # type: ignore
+                )
+
+        if provider == "tavily":
+            response = self._parse_tavily_response(response)  # type: ignore
         else:
-            client = get_exa_client(return_async=True)
-            response = await client.search_and_contents(
-                query=query, **web_search_params["exa"]  # type: ignore
-            )
             response = self._parse_exa_response(response)
 
         return response
 
-    def _parse_exa_response(self, response_obj: Any) -> str:
+    def _parse_exa_response(self, response_obj: Any) -> list[dict[str, Any]]:
         """Parses the Exa API response object to extract only relevant fields.
 
         This function extracts the 'title', 'score', 'published date', 'author', and 'highlights'
-        from each result in the Exa API response. It returns a string representation of a list of
-        dictionaries, each containing only these fields.
+        from each result in the Exa API response. It returns a list of dictionaries, each containing
+        only these fields.
 
         Args:
             response_obj (Any): The response object returned by the Exa API. It is expected to be a
                 dictionary with a 'results' key containing a list of result items.
 
         Returns:
-            str: A string representation of a list of dictionaries, each with the selected fields.
+            list[dict[str, Any]]: A list of dictionaries, each with the selected fields.
 
         Raises:
             KeyError: If the expected 'results' key is missing in the response object.
@@ -135,7 +275,7 @@ class WebSearch(BaseTool):
                 }
                 parsed_results.append(parsed_item)
 
-            return str(parsed_results)
+            return parsed_results
 
         except KeyError as key_err:
             raise KeyError(
@@ -144,19 +284,19 @@ class WebSearch(BaseTool):
         except Exception as exc:
             raise Exception(f"Failed to parse Exa response: {exc}") from exc
 
-    def _parse_tavily_response(self, response_obj: dict[str, Any]) -> str:
+    def _parse_tavily_response(self, response_obj: dict[str, Any]) -> list[dict[str, Any]]:
         """Parses the Tavily API response object to extract only relevant fields.
 
         This function extracts the 'url', 'title', 'score', 'published_date', and 'content'
-        (renamed to 'highlights') from each result in the Tavily API response. It returns a string
-        representation of a list of dictionaries, each containing only these fields.
+        (renamed to 'highlights') from each result in the Tavily API response. It returns a list of
+        dictionaries, each containing only these fields.
 
         Args:
             response_obj (dict[str, Any]): The response object returned by the Tavily API. It is expected to be a
                 dictionary with a 'results' key containing a list of result items.
 
         Returns:
-            str: A string representation of a list of dictionaries, each with the selected fields.
+            list[dict[str, Any]]: A list of dictionaries, each with the selected fields.
 
         Raises:
             KeyError: If the expected 'results' key is missing in the response object.
@@ -182,8 +322,7 @@ class WebSearch(BaseTool):
                 }
                 parsed_results.append(parsed_item)
 
-            # Convert the list of dictionaries to a string and return
-            return str(parsed_results)
+            return parsed_results
 
         except KeyError as key_err:
             # Raise a KeyError if the expected key is missing
@@ -201,8 +340,8 @@ class WebSearch(BaseTool):
 
 
 # Create a dummy web search tool for testing
-@tool
-async def dummy_web_search_tool(query: str) -> str:
+@tool(response_format="content_and_artifact")
+async def dummy_web_search_tool(query: str) -> tuple[str, WebSearchArtifact]:
     """
     Dummy web search tool that returns a hardcoded response.
     This is used for testing purposes only.
@@ -211,8 +350,9 @@ async def dummy_web_search_tool(query: str) -> str:
         query (str): The search query to execute.
     """
     await asyncio.sleep(2.4)  # simulate network delay
-    return str(
-        [
+    return tool_response(
+        query=query,
+        results=[
             {
                 "url": "https://www.cnbc.com/2025/05/16/how-college-grads-can-find-a-job-in-a-tough-market.html",
                 "title": "College grads face a 'tough and competitive' job market this year, expert says - CNBC",
@@ -0,0 +1,348 @@
+"""
+Two tier (memory + SQLite) TTL cache used to memoize expensive upstream calls like Google Keyword Planner.
+
+- Tier 1 is an in-memory LRU (OrderedDict) bounded by number of entries.
+- Tier 2 is an optional SQLite file on disk so entries survive server restarts. Disk reads and writes run in a worker
+  thread via asyncio.to_thread so they never block the event loop.
+
+Values are stored as JSON strings in both tiers, so every hit returns a fresh copy that callers are free to mutate.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Build a stable cache key by hashing the JSON representation of the given parts.
+    Parts must already be normalized by the caller (i.e. lowercased, sorted etc.) because the hash is exact.
+
+    Args:
+        *parts (Any): JSON serializable values that identify the request.
+
+    Returns:
+        str: sha256 hex digest of the parts.
+    """
+    raw: str = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryLRUCache:
+    """
+    In-memory LRU cache with a per-entry expiry time. Not thread safe, it is meant to be used from the event loop.
+
+    Attributes:
+        max_entries (int): Maximum number of entries before the least recently used one is evicted.
+        evictions (int): Number of entries evicted because the cache was full.
+        expirations (int): Number of entries dropped because their TTL passed.
+    """
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        # key -> (expires_at, json value). Order of the dict is the LRU order (last = most recently used)
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.evictions: int = 0
+        self.expirations: int = 0
+
+    def get(self, key: str) -> str | None:
+        """
+        Return the stored JSON value for key or None if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.time():
+            # lazily drop expired entries on read
+            del self._entries[key]
+            self.expirations += 1
+            return None
+
+        # mark as most recently used
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, expires_at: float) -> None:
+        """
+        Store a JSON value until expires_at (unix timestamp), evicting the least recently used entries if full.
+        """
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Persistent cache tier backed by a SQLite file. Entries of different caches live in the same table separated by namespace.
+    Methods are blocking and guarded by a lock, TieredCache calls them from a worker thread.
+
+    The file is opened on first use, not in __init__, so caches can be module level singletons without creating
+    directories or opening connections at import time.
+
+    Attributes:
+        path (str): Path to the SQLite database file. Parent directories are created if missing.
+        namespace (str): Namespace for the entries of this cache (i.e. "gkp").
+    """
+
+    def __init__(self, path: str, namespace: str) -> None:
+        self.path = path
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        # a closed cache stays closed, it doesn't reconnect on the next call
+        self._closed: bool = False
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """
+        The connection, opened and set up on the first call. Must be called with the lock held.
+
+        Returns:
+            sqlite3.Connection | None: None once the cache was closed.
+        """
+        if self._conn is not None or self._closed:
+            return self._conn
+
+        directory: str = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # check_same_thread=False because calls come from asyncio.to_thread worker threads, the lock serializes them
+        conn: sqlite3.Connection = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL lets several caches (and processes) read while one writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        # drop whatever expired while the server was down
+        conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, time.time()),
+        )
+        conn.commit()
+        self._conn = conn
+        return conn
+
+    def get(self, key: str) -> tuple[float, str] | None:
+        """
+        Return (expires_at, value) for key or None if missing or expired.
+        """
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT expires_at, value FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] <= time.time():
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                )
+                conn.commit()
+                return None
+            return row[0], row[1]
+
+    def set(self, key: str, value: str, expires_at: float) -> None:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, value, expires_at),
+            )
+            conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+            conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return 0
+            row = conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+            return int(row[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class TieredCache:
+    """
+    Async TTL cache that checks the in-memory LRU first and then the SQLite tier (if enabled).
+    Disk hits are promoted into memory. Keeps hit/miss counters that are exposed through `stats()`.
+
+    Example:
+        >>> cache = TieredCache(namespace="gkp", default_ttl=3600, sqlite_path=".cache/cache.sqlite3")
+        >>> key = make_cache_key(["coffee", "tea"], "https://www.thedp.com")
+        >>> if (value := await cache.get(key)) is None:
+        ...     value = await expensive_call()
+        ...     await cache.set(key, value)
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        default_ttl: float,
+        max_memory_entries: int = 512,
+        sqlite_path: str | None = None,
+    ) -> None:
+        """
+        Args:
+            namespace (str): Name of this cache, used to separate entries in the shared SQLite file and in stats.
+            default_ttl (float): TTL in seconds used when `set` is called without an explicit ttl.
+            max_memory_entries (int): Size of the in-memory LRU tier. Defaults to 512.
+            sqlite_path (str | None): Path to the SQLite file for the persistent tier. None disables the disk tier.
+        """
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.memory = MemoryLRUCache(max_entries=max_memory_entries)
+        self.disk: SQLiteCache | None = (
+            SQLiteCache(path=sqlite_path, namespace=namespace) if sqlite_path else None
+        )
+
+        # counters
+        self.memory_hits: int = 0
+        self.disk_hits: int = 0
+        self.misses: int = 0
+        self.sets: int = 0
+
+    async def get(self, key: str) -> Any | None:
+        """
+        Look up key in memory then on disk.
+
+        Returns:
+            Any | None: A fresh copy of the cached value, or None on a miss.
+        """
+        value: str | None = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return json.loads(value)
+
+        if self.disk is not None:
+            try:
+                entry = await asyncio.to_thread(self.disk.get, key)
+            except sqlite3.Error as e:
+                # a broken disk tier should never break the request, treat it as a miss
+                print(f"Error reading from {self.namespace} disk cache: {e}")
+                entry = None
+            if entry is not None:
+                expires_at, value = entry
+                # promote into memory with the remaining TTL
+                self.memory.set(key, value, expires_at)
+                self.disk_hits += 1
+                return json.loads(value)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """
+        Store a JSON serializable value in both tiers.
+
+        Args:
+            key (str): Cache key, usually from make_cache_key.
+            value (Any): JSON serializable value.
+            ttl (float | None): TTL in seconds for this entry. Defaults to `default_ttl`.
+        """
+        expires_at: float = time.time() + (self.default_ttl if ttl is None else ttl)
+        serialized: str = json.dumps(value)
+        self.memory.set(key, serialized, expires_at)
+        self.sets += 1
+
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, key, serialized, expires_at)
+            except sqlite3.Error as e:
+                print(f"Error writing to {self.namespace} disk cache: {e}")
+
+    async def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.delete, key)
+            except sqlite3.Error as e:
+                print(f"Error deleting from {self.namespace} disk cache: {e}")
+
+    async def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.clear)
+            except sqlite3.Error as e:
+                print(f"Error clearing {self.namespace} disk cache: {e}")
+
+    def close(self) -> None:
+        """
+        Close the SQLite connection of the disk tier. The memory tier keeps working.
+        """
+        if self.disk is not None:
+            self.disk.close()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: hit/miss counters and tier sizes for this cache.
+        """
+        hits: int = self.memory_hits + self.disk_hits
+        lookups: int = hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "sets": self.sets,
+            "memory_entries": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+            "memory_expirations": self.memory.expirations,
+            "persistent": self.disk is not None,
+        }
@@ -0,0 +1,237 @@
+"""
+SQLite checkpointer for resumable keyword agent runs.
+
+With a checkpointer LangGraph saves the graph state after every super step (and the writes of tasks that finished in a
+step that failed), keyed by thread id. A run that fails late (i.e. a schema error in suggestions_generator) or whose
+SSE connection dropped can then be resumed from its last completed super step: only the failed tail runs again, the
+entity extraction, search loops and GKP calls before it are not paid twice.
+
+- The checkpointer is created on first use inside the server's event loop (`AsyncSqliteSaver` binds to the running loop).
+- `CompressedSerializer` zlib-compresses large payloads. Checkpoints carry the article, search results and competitor
+  content of every step, which compresses well.
+- Completed runs delete their checkpoints unless `CHECKPOINT_KEEP_COMPLETED` is set, only failed or interrupted runs
+  need them, so the file stays small.
+- Failed or interrupted runs that nobody resumes are pruned: every run or resume records the thread's last activity in
+  a `thread_activity` table next to LangGraph's, threads inactive for `CHECKPOINT_TTL_SECONDS` are deleted on the first
+  run after startup and then at most every `CHECKPOINT_PRUNE_INTERVAL_SECONDS`.
+"""
+
+import asyncio
+import os
+import time
+import zlib
+from typing import TYPE_CHECKING, Any
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from src.utils.settings import settings
+
+if TYPE_CHECKING:
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+# prefix of the type tag of compressed payloads, i.e. "zlib:msgpack"
+COMPRESSED_TYPE_PREFIX: str = "zlib:"
+
+
+class CompressedSerializer(SerializerProtocol):
+    """
+    Wraps a serializer (LangGraph's `JsonPlusSerializer` by default) and zlib-compresses payloads above a size threshold.
+    Compressed payloads are tagged in the type string, so uncompressed (older or small) payloads still load.
+    """
+
+    def __init__(self, serde: SerializerProtocol | None = None, level: int = 6, min_bytes: int = 1024) -> None:
+        """
+        Args:
+            serde (SerializerProtocol | None): Serializer that produces the payloads.
+            level (int): zlib compression level (1 fastest - 9 smallest).
+            min_bytes (int): Payloads smaller than this are stored as they are (compression wouldn't pay off).
+        """
+        self.serde = serde or JsonPlusSerializer()
+        self.level = level
+        self.min_bytes = min_bytes
+
+        # counters
+        self.raw_bytes: int = 0
+        self.stored_bytes: int = 0
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.serde.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.serde.loads(data)
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        self.raw_bytes += len(data)
+        if len(data) >= self.min_bytes:
+            compressed: bytes = zlib.compress(data, self.level)
+            if len(compressed) < len(data):
+                type_, data = f"{COMPRESSED_TYPE_PREFIX}{type_}", compressed
+        self.stored_bytes += len(data)
+        return type_, data
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.startswith(COMPRESSED_TYPE_PREFIX):
+            type_, payload = type_.removeprefix(COMPRESSED_TYPE_PREFIX), zlib.decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+
+class GraphCheckpointer:
+    """
+    Owns the `AsyncSqliteSaver` used by the keyword agent.
+
+    Example:
+        >>> saver = await graph_checkpointer.get()
+        >>> await graph_checkpointer.touch(run_id)
+        >>> agent = get_keyword_agent().copy(update={"checkpointer": saver})
+    """
+
+    def __init__(self, path: str, serde: CompressedSerializer, ttl: float, prune_interval: float) -> None:
+        """
+        Args:
+            path (str): Path of the SQLite file.
+            serde (CompressedSerializer): Serializer of checkpoints and pending writes.
+            ttl (float): Seconds after its last run or resume from which a thread's checkpoints are deleted.
+            prune_interval (float): Minimum seconds between two prunes.
+        """
+        self.path = path
+        self.serde = serde
+        self.ttl = ttl
+        self.prune_interval = prune_interval
+        self._saver: "AsyncSqliteSaver | None" = None
+        self._lock: asyncio.Lock | None = None
+        self._last_prune: float = 0.0
+
+        # counters
+        self.deleted_threads: int = 0
+        self.pruned_threads: int = 0
+
+    async def get(self) -> "AsyncSqliteSaver":
+        """
+        The checkpointer, connected and set up on the first call.
+        """
+        if self._saver is not None:
+            return self._saver
+
+        # created here, not in __init__, so it belongs to the event loop that uses it
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._saver is None:
+                # imported here, only the server needs it (keeps importing the graph cheap)
+                import aiosqlite
+                from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+                directory: str = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = await aiosqlite.connect(self.path)
+                # WAL so readers (i.e. a resume) don't wait for a running checkpoint write
+                await conn.execute("PRAGMA journal_mode=WAL")
+                saver = AsyncSqliteSaver(conn, serde=self.serde)
+                await saver.setup()
+                await conn.execute(
+                    "CREATE TABLE IF NOT EXISTS thread_activity (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+                )
+                await conn.commit()
+                self._saver = saver
+        return self._saver
+
+    async def touch(self, thread_id: str) -> None:
+        """
+        Record that a thread is run or resumed now, and prune expired threads if the last prune is old enough.
+        """
+        saver: "AsyncSqliteSaver" = await self.get()
+        async with saver.lock:
+            await saver.conn.execute(
+                "INSERT OR REPLACE INTO thread_activity (thread_id, updated_at) VALUES (?, ?)", (thread_id, time.time())
+            )
+            await saver.conn.commit()
+        if time.time() - self._last_prune >= self.prune_interval:
+            await self.prune()
+
+    async def prune(self) -> int:
+        """
+        Delete the checkpoints of threads that weren't run or resumed for `ttl` seconds (failed runs nobody resumed).
+        Threads without recorded activity (i.e. written before the table existed) start their TTL now.
+
+        Returns:
+            int: Number of deleted threads.
+        """
+        saver: "AsyncSqliteSaver" = await self.get()
+        now: float = time.time()
+        self._last_prune = now
+        async with saver.lock:
+            await saver.conn.execute(
+                "INSERT OR IGNORE INTO thread_activity (thread_id, updated_at) SELECT DISTINCT thread_id, ? FROM checkpoints",
+                (now,),
+            )
+            async with saver.conn.execute(
+                "SELECT thread_id FROM thread_activity WHERE updated_at < ?", (now - self.ttl,)
+            ) as cursor:
+                expired: list[str] = [row[0] for row in await cursor.fetchall()]
+            await saver.conn.commit()
+
+        for thread_id in expired:
+            await self._delete(thread_id)
+        self.pruned_threads += len(expired)
+        return len(expired)
+
+    async def delete_thread(self, thread_id: str) -> None:
+        """
+        Drop every checkpoint of a thread (i.e. a run that completed and won't be resumed).
+        """
+        if self._saver is None:
+            return
+        await self._delete(thread_id)
+        self.deleted_threads += 1
+
+    async def _delete(self, thread_id: str) -> None:
+        saver: "AsyncSqliteSaver" = await self.get()
+        await saver.adelete_thread(thread_id)
+        async with saver.lock:
+            await saver.conn.execute("DELETE FROM thread_activity WHERE thread_id = ?", (thread_id,))
+            await saver.conn.commit()
+
+    async def aclose(self) -> None:
+        if self._saver is not None:
+            await self._saver.conn.close()
+            self._saver = None
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: serialized vs stored bytes of checkpoints written since startup, deleted (completed) and
+            pruned (expired) threads.
+        """
+        return {
+            "path": self.path,
+            "connected": self._saver is not None,
+            "raw_bytes": self.serde.raw_bytes,
+            "stored_bytes": self.serde.stored_bytes,
+            "compression_ratio": round(self.serde.raw_bytes / self.serde.stored_bytes, 2) if self.serde.stored_bytes else None,
+            "deleted_threads": self.deleted_threads,
+            "pruned_threads": self.pruned_threads,
+            "ttl_seconds": self.ttl,
+        }
+
+
+# *******************************************************
+# Singleton checkpointer to be used throughout the application (None when checkpointing is disabled)
+# Its lifecycle is tied to the FastAPI lifespan in src/main.py
+# *******************************************************
+graph_checkpointer: GraphCheckpointer | None = (
+    GraphCheckpointer(
+        path=settings.CHECKPOINT_DB_PATH,
+        serde=CompressedSerializer(
+            level=settings.CHECKPOINT_COMPRESSION_LEVEL,
+            min_bytes=settings.CHECKPOINT_COMPRESSION_MIN_BYTES,
+        ),
+        ttl=settings.CHECKPOINT_TTL_SECONDS,
+        prune_interval=settings.CHECKPOINT_PRUNE_INTERVAL_SECONDS,
+    )
+    if settings.CHECKPOINT_ENABLED
+    else None
+)
@@ -0,0 +1,323 @@
+"""
+Response cache for the node models built by `initialize_model_with_fallbacks`.
+
+Re-submitted and lightly edited articles are common, so the same prompt often reaches the same node chain again.
+`CachedRunnable` wraps the whole fallback chain and stores its final output in a `TieredCache` (memory + optional SQLite):
+
+- The exact key hashes the chain fingerprint (model functions and kwargs of every candidate, structured output schema,
+  bound tools) and the input messages.
+- The near-duplicate key hashes the same chain fingerprint and the messages with timestamps masked and whitespace collapsed,
+  so prompts that only differ in their CURRENT TIME section (or in trailing spaces) still hit.
+
+The cache mode (`settings.LLM_CACHE_MODE`) also gives a record/replay setup for offline development:
+
+- "read_write": serve hits, call the model and store on misses (default).
+- "record": always call the model and overwrite the entry (i.e. refresh recorded responses).
+- "replay": only serve from the cache, a miss raises `LLMCacheMiss` instead of calling a provider.
+
+Outputs are stored as JSON: parsed structured outputs as the schema's dump, messages through `message_to_dict`.
+"""
+
+import re
+from typing import Any, AsyncIterator, Iterator, Literal, Optional
+
+from langchain_core.messages import (
+    AIMessageChunk,
+    BaseMessage,
+    BaseMessageChunk,
+    convert_to_messages,
+    message_chunk_to_message,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel, ValidationError
+
+from src.utils.cache import TieredCache, make_cache_key
+from src.utils.model_router import STREAM_RESTART
+from src.utils.settings import settings
+
+LLMCacheMode = Literal["read_write", "record", "replay"]
+
+# timestamps as we put them in prompts (%Y-%m-%d %H:%M:%S) and the common ISO variants providers and articles use
+TIMESTAMP_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class LLMCacheMiss(LookupError):
+    """
+    Raised in "replay" mode when a prompt has no recorded response.
+    """
+
+
+def normalize_for_near_duplicate(text: str) -> str:
+    """
+    Mask timestamps and collapse whitespace, so prompts that differ only in those map to the same near-duplicate key.
+    """
+    return WHITESPACE_PATTERN.sub(" ", TIMESTAMP_PATTERN.sub("<timestamp>", text)).strip()
+
+
+def _message_parts(message: BaseMessage) -> list[Any]:
+    """
+    The parts of a message that reach the provider. Ids, response metadata and usage are left out on purpose,
+    they differ between runs for otherwise identical conversations.
+    """
+    return [
+        message.type,
+        message.content,
+        getattr(message, "tool_calls", None) or None,
+        getattr(message, "tool_call_id", None),
+        message.name,
+    ]
+
+
+def _input_messages(model_input: Any) -> list[BaseMessage]:
+    if isinstance(model_input, PromptValue):
+        return model_input.to_messages()
+    if isinstance(model_input, str):
+        return convert_to_messages([model_input])
+    return convert_to_messages(model_input)
+
+
+class LLMResponseCache:
+    """
+    Exact and near-duplicate cache of model chain outputs, on top of a `TieredCache`.
+
+    Example:
+        >>> cache = LLMResponseCache(TieredCache(namespace="llm", default_ttl=86400))
+        >>> exact_key, near_key = cache.keys(fingerprint, messages)
+        >>> payload = await cache.get(exact_key, near_key)
+    """
+
+    def __init__(self, cache: TieredCache, near_duplicate_enabled: bool = True) -> None:
+        """
+        Args:
+            cache (TieredCache): Storage for the serialized outputs.
+            near_duplicate_enabled (bool): Also look up (and store) the timestamp insensitive key.
+        """
+        self.cache = cache
+        self.near_duplicate_enabled = near_duplicate_enabled
+        self.exact_hits: int = 0
+        self.near_duplicate_hits: int = 0
+        self.misses: int = 0
+        self.replay_misses: int = 0
+
+    def keys(self, fingerprint: str, messages: list[BaseMessage]) -> tuple[str, str | None]:
+        """
+        Returns:
+            tuple[str, str | None]: the exact key and the near-duplicate key (None if disabled).
+        """
+        parts: list[list[Any]] = [_message_parts(message) for message in messages]
+        exact_key: str = make_cache_key("exact", fingerprint, parts)
+        if not self.near_duplicate_enabled:
+            return exact_key, None
+
+        normalized: list[list[Any]] = [
+            [part_type, normalize_for_near_duplicate(str(content)), *rest] for part_type, content, *rest in parts
+        ]
+        return exact_key, make_cache_key("near", fingerprint, normalized)
+
+    async def get(self, exact_key: str, near_key: str | None) -> dict[str, Any] | None:
+        payload: dict[str, Any] | None = await self.cache.get(exact_key)
+        if payload is not None:
+            self.exact_hits += 1
+            return payload
+        if near_key is not None:
+            payload = await self.cache.get(near_key)
+            if payload is not None:
+                self.near_duplicate_hits += 1
+                return payload
+        self.misses += 1
+        return None
+
+    async def set(self, exact_key: str, near_key: str | None, payload: dict[str, Any], ttl: float | None = None) -> None:
+        await self.cache.set(exact_key, payload, ttl=ttl)
+        if near_key is not None:
+            await self.cache.set(near_key, payload, ttl=ttl)
+
+    def close(self) -> None:
+        self.cache.close()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: exact and near-duplicate hit counters plus the underlying cache stats.
+        """
+        hits: int = self.exact_hits + self.near_duplicate_hits
+        lookups: int = hits + self.misses
+        return {
+            "mode": settings.LLM_CACHE_MODE,
+            "exact_hits": self.exact_hits,
+            "near_duplicate_hits": self.near_duplicate_hits,
+            "misses": self.misses,
+            "replay_misses": self.replay_misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "storage": self.cache.stats(),
+        }
+
+
+class CachedRunnable(Runnable):
+    """
+    Serves a model chain's output from `llm_cache` when the same (or a near-duplicate) prompt was answered before.
+    Wraps the complete fallback chain, so a hit skips the rate limiter and every provider.
+
+    Only the async paths use the cache (the graph is fully async). Sync calls pass straight through.
+    """
+
+    def __init__(
+        self,
+        bound: Runnable,
+        fingerprint: str,
+        schema: type[BaseModel] | None = None,
+        ttl: float | None = None,
+        dict_schema: type[BaseModel] | None = None,
+    ) -> None:
+        """
+        Args:
+            bound (Runnable): The model chain (candidates with structured output / tools and fallbacks).
+            fingerprint (str): Stable identity of the chain, see `initialize_model_with_fallbacks`.
+            schema (type[BaseModel] | None): Structured output schema, used to rebuild cached outputs.
+            ttl (float | None): TTL of entries written by this chain. Defaults to the cache's default TTL.
+            dict_schema (type[BaseModel] | None): Schema that dict outputs (partial JSON chains) must match to be cached,
+                so an invalid answer isn't replayed.
+        """
+        self.bound = bound
+        self.fingerprint = fingerprint
+        self.schema = schema
+        self.ttl = ttl
+        self.dict_schema = dict_schema
+
+    @property
+    def InputType(self) -> Any:  # noqa: N802 (langchain naming)
+        return self.bound.InputType
+
+    @property
+    def OutputType(self) -> Any:  # noqa: N802 (langchain naming)
+        return self.bound.OutputType
+
+    def get_input_schema(self, config: Optional[RunnableConfig] = None) -> type[BaseModel]:
+        return self.bound.get_input_schema(config)
+
+    def get_output_schema(self, config: Optional[RunnableConfig] = None) -> type[BaseModel]:
+        return self.bound.get_output_schema(config)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.bound.invoke(input, config, **kwargs)
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        yield from self.bound.stream(input, config, **kwargs)
+
+    def _serialize(self, output: Any) -> dict[str, Any] | None:
+        """
+        JSON payload of an output, None if the output type can't be cached.
+        """
+        if isinstance(output, BaseModel) and self.schema is not None and isinstance(output, self.schema):
+            return {"kind": "schema", "value": output.model_dump(mode="json")}
+        if isinstance(output, BaseMessage):
+            return {"kind": "message", "value": message_to_dict(output)}
+        if isinstance(output, dict) and self.dict_schema is not None:
+            try:
+                self.dict_schema.model_validate(output)
+            except ValidationError:
+                return None
+        if isinstance(output, (dict, list, str)):
+            return {"kind": "json", "value": output}
+        return None
+
+    def _deserialize(self, payload: dict[str, Any]) -> Any:
+        if payload["kind"] == "schema" and self.schema is not None:
+            return self.schema.model_validate(payload["value"])
+        if payload["kind"] == "message":
+            return messages_from_dict([payload["value"]])[0]
+        return payload["value"]
+
+    async def _lookup(self, input: Any) -> tuple[Any | None, tuple[str, str | None] | None]:
+        """
+        Returns:
+            tuple: the cached output (None on a miss) and the keys to store the fresh output under (None if not cacheable).
+        """
+        if llm_cache is None:
+            return None, None
+        try:
+            keys: tuple[str, str | None] = llm_cache.keys(self.fingerprint, _input_messages(input))
+        except (TypeError, ValueError) as e:
+            # inputs that aren't messages can't be keyed reliably, just call the model
+            print(f"Skipping LLM cache for an input that can't be keyed: {e}")
+            return None, None
+
+        if settings.LLM_CACHE_MODE == "record":
+            return None, keys
+
+        payload: dict[str, Any] | None = await llm_cache.get(*keys)
+        if payload is not None:
+            try:
+                return self._deserialize(payload), keys
+            except Exception as e:
+                # i.e. the schema changed since the entry was written, treat it as a miss and overwrite it
+                print(f"Discarding cached LLM response that no longer parses: {e}")
+
+        if settings.LLM_CACHE_MODE == "replay":
+            llm_cache.replay_misses += 1
+            raise LLMCacheMiss(f"No recorded LLM response for this prompt (LLM_CACHE_MODE=replay, chain {self.fingerprint[:12]})")
+        return None, keys
+
+    async def _store(self, keys: tuple[str, str | None] | None, output: Any) -> None:
+        if llm_cache is None or keys is None:
+            return
+        payload: dict[str, Any] | None = self._serialize(output)
+        if payload is not None:
+            await llm_cache.set(*keys, payload, ttl=self.ttl)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        cached, keys = await self._lookup(input)
+        if cached is not None:
+            return cached
+        output = await self.bound.ainvoke(input, config, **kwargs)
+        await self._store(keys, output)
+        return output
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        cached, keys = await self._lookup(input)
+        if cached is not None:
+            # a hit is "streamed" as a single chunk with the complete output
+            yield cached
+            return
+
+        # message chunks add up to the full message, structured output parsers emit the cumulative object so keep the last one
+        final: Any = None
+        async for chunk in self.bound.astream(input, config, **kwargs):
+            if chunk is STREAM_RESTART:
+                # the router switched candidates mid answer, only the new answer is the output
+                final = None
+                yield chunk
+                continue
+            if isinstance(final, BaseMessageChunk) and isinstance(chunk, BaseMessageChunk):
+                final = final + chunk
+            else:
+                final = chunk
+            yield chunk
+
+        if isinstance(final, AIMessageChunk):
+            final = message_chunk_to_message(final)
+        if final is not None:
+            await self._store(keys, final)
+
+
+# *******************************************************
+# Singleton LLM response cache to be used throughout the application
+# Its lifecycle is tied to the FastAPI lifespan in src/main.py
+# *******************************************************
+llm_cache: LLMResponseCache | None = (
+    LLMResponseCache(
+        TieredCache(
+            namespace="llm",
+            default_ttl=settings.LLM_CACHE_TTL_SECONDS,
+            max_memory_entries=settings.LLM_CACHE_MAX_MEMORY_ENTRIES,
+            sqlite_path=settings.CACHE_DB_PATH if settings.CACHE_PERSISTENT else None,
+        ),
+        near_duplicate_enabled=settings.LLM_CACHE_NEAR_DUPLICATE_ENABLED,
+    )
+    if settings.LLM_CACHE_ENABLED
+    else None
+)
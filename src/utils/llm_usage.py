@@ -0,0 +1,117 @@
+"""
+Per node LLM token usage, including how many input tokens the provider served from its prompt cache.
+
+OpenAI (and other providers that report it) cache long identical prompt prefixes automatically. Our prompts keep their static
+instructions first so they can be cached, this tracker shows whether that actually happens per node.
+The handler is attached to the graph's callbacks, the node of each LLM call is read from the `langgraph_node` run metadata
+(or `node` for calls made outside the graph).
+"""
+
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+
+@dataclass
+class NodeUsage:
+    calls: int = 0
+    input_tokens: int = 0
+    cached_input_tokens: int = 0
+    output_tokens: int = 0
+    # calls whose response reported cache details at all (Mistral, Groq and Gemini may not)
+    calls_with_cache_details: int = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "cached_input_tokens": self.cached_input_tokens,
+            "cache_hit_ratio": round(self.cached_input_tokens / self.input_tokens, 4) if self.input_tokens else 0.0,
+            "output_tokens": self.output_tokens,
+            "calls_with_cache_details": self.calls_with_cache_details,
+        }
+
+
+def _cached_tokens(message: AIMessage, llm_output: dict[str, Any] | None) -> int | None:
+    """
+    Cached input tokens of a response, None if the provider didn't report it.
+    """
+    usage = message.usage_metadata or {}
+    details = usage.get("input_token_details") or {}
+    if "cache_read" in details:
+        return int(details["cache_read"] or 0)
+
+    # older integrations only expose the raw OpenAI style usage block
+    token_usage: dict[str, Any] = (llm_output or {}).get("token_usage") or message.response_metadata.get("token_usage") or {}
+    prompt_details: dict[str, Any] = token_usage.get("prompt_tokens_details") or {}
+    if "cached_tokens" in prompt_details:
+        return int(prompt_details["cached_tokens"] or 0)
+    return None
+
+
+class LLMUsageTracker(AsyncCallbackHandler):
+    """
+    Callback handler that aggregates token usage and prompt cache hits per graph node.
+
+    Example:
+        >>> async for update in keyword_agent.astream(input, config={"callbacks": [tracer, llm_usage]}):
+        ...     ...
+        >>> llm_usage.stats()["competitor_analysis"]["cache_hit_ratio"]
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        # run id of an in-flight chat model call -> node that made it
+        self._run_nodes: dict[UUID, str] = {}
+        self._usage: dict[str, NodeUsage] = {}
+
+    async def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        self._run_nodes[run_id] = str(metadata.get("langgraph_node") or metadata.get("node") or "unknown")
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        node: str = self._run_nodes.pop(run_id, "unknown")
+        node_usage: NodeUsage = self._usage.setdefault(node, NodeUsage())
+        node_usage.calls += 1
+
+        for generations in response.generations:
+            for generation in generations:
+                if not isinstance(generation, ChatGeneration) or not isinstance(generation.message, AIMessage):
+                    continue
+                message: AIMessage = generation.message
+                if message.usage_metadata:
+                    node_usage.input_tokens += message.usage_metadata.get("input_tokens", 0)
+                    node_usage.output_tokens += message.usage_metadata.get("output_tokens", 0)
+                cached: int | None = _cached_tokens(message, response.llm_output)
+                if cached is not None:
+                    node_usage.cached_input_tokens += cached
+                    node_usage.calls_with_cache_details += 1
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        # forget the run, a failed call has no usage (the fallback model reports its own)
+        self._run_nodes.pop(run_id, None)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: per node calls, input/output tokens, cached input tokens and the cache hit ratio.
+        """
+        return {node: node_usage.stats() for node, node_usage in sorted(self._usage.items())}
+
+
+# *******************************************************
+# Singleton usage tracker to be used throughout the application
+# *******************************************************
+llm_usage = LLMUsageTracker()
@@ -0,0 +1,560 @@
+"""
+Adaptive, hedged routing of a node's model candidates.
+
+Each node lists its allowed models in `nodes.py` (primary first, then fallbacks). `with_fallbacks` would always call them
+in that order, so a degraded primary makes every request pay for a failure (or a timeout) before the fallback runs, and
+a slow but healthy primary sets the latency of the whole node. `initialize_model_with_fallbacks` builds a
+`NodeModelRouter` instead, which on every call:
+
+1. Orders the candidates by their observed health (`model_health`): EWMA latency on this node, EWMA error rate of the
+   provider/model across nodes and EWMA structured output (schema) failure rate on this node. The configured order
+   only breaks ties, and with a small probability a random other candidate goes first so its statistics stay fresh
+   (the exploration floor).
+2. Calls the first candidate. For the nodes listed in `settings.LLM_HEDGE_PERCENTILES`, if it hasn't answered after the
+   node's latency percentile, the next candidate is started in parallel (a hedged request) and the first valid result wins.
+   The slower call is cancelled. Streams hedge on the time to their first chunk.
+3. If a candidate fails, the next one is started right away (same as `with_fallbacks`). Outputs that don't fit the
+   node's schema count as failures, also for partial JSON chains whose outputs are plain dicts (`dict_schema`).
+
+Candidate health is exposed through `model_health.stats()`, hedge rates and wins through `node_latency.stats()`.
+"""
+
+import asyncio
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel, ValidationError
+
+from src.utils.settings import settings
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Nearest-rank percentile of a list of values (q in [0, 1]).
+    """
+    ordered: list[float] = sorted(values)
+    rank: int = min(max(math.ceil(q * len(ordered)) - 1, 0), len(ordered) - 1)
+    return ordered[rank]
+
+
+class EmptyStructuredOutput(ValueError):
+    """
+    The model answered but no structured output could be parsed from it.
+    """
+
+
+def is_schema_failure(error: BaseException) -> bool:
+    """
+    Whether an error means the model answered with output that doesn't fit the schema (as opposed to a provider error).
+    """
+    return isinstance(error, (OutputParserException, ValidationError, EmptyStructuredOutput))
+
+
+class StreamRestart:
+    """
+    Type of `STREAM_RESTART`.
+    """
+
+    def __repr__(self) -> str:
+        return "STREAM_RESTART"
+
+
+# yielded by `NodeModelRouter.astream` when a candidate failed after some of its chunks were yielded and the next
+# candidate starts over. Consumers drop what they received so far, the chunks after it are a new answer
+STREAM_RESTART = StreamRestart()
+
+
+def _ewma(current: float | None, value: float, alpha: float) -> float:
+    return value if current is None else (1 - alpha) * current + alpha * value
+
+
+@dataclass
+class CandidateHealth:
+    """
+    Running statistics of one provider/model.
+
+    Attributes:
+        ewma_error_rate (float): Moving average of provider errors (0 = healthy, 1 = always failing). Shared by every node.
+        node_latency (dict[str, float]): Moving average of successful call latency per node (prompt sizes differ a lot per node).
+        node_schema_failure_rate (dict[str, float]): Moving average of schema failures per node (the schema is per node).
+    """
+
+    ewma_error_rate: float = 0.0
+    node_latency: dict[str, float] = field(default_factory=dict)
+    node_schema_failure_rate: dict[str, float] = field(default_factory=dict)
+    calls: int = 0
+    errors: int = 0
+    schema_failures: int = 0
+    first_choice: int = 0
+    explored: int = 0
+
+    def record_success(self, node: str, latency: float, alpha: float) -> None:
+        self.calls += 1
+        self.ewma_error_rate = _ewma(self.ewma_error_rate, 0.0, alpha)
+        self.node_latency[node] = _ewma(self.node_latency.get(node), latency, alpha)
+        self.node_schema_failure_rate[node] = _ewma(self.node_schema_failure_rate.get(node, 0.0), 0.0, alpha)
+
+    def record_failure(self, node: str, error: BaseException, alpha: float) -> None:
+        self.calls += 1
+        if is_schema_failure(error):
+            # the provider itself is fine, the model just can't produce this node's schema reliably
+            self.schema_failures += 1
+            self.node_schema_failure_rate[node] = _ewma(self.node_schema_failure_rate.get(node, 0.0), 1.0, alpha)
+        else:
+            self.errors += 1
+            self.ewma_error_rate = _ewma(self.ewma_error_rate, 1.0, alpha)
+
+    def record_cancelled(self, node: str, elapsed: float, alpha: float) -> None:
+        """
+        A call that lost a hedge took at least `elapsed` seconds. Fold it in so a candidate that always loses looks slow.
+        """
+        current: float | None = self.node_latency.get(node)
+        if current is None or elapsed > current:
+            self.node_latency[node] = _ewma(current, elapsed, alpha)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "schema_failures": self.schema_failures,
+            "first_choice": self.first_choice,
+            "explored": self.explored,
+            "ewma_error_rate": round(self.ewma_error_rate, 4),
+            "ewma_latency": {node: round(latency, 3) for node, latency in sorted(self.node_latency.items())},
+            "ewma_schema_failure_rate": {
+                node: round(rate, 4) for node, rate in sorted(self.node_schema_failure_rate.items())
+            },
+        }
+
+
+class ModelHealthRegistry:
+    """
+    `CandidateHealth` per "provider/model" label, created on first use, and the candidate ordering built from it.
+
+    Example:
+        >>> model_health.rank(node="router_and_state_updater", labels=["mistral/mistral-medium-2505", "openai/gpt-4.1-mini"])
+        [1, 0]
+    """
+
+    def __init__(self) -> None:
+        self._candidates: dict[str, CandidateHealth] = {}
+
+    def get(self, label: str) -> CandidateHealth:
+        health: CandidateHealth | None = self._candidates.get(label)
+        if health is None:
+            health = self._candidates[label] = CandidateHealth()
+        return health
+
+    def score(self, node: str, label: str, position: int, default_latency: float) -> float:
+        """
+        Expected cost of calling a candidate first (lower is better): its latency on the node inflated by its error
+        and schema failure rates, plus a small penalty per position in the configured order so that order wins ties.
+        """
+        health: CandidateHealth = self.get(label)
+        latency: float = health.node_latency.get(node, default_latency)
+        failure_penalty: float = (
+            settings.LLM_ROUTING_ERROR_PENALTY * health.ewma_error_rate
+            + settings.LLM_ROUTING_SCHEMA_FAILURE_PENALTY * health.node_schema_failure_rate.get(node, 0.0)
+        )
+        return latency * (1 + failure_penalty) * (1 + settings.LLM_ROUTING_ORDER_BIAS * position)
+
+    def rank(self, node: str, labels: list[str]) -> list[int]:
+        """
+        Order a node's candidates from best to worst.
+
+        Args:
+            node (str): The node name.
+            labels (list[str]): "provider/model" of each candidate in the configured order.
+
+        Returns:
+            list[int]: Candidate indexes in the order they should be tried.
+        """
+        configured: list[int] = list(range(len(labels)))
+        if not settings.LLM_ROUTING_ENABLED or len(labels) < 2:
+            return configured
+
+        # candidates that were never measured on this node are assumed as fast as the fastest known one, so only the
+        # configured order decides between them until there is data
+        known: list[float] = [
+            self.get(label).node_latency[node] for label in labels if node in self.get(label).node_latency
+        ]
+        default_latency: float = min(known) if known else 1.0
+        ranked: list[int] = sorted(
+            configured, key=lambda index: self.score(node, labels[index], index, default_latency)
+        )
+
+        # exploration floor: now and then try another candidate first so a recovered provider can win its place back
+        if random.random() < settings.LLM_ROUTING_EXPLORATION_RATE:
+            explored: int = random.choice(ranked[1:])
+            ranked.remove(explored)
+            ranked.insert(0, explored)
+            self.get(labels[explored]).explored += 1
+
+        self.get(labels[ranked[0]]).first_choice += 1
+        return ranked
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: per provider/model error rate, per node latency and schema failure rate and call counters.
+        """
+        return {label: health.stats() for label, health in sorted(self._candidates.items())}
+
+
+@dataclass
+class NodeLatencyStats:
+    """
+    Recent latencies of the first candidate called and hedging counters of one node.
+
+    Attributes:
+        latencies (deque[float]): Latencies of the first candidate of each call (successful calls and cancelled losers).
+        hedged (int): Calls where the next candidate was started because the first one was slow.
+        hedge_wins (int): Hedged calls won by the hedge.
+        failovers (int): Calls where a candidate failed and the next one was started.
+    """
+
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=settings.LLM_HEDGE_LATENCY_WINDOW))
+    calls: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    failovers: int = 0
+    errors: int = 0
+
+    def hedge_delay(self, q: float) -> float:
+        """
+        Seconds to wait for the first candidate before hedging: the latency percentile q, or the configured default until
+        enough samples were collected.
+        """
+        if len(self.latencies) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS
+        return percentile(list(self.latencies), q)
+
+    def stats(self, q: float | None) -> dict[str, Any]:
+        samples: list[float] = list(self.latencies)
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_rate": round(self.hedged / self.calls, 4) if self.calls else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "errors": self.errors,
+            "hedge_percentile": q,
+            "hedge_delay_seconds": round(self.hedge_delay(q), 3) if q is not None else None,
+            "first_latency_p50": round(percentile(samples, 0.5), 3) if samples else None,
+            "first_latency_p99": round(percentile(samples, 0.99), 3) if samples else None,
+        }
+
+
+class NodeLatencyRegistry:
+    """
+    Per node `NodeLatencyStats`, created on first use.
+    """
+
+    def __init__(self) -> None:
+        self._nodes: dict[str, NodeLatencyStats] = {}
+
+    def get(self, node: str) -> NodeLatencyStats:
+        node_stats: NodeLatencyStats | None = self._nodes.get(node)
+        if node_stats is None:
+            node_stats = self._nodes[node] = NodeLatencyStats()
+        return node_stats
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: per node hedge rate, hedge wins, failovers and first candidate latency percentiles.
+        """
+        return {
+            node: node_stats.stats(settings.LLM_HEDGE_PERCENTILES.get(node))
+            for node, node_stats in sorted(self._nodes.items())
+        }
+
+
+# *******************************************************
+# Singleton registries to be used throughout the application
+# *******************************************************
+model_health = ModelHealthRegistry()
+node_latency = NodeLatencyRegistry()
+
+
+class NodeModelRouter(Runnable):
+    """
+    Calls a node's candidates in health order, failing over on errors and (on hedged nodes) starting the next candidate
+    once the first one is slower than the node's latency percentile. The first valid result wins and the other call is cancelled.
+
+    Only the async paths hedge (the graph is fully async). Sync calls fall back sequentially.
+
+    Example:
+        >>> chain = NodeModelRouter(candidates=[primary, *fallbacks], labels=labels, node="competitor_analysis", structured=True)
+        >>> output = await chain.ainvoke([HumanMessage(content=prompt)])
+    """
+
+    def __init__(
+        self,
+        candidates: list[Runnable],
+        labels: list[str],
+        node: str,
+        structured: bool = False,
+        dict_schema: type[BaseModel] | None = None,
+    ) -> None:
+        """
+        Args:
+            candidates (list[Runnable]): The allowed candidates in their configured order (each already rate limited).
+            labels (list[str]): "provider/model" of each candidate, used for health statistics and logs.
+            node (str): Node name, used for the latency percentile and stats.
+            structured (bool): Whether outputs are parsed structured outputs, in which case None is not a valid result.
+            dict_schema (type[BaseModel] | None): Schema that dict outputs must validate against (partial JSON chains,
+                whose outputs aren't parsed into the schema by the candidates). A stream is validated on its last chunk.
+        """
+        self.candidates = candidates
+        self.labels = labels
+        self.node = node
+        self.structured = structured
+        self.dict_schema = dict_schema
+
+    @property
+    def InputType(self) -> Any:  # noqa: N802 (langchain naming)
+        return self.candidates[0].InputType
+
+    @property
+    def OutputType(self) -> Any:  # noqa: N802 (langchain naming)
+        return self.candidates[0].OutputType
+
+    def get_input_schema(self, config: Optional[RunnableConfig] = None) -> type[BaseModel]:
+        return self.candidates[0].get_input_schema(config)
+
+    def get_output_schema(self, config: Optional[RunnableConfig] = None) -> type[BaseModel]:
+        return self.candidates[0].get_output_schema(config)
+
+    def _check_output(self, output: Any) -> None:
+        if self.structured and output is None:
+            raise EmptyStructuredOutput("Model returned no structured output")
+        # raises ValidationError, a schema failure like a parser error of a schema bound candidate
+        if self.dict_schema is not None and isinstance(output, dict):
+            self.dict_schema.model_validate(output)
+
+    def _record_failure(self, index: int, error: BaseException) -> None:
+        print(f"{self.node} model {self.labels[index]} failed: {error}")
+        model_health.get(self.labels[index]).record_failure(self.node, error, settings.LLM_ROUTING_EWMA_ALPHA)
+
+    def _record_success(self, index: int, latency: float) -> None:
+        model_health.get(self.labels[index]).record_success(self.node, latency, settings.LLM_ROUTING_EWMA_ALPHA)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        last_error: Exception | None = None
+        for index in model_health.rank(self.node, self.labels):
+            started: float = time.perf_counter()
+            try:
+                output = self.candidates[index].invoke(input, config, **kwargs)
+                self._check_output(output)
+            except Exception as e:
+                self._record_failure(index, e)
+                last_error = e
+                continue
+            self._record_success(index, time.perf_counter() - started)
+            return output
+        raise last_error if last_error is not None else RuntimeError(f"{self.node} has no model candidates")
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        yield self.invoke(input, config, **kwargs)
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        """
+        Stream the answer of the first candidate that produces a valid one.
+
+        Until the first chunk this works like `ainvoke`, with the time to the first chunk as the hedged latency: the
+        first candidate to send a chunk wins and the other one is cancelled. A candidate that fails after its first chunk
+        (or whose last chunk doesn't fit the schema) is replaced by the next one as well, `STREAM_RESTART` is yielded
+        before the new candidate's chunks.
+        """
+        node_stats: NodeLatencyStats = node_latency.get(self.node)
+        node_stats.calls += 1
+        hedge_percentile: float | None = settings.LLM_HEDGE_PERCENTILES.get(self.node)
+        hedge_delay: float | None = node_stats.hedge_delay(hedge_percentile) if hedge_percentile is not None else None
+        alpha: float = settings.LLM_ROUTING_EWMA_ALPHA
+        remaining: list[int] = model_health.rank(self.node, self.labels)
+        first: int = remaining[0]
+        call_started: float = time.perf_counter()
+        hedged: bool = False
+        last_error: BaseException | None = None
+
+        # every candidate stream is consumed by its own task (a stream has to stay in the task that started it), they
+        # all report to one queue as (candidate index, "chunk" | "end" | "error", chunk or error)
+        events: asyncio.Queue[tuple[int, str, Any]] = asyncio.Queue()
+        # running candidate index -> (pump task, start time)
+        pumps: dict[int, tuple[asyncio.Task[None], float]] = {}
+
+        async def pump(index: int) -> None:
+            try:
+                async for chunk in self.candidates[index].astream(input, config, **kwargs):
+                    events.put_nowait((index, "chunk", chunk))
+                events.put_nowait((index, "end", None))
+            except Exception as e:
+                events.put_nowait((index, "error", e))
+
+        def launch(index: int) -> None:
+            pumps[index] = (asyncio.ensure_future(pump(index)), time.perf_counter())
+
+        def cancel(index: int) -> None:
+            task, started = pumps.pop(index)
+            task.cancel()
+            elapsed: float = time.perf_counter() - started
+            model_health.get(self.labels[index]).record_cancelled(self.node, elapsed, alpha)
+            # a primary that lost the hedge before its first chunk took at least this long, keep that in the statistics
+            # (like ainvoke), the hedge delay would be computed from the calls it won only otherwise
+            if index == first and first not in chunked:
+                node_stats.latencies.append(elapsed)
+
+        # candidate whose chunks are being yielded, and its latest chunk (the cumulative output of structured streams)
+        winner: int | None = None
+        final: Any = None
+        streamed: bool = False
+        # candidates that sent at least one chunk
+        chunked: set[int] = set()
+
+        launch(remaining.pop(0))
+        try:
+            while True:
+                # only the second candidate is used as a hedge, and only until the first chunk
+                timeout: float | None = (
+                    max(hedge_delay - (time.perf_counter() - call_started), 0.0)
+                    if winner is None and not streamed and remaining and not hedged
+                    and hedge_delay is not None and settings.LLM_HEDGING_ENABLED
+                    else None
+                )
+                try:
+                    index, kind, payload = await asyncio.wait_for(events.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    hedged = True
+                    node_stats.hedged += 1
+                    launch(remaining.pop(0))
+                    continue
+                if index not in pumps:
+                    # left over from a cancelled candidate
+                    continue
+
+                if kind == "chunk":
+                    chunked.add(index)
+                    if winner is None:
+                        winner = index
+                        first_chunk_latency: float = time.perf_counter() - pumps[index][1]
+                        if index == first and not streamed:
+                            node_stats.latencies.append(first_chunk_latency)
+                        elif hedged and not streamed:
+                            node_stats.hedge_wins += 1
+                        for other in [running for running in pumps if running != index]:
+                            cancel(other)
+                        if streamed:
+                            yield STREAM_RESTART
+                        streamed = True
+                    final = payload
+                    yield payload
+                    continue
+
+                _, started = pumps.pop(index)
+                error: BaseException | None = payload if kind == "error" else None
+                if error is None:
+                    try:
+                        self._check_output(final if index == winner else None)
+                    except Exception as e:
+                        error = e
+                if error is None:
+                    self._record_success(index, time.perf_counter() - started)
+                    return
+
+                self._record_failure(index, error)
+                last_error = error
+                if index == winner:
+                    winner, final = None, None
+                if pumps:
+                    # the hedge is still running
+                    continue
+                if not remaining:
+                    node_stats.errors += 1
+                    raise last_error
+                node_stats.failovers += 1
+                launch(remaining.pop(0))
+
+        finally:
+            # the consumer stopped early or a hedge lost
+            for index in list(pumps):
+                cancel(index)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        node_stats: NodeLatencyStats = node_latency.get(self.node)
+        node_stats.calls += 1
+        hedge_percentile: float | None = settings.LLM_HEDGE_PERCENTILES.get(self.node)
+        hedge_delay: float | None = node_stats.hedge_delay(hedge_percentile) if hedge_percentile is not None else None
+        alpha: float = settings.LLM_ROUTING_EWMA_ALPHA
+        # running task -> (candidate index, start time)
+        tasks: dict[asyncio.Task[Any], tuple[int, float]] = {}
+        remaining: list[int] = model_health.rank(self.node, self.labels)
+        first: int = remaining[0]
+        call_started: float = time.perf_counter()
+        hedged: bool = False
+        last_error: BaseException | None = None
+
+        def launch(index: int) -> None:
+            task = asyncio.ensure_future(self.candidates[index].ainvoke(input, config, **kwargs))
+            tasks[task] = (index, time.perf_counter())
+
+        launch(remaining.pop(0))
+        try:
+            while tasks:
+                # only the second candidate is used as a hedge, later ones only on failure
+                timeout: float | None = (
+                    max(hedge_delay - (time.perf_counter() - call_started), 0.0)
+                    if remaining and not hedged and hedge_delay is not None and settings.LLM_HEDGING_ENABLED
+                    else None
+                )
+                done, _ = await asyncio.wait(tasks.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    hedged = True
+                    node_stats.hedged += 1
+                    launch(remaining.pop(0))
+                    continue
+
+                for task in done:
+                    index, started = tasks.pop(task)
+                    error: BaseException | None = task.exception()
+                    if error is None:
+                        try:
+                            self._check_output(task.result())
+                        except (EmptyStructuredOutput, ValidationError) as e:
+                            error = e
+                    if error is not None:
+                        self._record_failure(index, error)
+                        last_error = error
+                        continue
+
+                    latency: float = time.perf_counter() - started
+                    self._record_success(index, latency)
+                    if index == first:
+                        node_stats.latencies.append(latency)
+                    elif hedged:
+                        node_stats.hedge_wins += 1
+                    return task.result()
+
+                # every finished call failed: fail over to the next candidate right away
+                if not tasks and remaining:
+                    node_stats.failovers += 1
+                    launch(remaining.pop(0))
+
+            node_stats.errors += 1
+            raise last_error if last_error is not None else RuntimeError(f"{self.node} has no model candidates")
+
+        finally:
+            # cancel the loser of a hedge. It took at least this long, keep that in the latency statistics
+            for task, (index, started) in tasks.items():
+                task.cancel()
+                elapsed: float = time.perf_counter() - started
+                model_health.get(self.labels[index]).record_cancelled(self.node, elapsed, alpha)
+                if index == first:
+                    node_stats.latencies.append(elapsed)
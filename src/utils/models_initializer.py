@@ -1,23 +1,40 @@
 """
 here we initialize our langchain models and web search sdks so we can just import them in rest of our app.
+
+Provider SDKs are heavy to import, so each one is imported inside its get_* function (only when that provider is actually
+used) and node model chains are built on first use through `lazy_model_with_fallbacks`. Keep it that way, the import time
+of our entry points is guarded by `python -m src.benchmarks.import_time`.
 """
 
-from typing import Any, Callable, Union
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_mistralai import ChatMistralAI
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
-from tavily import (
-    TavilyClient,
-    AsyncTavilyClient,
-)
-from exa_py import Exa, AsyncExa
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterator, Literal, Optional, Union
+import httpx
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import merge_configs
 from pydantic import SecretStr
 from src.utils.settings import settings, get_key
+from src.utils.rate_limiter import rate_limits
+from src.utils.cache import make_cache_key
+from src.utils.prompt_budget import prompt_builder
+from src.utils.llm_cache import CachedRunnable
+from src.utils.model_router import NodeModelRouter
 from pydantic import BaseModel
 
-# Define a type alias for valid chat models
-ChatModel = Union[ChatGoogleGenerativeAI, ChatGroq, ChatOpenAI, ChatMistralAI]
+if TYPE_CHECKING:
+    from exa_py import AsyncExa, Exa
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from langchain_groq import ChatGroq
+    from langchain_mistralai import ChatMistralAI
+    from langchain_openai import ChatOpenAI
+    from tavily import AsyncTavilyClient, TavilyClient
+
+    # Define a type alias for valid chat models
+    ChatModel = Union[ChatGoogleGenerativeAI, ChatGroq, ChatOpenAI, ChatMistralAI]
 
 
 def get_openai_model(model_num: int = 1, temperature: float = 0.5) -> ChatOpenAI:
@@ -46,6 +63,8 @@ def get_openai_model(model_num: int = 1, temperature: float = 0.5) -> ChatOpenAI
             "OpenAI API key is not set in the environment variables. Check your environment variables"
         )
 
+    from langchain_openai import ChatOpenAI
+
     # Map the model number to the actual model name
     model_mapping = {
         1: "gpt-4.1-mini",
@@ -58,6 +77,8 @@ def get_openai_model(model_num: int = 1, temperature: float = 0.5) -> ChatOpenAI
             model=model_mapping.get(model_num, "o4-mini-2025-04-16"),
             api_key=openai_api_key,
             max_retries=2,
+            # report token usage in streams too, the rate limiter corrects its tokens per minute estimate with it
+            stream_usage=True,
         )
     else:
         openai_llm = ChatOpenAI(
@@ -65,6 +86,8 @@ def get_openai_model(model_num: int = 1, temperature: float = 0.5) -> ChatOpenAI
             temperature=temperature,
             api_key=openai_api_key,
             max_retries=2,
+            # report token usage in streams too, the rate limiter corrects its tokens per minute estimate with it
+            stream_usage=True,
         )
 
     return openai_llm
@@ -93,6 +116,8 @@ def get_mistral_model(model_num: int = 1, temperature: float = 0.5) -> ChatMistr
             "Mistral API key is not set in the environment variables. Check your environment variables"
         )
 
+    from langchain_mistralai import ChatMistralAI
+
     # Map the model number to the actual model name
     model_mapping = {
         1: "mistral-medium-2505",
@@ -141,6 +166,8 @@ def get_gemini_model(
             "Gemini API key is not set in the environment variables. Check your environment variables"
         )
 
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
     # Map the model number to the actual model name
     model_mapping = {
         1: "gemini-2.0-flash",
@@ -192,6 +219,8 @@ def get_groq_model(model_num: int = 1, temperature: float = 0.2) -> ChatGroq:
             "Groq API key is not set in the environment variables. Check your environment variables"
         )
 
+    from langchain_groq import ChatGroq
+
     # Map the model number to the actual model name
     model_mapping = {
         1: "llama3-70b-8192",
@@ -229,6 +258,8 @@ def get_tavily_client(return_async: bool = False) -> TavilyClient | AsyncTavilyC
             "Tavily API key is not set in the environment variables. Check your environment variables"
         )
 
+    from tavily import AsyncTavilyClient, TavilyClient
+
     # Initialize the Tavily client
     if return_async:
         return AsyncTavilyClient(api_key=tavily_api_key)
@@ -256,6 +287,8 @@ def get_exa_client(return_async: bool = False) -> Exa | AsyncExa:
             "Exa API key is not set in the environment variables. Check your environment variables"
         )
 
+    from exa_py import AsyncExa, Exa
+
     # Initialize the Exa client
     if return_async:
         return AsyncExa(api_key=exa_api_key)
@@ -263,6 +296,262 @@ def get_exa_client(return_async: bool = False) -> Exa | AsyncExa:
         return Exa(api_key=exa_api_key)
 
 
+class SearchClientRegistry:
+    """
+    Process-wide registry of async web search clients (Tavily, Exa).
+
+    `get_tavily_client(return_async=True)` and `get_exa_client(return_async=True)` build a brand new SDK client (and HTTP session)
+    every time they are called. The registry builds each provider's client once on first use and hands the same instance to every
+    request afterwards, so its connection pool is reused. Clients are closed by the FastAPI lifespan on shutdown.
+
+    Both SDKs keep one long-lived httpx client per SDK client (tavily-python since 0.7.21, hence the minimum version in
+    pyproject.toml), that is the pool being reused and reported in `stats()`.
+
+    Example:
+        >>> from src.utils.models_initializer import search_clients
+        >>> client = search_clients.get("tavily")
+        >>> response = await client.search(query="penn state campus closures")
+    """
+
+    def __init__(self) -> None:
+        self._clients: dict[str, AsyncTavilyClient | AsyncExa] = {}
+        # counters for stats
+        self._created: dict[str, int] = {}
+        self._reused: dict[str, int] = {}
+
+    def get(self, provider: Literal["tavily", "exa"]) -> AsyncTavilyClient | AsyncExa:
+        """
+        Return the shared async client for the provider, creating it on first use.
+
+        Args:
+            provider (Literal["tavily", "exa"]): The web search provider.
+
+        Returns:
+            AsyncTavilyClient | AsyncExa: The shared async client.
+
+        Raises:
+            ValueError: If the provider's API key is not set or the provider is unknown.
+        """
+        client = self._clients.get(provider)
+        if client is not None:
+            self._reused[provider] = self._reused.get(provider, 0) + 1
+            return client
+
+        if provider == "tavily":
+            client = get_tavily_client(return_async=True)
+        elif provider == "exa":
+            client = get_exa_client(return_async=True)
+        else:
+            raise ValueError(f"Unknown web search provider: {provider}")
+
+        self._clients[provider] = client
+        self._created[provider] = self._created.get(provider, 0) + 1
+        return client
+
+    async def aclose(self) -> None:
+        """
+        Close every client and release its connection pool. The registry can still be used afterwards (clients are recreated).
+        """
+        for provider, client in list(self._clients.items()):
+            try:
+                http_client = _get_http_client(client)
+                close = getattr(client, "close", None)
+                if close is not None and callable(close):
+                    await close()
+                elif http_client is not None:
+                    await http_client.aclose()
+            except Exception as e:
+                print(f"Error closing {provider} client: {e}")
+        self._clients.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: per provider counts of clients created, reuses and connection pool stats (best effort, depends on the SDK version).
+        """
+        providers: set[str] = set(self._created) | set(self._clients)
+        return {
+            provider: {
+                "active": provider in self._clients,
+                "created": self._created.get(provider, 0),
+                "reused": self._reused.get(provider, 0),
+                "pool": _pool_stats(_get_http_client(self._clients[provider]))
+                if provider in self._clients
+                else None,
+            }
+            for provider in sorted(providers)
+        }
+
+
+def _get_http_client(client: Any) -> httpx.AsyncClient | None:
+    """
+    Return the httpx client held by an SDK client, if it exposes one (AsyncTavilyClient and AsyncExa keep it in `_client`).
+    """
+    http_client = getattr(client, "_client", None)
+    return http_client if isinstance(http_client, httpx.AsyncClient) else None
+
+
+def _pool_stats(http_client: httpx.AsyncClient | None) -> dict[str, int] | None:
+    """
+    Best effort connection pool stats of an httpx client. Relies on httpcore internals so any failure just returns None.
+    """
+    if http_client is None or http_client.is_closed:
+        return None
+    try:
+        connections = http_client._transport._pool.connections  # type: ignore[attr-defined]
+        idle: int = sum(1 for connection in connections if connection.is_idle())
+        return {"connections": len(connections), "idle": idle, "active": len(connections) - idle}
+    except Exception:
+        return None
+
+
+# *******************************************************
+# Singleton registry to be used throughout the application
+# *******************************************************
+search_clients = SearchClientRegistry()
+
+
+# provider of each model function, used to pick the rate limit governor of a model
+MODEL_PROVIDERS: dict[Callable[..., Any], str] = {
+    get_openai_model: "openai",
+    get_mistral_model: "mistral",
+    get_gemini_model: "gemini",
+    get_groq_model: "groq",
+}
+
+
+def estimate_tokens(model_input: Any) -> int:
+    """
+    Rough token estimate of a model input (~4 characters per token) plus the expected output, used to charge the
+    tokens per minute bucket before the call. The estimate is corrected with the provider's usage report when available.
+    """
+    if isinstance(model_input, str):
+        text_length: int = len(model_input)
+    elif isinstance(model_input, list):
+        text_length = sum(
+            len(str(message.content if isinstance(message, BaseMessage) else message)) for message in model_input
+        )
+    else:
+        text_length = len(str(model_input))
+    return text_length // 4 + settings.RATE_LIMIT_DEFAULT_OUTPUT_TOKENS
+
+
+class UsageRecorder(AsyncCallbackHandler):
+    """
+    Sums the total tokens the provider reported for the chat model calls made inside one governed call.
+
+    The usage is read from the raw model response (`on_llm_end`), so it is also known for structured output chains,
+    whose output is the parsed schema, and for streams, whose final message carries the usage of every chunk.
+
+    Attributes:
+        total_tokens (int | None): Reported total tokens, None while no response reported usage.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.total_tokens: int | None = None
+
+    def add(self, usage_metadata: dict[str, Any] | None) -> None:
+        if usage_metadata:
+            self.total_tokens = (self.total_tokens or 0) + int(usage_metadata.get("total_tokens", 0))
+
+    async def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                message: Any = getattr(generation, "message", None)
+                if isinstance(message, AIMessage):
+                    self.add(message.usage_metadata)
+
+
+class RateLimitedRunnable(Runnable):
+    """
+    Runs the wrapped model (with its structured output / tools already applied) through the provider's rate limit governor.
+    Each candidate of a fallback chain is wrapped on its own, so a 429 on the primary shrinks only that provider's
+    concurrency limit and the fallback runs under its own provider's budget.
+
+    Only the async paths are governed (the graph is fully async). Sync calls pass straight through.
+    """
+
+    def __init__(self, bound: Runnable, provider: str) -> None:
+        self.bound = bound
+        self.provider = provider
+
+    @property
+    def InputType(self) -> Any:  # noqa: N802 (langchain naming)
+        return self.bound.InputType
+
+    @property
+    def OutputType(self) -> Any:  # noqa: N802 (langchain naming)
+        return self.bound.OutputType
+
+    def get_input_schema(self, config: Optional[RunnableConfig] = None) -> type[BaseModel]:
+        return self.bound.get_input_schema(config)
+
+    def get_output_schema(self, config: Optional[RunnableConfig] = None) -> type[BaseModel]:
+        return self.bound.get_output_schema(config)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.bound.invoke(input, config, **kwargs)
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        yield from self.bound.stream(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        tokens: int = estimate_tokens(input)
+        usage = UsageRecorder()
+        async with rate_limits.slot(self.provider, tokens=tokens) as permit:
+            try:
+                return await self.bound.ainvoke(input, merge_configs(config, {"callbacks": [usage]}), **kwargs)
+            finally:
+                # correct the estimate with the provider's report (failed calls may have used tokens too)
+                permit.actual_tokens = usage.total_tokens
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        tokens: int = estimate_tokens(input)
+        usage = UsageRecorder()
+        # usage of raw message chunks, for streams that end before the model reports its final message
+        streamed = UsageRecorder()
+        # the slot is held for the whole stream, the provider is busy with this request until the last chunk
+        async with rate_limits.slot(self.provider, tokens=tokens) as permit:
+            try:
+                async for chunk in self.bound.astream(input, merge_configs(config, {"callbacks": [usage]}), **kwargs):
+                    if isinstance(chunk, AIMessageChunk):
+                        streamed.add(chunk.usage_metadata)
+                    yield chunk
+            finally:
+                permit.actual_tokens = usage.total_tokens if usage.total_tokens is not None else streamed.total_tokens
+
+
+def model_label(model_fn: Callable[..., Any], model: Any) -> str:
+    """
+    "provider/model" label of a chat model, i.e. "openai/gpt-4.1-mini".
+    """
+    provider: str = MODEL_PROVIDERS.get(model_fn, model_fn.__name__)
+    return f"{provider}/{getattr(model, 'model_name', None) or getattr(model, 'model', None) or 'unknown'}"
+
+
+def model_chain_fingerprint(
+    model_fns: list[Callable[..., Any]],
+    model_kwargs_list: list[dict],
+    structured_output_schema: type[BaseModel] | None = None,
+    tools: list[Any] | None = None,
+    tool_choice: Any | None = None,
+    partial_json: bool = False,
+) -> str:
+    """
+    Stable identity of a model chain used in LLM cache keys: every candidate's model function and kwargs, the structured
+    output schema and the bound tools. Changing any of them (i.e. a new model or a schema field) starts a fresh cache.
+    """
+    return make_cache_key(
+        [[fn.__name__, kwargs] for fn, kwargs in zip(model_fns, model_kwargs_list)],
+        structured_output_schema.model_json_schema() if structured_output_schema is not None else None,
+        [getattr(tool, "name", str(tool)) for tool in tools or []],
+        tool_choice,
+        # partial JSON chains output dicts instead of schema instances, keep their entries apart
+        partial_json,
+    )
+
+
 # these models support "json_schema" method for .with_structured_output(). Update these if you add new models that support this.
 MODELS_SUPPORTING_JSON_SCHEMA: set[Callable[..., Any]] = {
     get_openai_model,
@@ -280,6 +569,10 @@ def initialize_model_with_fallbacks(
     bind_tools: bool = False,
     tools: list[Any] | None = None,
     tool_choice: Any | None = None,
+    cache: bool = True,
+    cache_ttl: float | None = None,
+    node: str | None = None,
+    partial_json: bool = False,
 ) -> ChatModel:
     """
     Initializes a primary model with optional structured output and tool binding,
@@ -299,6 +592,17 @@ def initialize_model_with_fallbacks(
         bind_tools (bool): Whether to bind tools to the models.
         tools (Optional[list[Any]]): List of tools to bind if bind_tools is True.
         tool_choice (Any | None): Tool choice to use for the models. Use this to force a specific tool choice in which case give the name of tool.
+        cache (bool): Serve repeated (and near-duplicate) prompts from the LLM response cache. Defaults to True. Turn it
+            off for chains whose prompt is retried unchanged after a bad answer (i.e. tool calling chains), a cached
+            answer would be replayed on every retry.
+        cache_ttl (float | None): TTL of this chain's cache entries in seconds. Defaults to settings.LLM_CACHE_TTL_SECONDS.
+        node (str | None): Graph node using this chain. Named chains order their candidates by observed health at runtime
+            (the given order only breaks ties) and nodes listed in settings.LLM_HEDGE_PERCENTILES also hedge slow calls.
+            Without a node the candidates are plain `with_fallbacks` in the given order.
+        partial_json (bool): Bind the structured output schema as its JSON schema so `astream` yields cumulative partial
+            dicts while the model generates (see src/utils/structured_stream.py). Outputs are then dicts, named chains
+            validate them against the schema in the router (an invalid answer falls back to the next candidate).
+            Defaults to False.
 
     Returns:
         Any: The initialized model with fallbacks.
@@ -322,20 +626,28 @@ def initialize_model_with_fallbacks(
         ...     structured_output_schema=Entities,
         ... )
     """
+    # with partial_json the parsers get a plain JSON schema, their JSON parsers stream partial dicts (schema classes only parse at the end)
+    structured_output: type[BaseModel] | dict[str, Any] | None = (
+        structured_output_schema.model_json_schema()
+        if partial_json and structured_output_schema is not None
+        else structured_output_schema
+    )
+
     # Initialize the primary model with explicit parameters
     primary_model = primary_model_fn(**primary_model_kwargs)
+    labels: list[str] = [model_label(primary_model_fn, primary_model)]
 
     # If a structured output schema is provided, apply it with the correct method
     if structured_output_schema is not None:
         if primary_model_fn in MODELS_SUPPORTING_JSON_SCHEMA:
             # Only add method="json_schema" for supported models
             primary_model = primary_model.with_structured_output(
-                schema=structured_output_schema, method="json_schema"
+                schema=structured_output, method="json_schema"
             )
         else:
             # For other models, call without method parameter (default is usually structured output using function_calling)
             primary_model = primary_model.with_structured_output(
-                schema=structured_output_schema
+                schema=structured_output
             )
 
     if bind_tools and tools is not None:
@@ -347,6 +659,9 @@ def initialize_model_with_fallbacks(
         else:
             primary_model = primary_model.bind_tools(tools=tools)
 
+    # every call of this candidate goes through its provider's rate limit governor
+    primary_model = RateLimitedRunnable(bound=primary_model, provider=MODEL_PROVIDERS.get(primary_model_fn, primary_model_fn.__name__))
+
     # Initialize fallback models if provided
     fallbacks = []
     if fallback_model_fns and fallback_model_kwargs_list:
@@ -358,28 +673,138 @@ def initialize_model_with_fallbacks(
 
         for fn, kwargs in zip(fallback_model_fns, fallback_model_kwargs_list):
             fallback = fn(**kwargs)
+            labels.append(model_label(fn, fallback))
             if structured_output_schema is not None:
                 if fn in MODELS_SUPPORTING_JSON_SCHEMA:
                     # Only add method="json_schema" for supported models
                     fallback = fallback.with_structured_output(
-                        schema=structured_output_schema, method="json_schema"
+                        schema=structured_output, method="json_schema"
                     )
                 else:
                     # For other models, call without method parameter (default is usually structured output using function_calling)
                     fallback = fallback.with_structured_output(
-                        schema=structured_output_schema
+                        schema=structured_output
                     )
             if bind_tools and tools is not None:
                 if tool_choice is not None:
                     fallback = fallback.bind_tools(tools=tools, tool_choice=tool_choice)
                 else:
                     fallback = fallback.bind_tools(tools=tools)
-            fallbacks.append(fallback)
-
-    # Attach fallbacks to the primary model
-    if fallbacks:
+            fallbacks.append(RateLimitedRunnable(bound=fallback, provider=MODEL_PROVIDERS.get(fn, fn.__name__)))
+
+    # Attach fallbacks to the primary model. Nodes route between them by health (and hedge slow calls if configured)
+    if fallbacks and node is not None:
+        primary_model = NodeModelRouter(
+            candidates=[primary_model, *fallbacks],
+            labels=labels,
+            node=node,
+            structured=structured_output_schema is not None,
+            dict_schema=structured_output_schema if partial_json else None,
+        )
+    elif fallbacks:
         primary_model = primary_model.with_fallbacks(
             fallbacks=fallbacks,
         )
 
+    # the cache wraps the whole chain so a hit skips the rate limiter and every provider
+    if cache:
+        primary_model = CachedRunnable(
+            bound=primary_model,
+            fingerprint=model_chain_fingerprint(
+                model_fns=[primary_model_fn, *(fallback_model_fns or [])],
+                model_kwargs_list=[primary_model_kwargs, *(fallback_model_kwargs_list or [])],
+                structured_output_schema=structured_output_schema,
+                tools=tools if bind_tools else None,
+                tool_choice=tool_choice,
+                partial_json=partial_json,
+            ),
+            schema=structured_output_schema if not partial_json else None,
+            dict_schema=structured_output_schema if partial_json else None,
+            ttl=cache_ttl,
+        )
+
     return primary_model
+
+
+# every lazy model chain created so far, so the server can build them all in the background after startup
+lazy_models: list["LazyModel"] = []
+
+
+class LazyModel(Runnable):
+    """
+    A model chain that is only built (with `initialize_model_with_fallbacks`) the first time it is used.
+    Building a chain creates every candidate's client, and importing a module full of them made startup slow.
+
+    Example:
+        >>> MODEL = lazy_model_with_fallbacks(primary_model_fn=get_openai_model, primary_model_kwargs={"model_num": 1})
+        >>> output = await MODEL.ainvoke([HumanMessage(content=prompt)])  # the chain is built here
+    """
+
+    def __init__(self, factory: Callable[[], Runnable]) -> None:
+        self._factory = factory
+        self._model: Runnable | None = None
+        # the graph runs on the event loop, but the startup warm up (and sync scripts) build from threads
+        self._lock = threading.Lock()
+        lazy_models.append(self)
+
+    @property
+    def model(self) -> Runnable:
+        """
+        The built model chain (built on first access).
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._factory()
+        return self._model
+
+    @property
+    def InputType(self) -> Any:  # noqa: N802 (langchain naming)
+        return self.model.InputType
+
+    @property
+    def OutputType(self) -> Any:  # noqa: N802 (langchain naming)
+        return self.model.OutputType
+
+    def get_input_schema(self, config: Optional[RunnableConfig] = None) -> type[BaseModel]:
+        return self.model.get_input_schema(config)
+
+    def get_output_schema(self, config: Optional[RunnableConfig] = None) -> type[BaseModel]:
+        return self.model.get_output_schema(config)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.model.invoke(input, config, **kwargs)
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        yield from self.model.stream(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return await self.model.ainvoke(input, config, **kwargs)
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        async for chunk in self.model.astream(input, config, **kwargs):
+            yield chunk
+
+
+def lazy_model_with_fallbacks(**kwargs: Any) -> LazyModel:
+    """
+    Same arguments as `initialize_model_with_fallbacks`, but the chain (and the provider SDKs it needs) is only built
+    on first use. Use this for module level model constants.
+    """
+    # the node's prompt budget depends on the tokenizers of every candidate it may be sent to
+    if kwargs.get("node"):
+        model_fns: list[Callable[..., Any]] = [kwargs["primary_model_fn"], *kwargs.get("fallback_model_fns", [])]
+        prompt_builder.register_providers(kwargs["node"], [MODEL_PROVIDERS[fn] for fn in model_fns if fn in MODEL_PROVIDERS])
+    return LazyModel(factory=lambda: initialize_model_with_fallbacks(**kwargs))
+
+
+def warm_up_models() -> None:
+    """
+    Build every lazy model chain created so far (imports the provider SDKs they use). Blocking, run it in a thread.
+    """
+    for lazy_model in lazy_models:
+        try:
+            lazy_model.model
+        except Exception as e:
+            # a chain that can't be built (i.e. a missing API key) fails again on first use with the same error
+            print(f"Error building model chain during warm up: {e}")
@@ -0,0 +1,255 @@
+"""
+Token-budgeted prompt assembly.
+
+Every node builds its prompt with `prompt_builder.build(node=..., template=..., **inputs)` instead of `template.format(...)`.
+Inputs wrapped in `BudgetedInput` can be trimmed: if the formatted prompt is over the node's budget
+(`settings.PROMPT_TOKEN_BUDGETS`), the lowest priority inputs are cut first, each down to its `min_tokens`:
+
+- text inputs keep their head (ledes and summaries come first),
+- list inputs (i.e. one rendered search result or keyword row per item) drop items from the end, so order them by importance.
+
+Token counts use tiktoken when its encoding can be loaded, otherwise a ~4 characters per token estimate. tiktoken only has
+OpenAI's encodings, so a node whose model candidates include other providers is budgeted with the highest of their
+`settings.PROMPT_TOKEN_FACTORS` (budget / factor), the prompt then fits whichever candidate ends up answering.
+Per node prompt sizes and trimming are exposed through `stats()`.
+"""
+
+import importlib.util
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Protocol
+
+from src.utils.settings import settings
+
+TRUNCATION_MARKER: str = " [...]"
+
+
+class PromptTemplate(Protocol):
+    """
+    Anything with a str.format style `format(**kwargs) -> str` (plain strings and our sectioned templates).
+    """
+
+    def format(self, *args: Any, **kwargs: Any) -> str: ...
+
+
+@lru_cache(maxsize=4)
+def _get_encoding(encoding_name: str) -> Any | None:
+    """
+    Load a tiktoken encoding once. Returns None if tiktoken is missing or the encoding file can't be loaded
+    (tiktoken downloads it on first use, which fails on machines without network access).
+    """
+    if importlib.util.find_spec("tiktoken") is None:
+        return None
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        print(f"Could not load tiktoken encoding {encoding_name}, estimating tokens from characters instead: {e}")
+        return None
+
+
+def count_tokens(text: str, encoding_name: str | None = None) -> int:
+    """
+    Count the tokens of a text.
+
+    Args:
+        text (str): The text to count.
+        encoding_name (str | None): tiktoken encoding. Defaults to settings.PROMPT_TOKEN_ENCODING.
+
+    Returns:
+        int: Number of tokens (estimated as characters / 4 when tiktoken isn't usable).
+    """
+    encoding = _get_encoding(encoding_name or settings.PROMPT_TOKEN_ENCODING)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, encoding_name: str | None = None) -> str:
+    """
+    Keep the head of a text so it fits in max_tokens (including the truncation marker).
+    """
+    if count_tokens(text, encoding_name) <= max_tokens:
+        return text
+    keep: int = max(max_tokens - count_tokens(TRUNCATION_MARKER, encoding_name), 0)
+    encoding = _get_encoding(encoding_name or settings.PROMPT_TOKEN_ENCODING)
+    if encoding is None:
+        return text[: keep * 4] + TRUNCATION_MARKER
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:keep]) + TRUNCATION_MARKER
+
+
+@dataclass
+class BudgetedInput:
+    """
+    A prompt input that may be trimmed to fit the node's token budget.
+
+    Attributes:
+        value (str | list[str]): Text, or items joined with `separator` (trimmed by dropping items from the end).
+        priority (int): Lower priority inputs are trimmed first.
+        min_tokens (int): Never trim this input below this many tokens.
+        separator (str): Used to join list items.
+    """
+
+    value: str | list[str]
+    priority: int = 0
+    min_tokens: int = 0
+    separator: str = "\n\n"
+
+    def render(self) -> str:
+        return self.separator.join(self.value) if isinstance(self.value, list) else self.value
+
+    def trimmed(self, max_tokens: int) -> "BudgetedInput":
+        """
+        Return a copy that fits in max_tokens (never below min_tokens).
+        """
+        max_tokens = max(max_tokens, self.min_tokens)
+        if not isinstance(self.value, list):
+            return BudgetedInput(truncate_to_tokens(self.value, max_tokens), self.priority, self.min_tokens, self.separator)
+
+        items: list[str] = []
+        used: int = 0
+        separator_tokens: int = count_tokens(self.separator)
+        for item in self.value:
+            item_tokens: int = count_tokens(item) + (separator_tokens if items else 0)
+            if used + item_tokens > max_tokens:
+                break
+            items.append(item)
+            used += item_tokens
+        return BudgetedInput(items, self.priority, self.min_tokens, self.separator)
+
+
+@dataclass
+class NodePromptStats:
+    prompts: int = 0
+    total_tokens: int = 0
+    max_tokens: int = 0
+    trimmed_prompts: int = 0
+    trimmed_tokens: int = 0
+    last_tokens: int = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "prompts": self.prompts,
+            "avg_tokens": round(self.total_tokens / self.prompts) if self.prompts else 0,
+            "max_tokens": self.max_tokens,
+            "last_tokens": self.last_tokens,
+            "trimmed_prompts": self.trimmed_prompts,
+            "trimmed_tokens": self.trimmed_tokens,
+        }
+
+
+class PromptBuilder:
+    """
+    Formats prompt templates within a per node token budget and keeps per node token counts.
+
+    Example:
+        >>> prompt = prompt_builder.build(
+        ...     node="competitor_analysis",
+        ...     template=COMPETITOR_ANALYSIS_AND_STRUCTURED_OUTPUT_PROMPT,
+        ...     user_article=BudgetedInput(article, priority=2, min_tokens=1500),
+        ...     web_search_results=BudgetedInput(result_blocks, priority=1),
+        ...     entities=entities,
+        ...     current_time=get_current_time(),
+        ... )
+    """
+
+    def __init__(self) -> None:
+        self._stats: dict[str, NodePromptStats] = {}
+        # node -> providers of its model candidates, registered when the node's model chain is declared
+        self._providers: dict[str, set[str]] = {}
+
+    def register_providers(self, node: str, providers: list[str]) -> None:
+        """
+        Record the providers a node's prompt may be sent to (see `lazy_model_with_fallbacks`).
+        """
+        self._providers.setdefault(node, set()).update(providers)
+
+    def token_factor(self, node: str) -> float:
+        """
+        Highest `PROMPT_TOKEN_FACTORS` of the node's providers, 1.0 if none are registered.
+        """
+        factors: list[float] = [settings.PROMPT_TOKEN_FACTORS.get(provider, 1.0) for provider in self._providers.get(node, ())]
+        return max(factors, default=1.0)
+
+    def budget_for(self, node: str) -> int | None:
+        """
+        Token budget of a node in PROMPT_TOKEN_ENCODING tokens (the configured budget divided by the node's token factor),
+        None if the node has no budget or budgeting is disabled.
+        """
+        if not settings.PROMPT_BUDGET_ENABLED:
+            return None
+        budget: int | None = settings.PROMPT_TOKEN_BUDGETS.get(node)
+        if budget is None:
+            return None
+        return int(budget / self.token_factor(node))
+
+    def build(self, node: str, template: PromptTemplate, **inputs: Any) -> str:
+        """
+        Format the template, trimming `BudgetedInput` values by priority until the prompt fits the node's budget.
+
+        Args:
+            node (str): Node name, used for the budget lookup and stats.
+            template (PromptTemplate): The prompt template.
+            **inputs (Any): Template variables. Plain values are used as is, `BudgetedInput` values may be trimmed.
+
+        Returns:
+            str: The formatted prompt.
+        """
+        budget: int | None = self.budget_for(node)
+        budgeted: dict[str, BudgetedInput] = {key: value for key, value in inputs.items() if isinstance(value, BudgetedInput)}
+
+        def render() -> str:
+            return template.format(
+                **{key: value.render() if isinstance(value, BudgetedInput) else value for key, value in inputs.items()}
+            )
+
+        prompt: str = render()
+        tokens: int = count_tokens(prompt)
+        original_tokens: int = tokens
+
+        if budget is not None and tokens > budget:
+            # trim lowest priority first, each input only as much as still needed
+            for key in sorted(budgeted, key=lambda name: budgeted[name].priority):
+                over: int = tokens - budget
+                if over <= 0:
+                    break
+                current: BudgetedInput = budgeted[key]
+                current_tokens: int = count_tokens(current.render())
+                if current_tokens <= current.min_tokens:
+                    continue
+                inputs[key] = budgeted[key] = current.trimmed(current_tokens - over)
+                prompt = render()
+                tokens = count_tokens(prompt)
+
+            if tokens > budget:
+                print(f"Prompt for {node} is {tokens} tokens after trimming, over its budget of {budget}")
+
+        self._record(node, tokens=tokens, trimmed=original_tokens - tokens)
+        return prompt
+
+    def _record(self, node: str, tokens: int, trimmed: int) -> None:
+        node_stats: NodePromptStats = self._stats.setdefault(node, NodePromptStats())
+        node_stats.prompts += 1
+        node_stats.total_tokens += tokens
+        node_stats.max_tokens = max(node_stats.max_tokens, tokens)
+        node_stats.last_tokens = tokens
+        if trimmed > 0:
+            node_stats.trimmed_prompts += 1
+            node_stats.trimmed_tokens += trimmed
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: per node prompt token counts, their budget and how much was trimmed.
+        """
+        return {
+            node: {**node_stats.stats(), "budget": self.budget_for(node), "token_factor": self.token_factor(node)}
+            for node, node_stats in sorted(self._stats.items())
+        }
+
+
+# *******************************************************
+# Singleton prompt builder to be used throughout the application
+# *******************************************************
+prompt_builder = PromptBuilder()
@@ -0,0 +1,418 @@
+"""
+Process-wide rate limiting and concurrency governance for every upstream provider (LLMs, web search and GKP).
+
+Each provider gets one `ProviderGovernor` which combines:
+
+- Two token buckets: requests per minute and (LLM) tokens per minute, so we queue instead of bursting into 429s.
+- An AIMD concurrency limit: the number of calls in flight grows by ~1 per round of successful calls and is cut
+  multiplicatively when the provider answers with a 429 (or slows down past its latency target).
+- Weighted fair queuing across concurrent agent runs: when the provider is saturated, waiting calls are served by
+  virtual finish time per run, so one run that fans out many calls can't starve the others.
+
+The run a call belongs to is read from the `current_run_id` context variable, which is set once per agent run
+(asyncio tasks copy the context, so every node and tool call of that run sees it).
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+from src.utils.settings import settings
+
+T = TypeVar("T")
+
+# run the current call belongs to (used for fair queuing) and its weight (higher = bigger share when saturated)
+current_run_id: ContextVar[str] = ContextVar("current_run_id", default="default")
+current_run_weight: ContextVar[float] = ContextVar("current_run_weight", default=1.0)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Best effort check whether an exception raised by a provider SDK means we were rate limited (HTTP 429 / quota exhausted).
+    SDKs don't share an exception type, so we look at status codes, class names and messages.
+
+    Args:
+        error (BaseException): The exception raised by the provider call.
+
+    Returns:
+        bool: True if the error is a rate limit error.
+    """
+    status_code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status_code == 429:
+        return True
+    if "ratelimit" in type(error).__name__.lower():
+        return True
+    message: str = str(error).lower()
+    return any(marker in message for marker in ("429", "rate limit", "rate_limit", "resource_exhausted", "too many requests"))
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`. A rate of 0 (or less) means unlimited.
+
+    The bucket may go negative when a call turns out to be more expensive than estimated (see `adjust`),
+    later callers then wait until the debt is refilled.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None) -> None:
+        """
+        Args:
+            rate_per_minute (float): Refill rate. 0 disables the bucket.
+            capacity (float | None): Maximum burst. Defaults to one minute worth of tokens.
+        """
+        self.rate_per_second: float = rate_per_minute / 60
+        self.capacity: float = capacity if capacity is not None else rate_per_minute
+        self.tokens: float = self.capacity
+        self._updated_at: float = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate_per_second <= 0
+
+    def _refill(self) -> None:
+        now: float = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    def delay_for(self, amount: float) -> float:
+        """
+        Seconds until `amount` tokens are available (0 if they are available now).
+        Amounts above capacity are capped so a huge request waits for a full bucket instead of forever.
+        """
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        missing: float = min(amount, self.capacity) - self.tokens
+        return max(missing, 0.0) / self.rate_per_second
+
+    def consume(self, amount: float) -> None:
+        if not self.unlimited:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """
+        Correct an earlier estimate: positive amounts consume more tokens, negative amounts refund them.
+        """
+        if not self.unlimited:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+    def drain(self) -> None:
+        """
+        Empty the bucket, used when the provider says we are rate limited anyway.
+        """
+        if not self.unlimited:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+
+class AIMDLimit:
+    """
+    Additive increase / multiplicative decrease concurrency limit (the same scheme TCP uses for its congestion window).
+
+    Attributes:
+        limit (float): Current concurrency limit, the governor lets int(limit) calls run at once.
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        min_limit: float,
+        max_limit: float,
+        decrease_factor: float,
+        latency_target: float,
+        latency_backoff: float,
+    ) -> None:
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.latency_backoff = latency_backoff
+
+    def on_success(self, latency: float) -> None:
+        if self.latency_target > 0 and latency > self.latency_target:
+            # provider is slowing down, back off gently before it starts returning 429s
+            self.limit = max(self.min_limit, self.limit * self.latency_backoff)
+        else:
+            # +1 per "window" of `limit` successful calls
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_rate_limited(self) -> None:
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+
+
+class FairQueue:
+    """
+    Weighted fair queue of waiting calls. Each waiter gets a virtual finish time
+    `max(virtual_time, last_finish[run]) + cost / weight` and the smallest finish time is served first,
+    so runs get capacity in proportion to their weight regardless of how many calls they enqueue.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, asyncio.Future[None]]] = []
+        self._counter = itertools.count()
+        self._last_finish: dict[str, float] = {}
+        self.virtual_time: float = 0.0
+
+    def push(self, run_id: str, weight: float, cost: float = 1.0) -> asyncio.Future[None]:
+        start: float = max(self.virtual_time, self._last_finish.get(run_id, 0.0))
+        finish: float = start + cost / max(weight, 1e-6)
+        self._last_finish[run_id] = finish
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (finish, next(self._counter), future))
+        return future
+
+    def pop(self) -> asyncio.Future[None] | None:
+        """
+        Return the next waiter that is still waiting, or None if the queue is empty.
+        """
+        while self._heap:
+            finish, _, future = heapq.heappop(self._heap)
+            self.virtual_time = max(self.virtual_time, finish)
+            if not future.done():
+                self._forget_idle_runs()
+                return future
+        self._forget_idle_runs()
+        return None
+
+    def _forget_idle_runs(self) -> None:
+        # runs whose last finish time is behind the virtual clock have nothing queued, drop them so the dict stays bounded
+        for run_id in [run_id for run_id, finish in self._last_finish.items() if finish <= self.virtual_time]:
+            del self._last_finish[run_id]
+
+    def __len__(self) -> int:
+        return sum(1 for _, _, future in self._heap if not future.done())
+
+
+class ProviderGovernor:
+    """
+    Gatekeeper for every call to one provider: fair queue -> concurrency slot -> token buckets.
+
+    Example:
+        >>> governor = rate_limits.get("openai")
+        >>> async with governor.slot(tokens=1500) as permit:
+        ...     response = await model.ainvoke(messages)
+        ...     permit.actual_tokens = response.usage_metadata["total_tokens"]
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 8,
+        initial_concurrency: int | None = None,
+        latency_target_seconds: float = 0,
+    ) -> None:
+        """
+        Args:
+            name (str): Provider name used in stats.
+            requests_per_minute (float): Request budget, 0 for unlimited.
+            tokens_per_minute (float): Token budget (LLM providers), 0 for unlimited.
+            max_concurrency (int): Upper bound of the AIMD concurrency limit.
+            initial_concurrency (int | None): Starting concurrency limit. Defaults to half of max_concurrency.
+            latency_target_seconds (float): Latency above which the concurrency limit backs off. 0 disables it.
+        """
+        self.name = name
+        self.requests = TokenBucket(rate_per_minute=requests_per_minute)
+        self.tokens = TokenBucket(rate_per_minute=tokens_per_minute)
+        self.concurrency = AIMDLimit(
+            initial=float(initial_concurrency or max(1, max_concurrency // 2)),
+            min_limit=1.0,
+            max_limit=float(max_concurrency),
+            decrease_factor=settings.RATE_LIMIT_AIMD_DECREASE_FACTOR,
+            latency_target=latency_target_seconds,
+            latency_backoff=settings.RATE_LIMIT_AIMD_LATENCY_BACKOFF,
+        )
+        self._queue = FairQueue()
+        # serializes waiting on the buckets so calls keep the order the fair queue granted them in
+        self._bucket_lock = asyncio.Lock()
+        self.in_flight: int = 0
+
+        # counters
+        self.calls: int = 0
+        self.queued: int = 0
+        self.rate_limited: int = 0
+        self.errors: int = 0
+        self.total_wait_seconds: float = 0.0
+
+    async def acquire(self, tokens: float = 0) -> None:
+        """
+        Wait for a concurrency slot (fairly across runs) and for request/token budget.
+
+        Args:
+            tokens (float): Estimated tokens of the call, charged to the tokens per minute bucket.
+        """
+        self.calls += 1
+        waited_since: float = time.perf_counter()
+
+        if self.in_flight < int(self.concurrency.limit) and len(self._queue) == 0:
+            self.in_flight += 1
+        else:
+            self.queued += 1
+            future = self._queue.push(run_id=current_run_id.get(), weight=current_run_weight.get())
+            try:
+                await future
+            except asyncio.CancelledError:
+                # if the slot was granted just before we got cancelled, hand it to the next waiter
+                if future.done() and not future.cancelled():
+                    self._release_slot()
+                raise
+
+        try:
+            async with self._bucket_lock:
+                while True:
+                    delay: float = max(self.requests.delay_for(1), self.tokens.delay_for(tokens))
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                self.requests.consume(1)
+                self.tokens.consume(tokens)
+        except BaseException:
+            self._release_slot()
+            raise
+
+        self.total_wait_seconds += time.perf_counter() - waited_since
+
+    def release(
+        self,
+        latency: float,
+        error: BaseException | None = None,
+        estimated_tokens: float = 0,
+        actual_tokens: float | None = None,
+    ) -> None:
+        """
+        Give the slot back and feed the outcome of the call into the AIMD limit and the token bucket.
+
+        Args:
+            latency (float): Duration of the call in seconds.
+            error (BaseException | None): Exception raised by the call, if any.
+            estimated_tokens (float): Tokens charged in `acquire`.
+            actual_tokens (float | None): Tokens actually used (from the provider's usage report), if known.
+        """
+        if error is None:
+            self.concurrency.on_success(latency)
+        elif is_rate_limit_error(error):
+            self.rate_limited += 1
+            self.concurrency.on_rate_limited()
+            # the provider's window is full, stop sending until our own buckets refill
+            self.requests.drain()
+        else:
+            self.errors += 1
+
+        if actual_tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        # hand out freed slots (the limit may also have grown) to the next waiters in fair order
+        while self.in_flight < int(self.concurrency.limit):
+            future = self._queue.pop()
+            if future is None:
+                break
+            self.in_flight += 1
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, tokens: float = 0) -> AsyncIterator["Permit"]:
+        """
+        Async context manager around one provider call. Set `permit.actual_tokens` inside the block if the provider reports usage.
+
+        Args:
+            tokens (float): Estimated tokens of the call.
+        """
+        await self.acquire(tokens=tokens)
+        permit = Permit()
+        started: float = time.perf_counter()
+        try:
+            yield permit
+        except BaseException as e:
+            # a cancelled call (i.e. the loser of a hedged request) is neither a success nor a provider error
+            if isinstance(e, asyncio.CancelledError):
+                self._release_slot()
+            else:
+                self.release(time.perf_counter() - started, error=e, estimated_tokens=tokens, actual_tokens=permit.actual_tokens)
+            raise
+        self.release(time.perf_counter() - started, estimated_tokens=tokens, actual_tokens=permit.actual_tokens)
+
+    async def run(self, fn: Callable[[], Awaitable[T]], tokens: float = 0) -> T:
+        """
+        Run a zero-arg coroutine function under this governor.
+        """
+        async with self.slot(tokens=tokens):
+            return await fn()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._queue),
+            "calls": self.calls,
+            "queued": self.queued,
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+            "avg_wait_seconds": round(self.total_wait_seconds / self.calls, 4) if self.calls else 0.0,
+            "request_tokens_available": None if self.requests.unlimited else round(self.requests.tokens, 1),
+            "llm_tokens_available": None if self.tokens.unlimited else round(self.tokens.tokens, 1),
+        }
+
+
+class Permit:
+    """
+    Handle yielded by `ProviderGovernor.slot`, lets the caller report actual token usage.
+    """
+
+    def __init__(self) -> None:
+        self.actual_tokens: float | None = None
+
+
+class RateLimiterRegistry:
+    """
+    One governor per provider, created on first use from `settings.PROVIDER_RATE_LIMITS`.
+    Unknown providers get an unlimited governor (only the concurrency limit applies).
+    """
+
+    def __init__(self) -> None:
+        self._governors: dict[str, ProviderGovernor] = {}
+
+    def get(self, provider: str) -> ProviderGovernor:
+        governor: ProviderGovernor | None = self._governors.get(provider)
+        if governor is None:
+            limits: dict[str, float] = settings.PROVIDER_RATE_LIMITS.get(provider, {})
+            governor = ProviderGovernor(
+                name=provider,
+                requests_per_minute=limits.get("requests_per_minute", 0),
+                tokens_per_minute=limits.get("tokens_per_minute", 0),
+                max_concurrency=int(limits.get("max_concurrency", 8)),
+                latency_target_seconds=limits.get("latency_target_seconds", 0),
+            )
+            self._governors[provider] = governor
+        return governor
+
+    @asynccontextmanager
+    async def slot(self, provider: str, tokens: float = 0) -> AsyncIterator[Permit]:
+        """
+        Shortcut for `get(provider).slot(tokens)` that is a no-op when the rate limiter is disabled.
+        """
+        if not settings.RATE_LIMITER_ENABLED:
+            yield Permit()
+            return
+        async with self.get(provider).slot(tokens=tokens) as permit:
+            yield permit
+
+    def stats(self) -> dict[str, Any]:
+        return {name: governor.stats() for name, governor in sorted(self._governors.items())}
+
+
+# *******************************************************
+# Singleton registry to be used throughout the application
+# *******************************************************
+rate_limits = RateLimiterRegistry()
@@ -0,0 +1,142 @@
+"""
+Per-run session store.
+
+Data that has to outlive a keyword agent run (the article draft and the sentence level suggestions used by the full
+article endpoint) is stored per run id instead of in module globals, so concurrent runs don't overwrite each other.
+
+- Sessions are plain JSON dicts keyed by run id.
+- The backend is pluggable (`SessionBackend`). By default it is a `TieredCache`: a bounded in-memory LRU with TTL
+  eviction, plus the shared SQLite file when `SESSION_PERSISTENT` is set, so workers on the same host (and restarts)
+  see each other's sessions. Anything with the same async get/set/delete methods works (i.e. a Redis adapter to scale
+  out across hosts).
+"""
+
+from typing import Any, Protocol
+
+from src.utils.cache import TieredCache
+from src.utils.settings import settings
+
+
+class SessionBackend(Protocol):
+    """
+    Storage used by the session store. Values are JSON serializable dicts, get returns None for missing or expired keys.
+    """
+
+    async def get(self, key: str) -> Any | None: ...
+
+    async def set(self, key: str, value: Any, ttl: float | None = None) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+
+class SessionNotFoundError(LookupError):
+    """
+    Raised when a run id has no session (never existed, or expired).
+    """
+
+
+class SessionStore:
+    """
+    Run scoped key/value sessions on top of a `SessionBackend`.
+
+    Example:
+        >>> await session_store.create(run_id, original_article_draft=article)
+        >>> await session_store.update(run_id, sentence_level_suggestions=suggestions)
+        >>> session = await session_store.require(run_id)
+        >>> session["sentence_level_suggestions"]
+    """
+
+    def __init__(self, backend: SessionBackend, ttl: float) -> None:
+        """
+        Args:
+            backend (SessionBackend): Where sessions are stored.
+            ttl (float): Seconds a session lives after its last write.
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.created: int = 0
+        self.updates: int = 0
+        self.not_found: int = 0
+
+    @staticmethod
+    def _key(run_id: str) -> str:
+        return f"session:{run_id}"
+
+    async def create(self, run_id: str, **fields: Any) -> None:
+        """
+        Start a new session for a run (replaces an existing one with the same id).
+        """
+        await self.backend.set(self._key(run_id), dict(fields), ttl=self.ttl)
+        self.created += 1
+
+    async def get(self, run_id: str) -> dict[str, Any] | None:
+        """
+        Returns:
+            dict[str, Any] | None: A copy of the session, None if the run id is unknown or expired.
+        """
+        session: dict[str, Any] | None = await self.backend.get(self._key(run_id))
+        if session is None:
+            self.not_found += 1
+        return session
+
+    async def require(self, run_id: str) -> dict[str, Any]:
+        """
+        Same as `get` but raises if there is no session.
+
+        Raises:
+            SessionNotFoundError: If the run id is unknown or its session expired.
+        """
+        session: dict[str, Any] | None = await self.get(run_id)
+        if session is None:
+            raise SessionNotFoundError(f"No session for run {run_id}, it is unknown or expired. Run the keyword agent again")
+        return session
+
+    async def update(self, run_id: str, **fields: Any) -> None:
+        """
+        Set fields of a run's session (creating it if needed) and refresh its TTL.
+        Only the run that owns a session writes to it, so read-modify-write is safe here.
+        """
+        session: dict[str, Any] = await self.backend.get(self._key(run_id)) or {}
+        session.update(fields)
+        await self.backend.set(self._key(run_id), session, ttl=self.ttl)
+        self.updates += 1
+
+    async def delete(self, run_id: str) -> None:
+        await self.backend.delete(self._key(run_id))
+
+    def close(self) -> None:
+        """
+        Close the backend if it holds resources (i.e. the SQLite connection of a TieredCache).
+        """
+        close = getattr(self.backend, "close", None)
+        if callable(close):
+            close()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: session counters plus the backend's stats if it has any.
+        """
+        backend_stats = getattr(self.backend, "stats", None)
+        return {
+            "ttl_seconds": self.ttl,
+            "created": self.created,
+            "updates": self.updates,
+            "not_found": self.not_found,
+            "backend": backend_stats() if callable(backend_stats) else type(self.backend).__name__,
+        }
+
+
+# *******************************************************
+# Singleton session store to be used throughout the application
+# Its lifecycle is tied to the FastAPI lifespan in src/main.py
+# *******************************************************
+session_store = SessionStore(
+    backend=TieredCache(
+        namespace="sessions",
+        default_ttl=settings.SESSION_TTL_SECONDS,
+        max_memory_entries=settings.SESSION_MAX_MEMORY_ENTRIES,
+        sqlite_path=settings.CACHE_DB_PATH if settings.SESSION_PERSISTENT else None,
+    ),
+    ttl=settings.SESSION_TTL_SECONDS,
+)
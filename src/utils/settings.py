@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import SecretStr
 from dotenv import find_dotenv
@@ -30,6 +30,136 @@ class Settings(BaseSettings):
     **Server Configuration:**
         HOST (str): Host address for FastAPI server. Defaults to "0.0.0.0".
         PORT (int): Port for FastAPI server. Defaults to 8000.
+        WARM_UP_ON_STARTUP (bool): Build the agent graph, tracer and model chains in the background right after startup
+            instead of in the first request (they are lazy to keep startup fast). Defaults to True.
+
+    **Google Keyword Planner (GKP) Client:**
+        GKP_MAX_CONNECTIONS (int): Maximum concurrent connections in the shared GKP connection pool. Defaults to 20.
+        GKP_MAX_KEEPALIVE_CONNECTIONS (int): Maximum idle keep-alive connections kept in the pool. Defaults to 10.
+        GKP_KEEPALIVE_EXPIRY (float): Seconds an idle connection stays open before it is closed. Defaults to 30.
+        GKP_HTTP2 (bool): Enable HTTP/2 for the GKP microservice (requires `h2`). Defaults to False.
+        GKP_CACHE_ENABLED (bool): Cache GKP results keyed by normalized seeds, url, location and language. Defaults to True.
+        GKP_CACHE_TTL_SECONDS (int): How long a cached GKP result is served. Defaults to 7 days (metrics change monthly).
+        GKP_CACHE_MAX_MEMORY_ENTRIES (int): Size of the in-memory LRU tier of the GKP cache. Defaults to 512.
+        GKP_FANOUT_URLS (int): Number of top ranked competitor urls that get their own keyword planner call. Defaults to 3.
+        GKP_SYNTHESIZER_TOP_K (int): Number of unique keywords (by average monthly searches) kept for the masterlist step. Defaults to 50.
+        GKP_PREFETCH_ENABLED (bool): Start the keyword planner calls that only need seed keywords right after entity extraction,
+            in parallel with the search loop, and merge them with the competitor url calls. Needs GKP_CACHE_ENABLED (a finished
+            prefetch is only reused through the cache). Defaults to True.
+        GKP_SITE_URL (str | None): The publication's own site, used as an extra seed url by the prefetch. Defaults to None.
+
+    **Web Search Cache:**
+        WEB_SEARCH_CACHE_ENABLED (bool): Cache web search results keyed by normalized query and search params. Defaults to True.
+        WEB_SEARCH_CACHE_TTL_RATIO (float): Cache TTL as a fraction of the provider's news freshness window. Defaults to 1/28 (14 day window -> 12 hours).
+        WEB_SEARCH_DEFAULT_WINDOW_DAYS (int): Freshness window assumed for providers whose params don't set one (i.e. Exa). Defaults to 14.
+        WEB_SEARCH_CACHE_MAX_MEMORY_ENTRIES (int): Size of the in-memory LRU tier of the web search cache. Defaults to 1024.
+
+    **Web Search Routing:**
+        WEB_SEARCH_HEDGING_ENABLED (bool): Send a hedged request to the next provider when the first one is slow. Defaults to True.
+        WEB_SEARCH_HEDGE_DELAY_SECONDS (float): Minimum time to wait for a provider before hedging. Defaults to 2.0.
+        WEB_SEARCH_HEDGE_LATENCY_MULTIPLIER (float): Hedge once a request takes this many times the provider's EWMA latency. Defaults to 1.5.
+        WEB_SEARCH_MERGE_GRACE_SECONDS (float): How long to wait for the other provider after a winner, to merge both result lists. Defaults to 0.3.
+        WEB_SEARCH_EWMA_ALPHA (float): Weight of the newest observation in the latency and error rate moving averages. Defaults to 0.2.
+        WEB_SEARCH_ERROR_PENALTY (float): How strongly the error rate inflates a provider's expected latency when ranking. Defaults to 5.0.
+        WEB_SEARCH_PREFERRED_PROVIDER_BONUS (float): Score multiplier for the configured `chat_client` (lower is better). Defaults to 0.8.
+        WEB_SEARCH_QUOTA_RESERVE_RATIO (float): Providers with less than this fraction of their monthly quota left are deprioritized. Defaults to 0.1.
+        TAVILY_MONTHLY_QUOTA (int): Tavily searches per month on our plan, 0 for unlimited. Defaults to 1000.
+        EXA_MONTHLY_QUOTA (int): Exa searches per month on our plan, 0 for unlimited. Defaults to 1000.
+
+    **Rate Limiting:**
+        RATE_LIMITER_ENABLED (bool): Route every provider call (LLMs, web search, GKP) through the per-provider governor. Defaults to True.
+        PROVIDER_RATE_LIMITS (dict[str, dict[str, float]]): Per provider `requests_per_minute`, `tokens_per_minute` (0 = unlimited),
+            `max_concurrency` and `latency_target_seconds` (0 = disabled). Set as JSON in the environment to override. The
+            "gkp" entry is the only bound on concurrent keyword planner requests (calls served by the GKP cache or by an
+            identical request in flight don't take a slot).
+        RATE_LIMIT_AIMD_DECREASE_FACTOR (float): Concurrency limit multiplier applied on a 429. Defaults to 0.5.
+        RATE_LIMIT_AIMD_LATENCY_BACKOFF (float): Concurrency limit multiplier applied when a call exceeds the latency target. Defaults to 0.9.
+        RATE_LIMIT_DEFAULT_OUTPUT_TOKENS (int): Output tokens assumed per LLM call when charging the tokens per minute bucket. Defaults to 1024.
+
+    **Prompt Budgets:**
+        PROMPT_BUDGET_ENABLED (bool): Trim budgeted prompt inputs by priority when a prompt is over its node's budget. Defaults to True.
+        PROMPT_TOKEN_ENCODING (str): tiktoken encoding used to count prompt tokens (falls back to characters / 4). Defaults to "o200k_base".
+        PROMPT_TOKEN_BUDGETS (dict[str, int]): Prompt token budget per node name. Nodes missing here are only measured, never trimmed.
+        PROMPT_TOKEN_FACTORS (dict[str, float]): Per provider ratio of its tokenizer's count to PROMPT_TOKEN_ENCODING's count.
+            tiktoken only ships OpenAI encodings, so o200k_base is exact for OpenAI and the other providers are budgeted with
+            a conservative ratio for English news text: Mistral's 32k/131k vocab tokenizers 1.2, Llama 3 on Groq (128k vocab)
+            1.1, Gemini (256k vocab) 1.1. A node is budgeted with the highest factor of its model candidates.
+
+    **LLM Response Cache:**
+        LLM_CACHE_ENABLED (bool): Cache node model outputs keyed by the model chain and its input messages. Defaults to True.
+        LLM_CACHE_MODE (str): "read_write" (serve hits, store misses), "record" (always call and overwrite) or "replay"
+            (serve recorded responses only, a miss raises). Defaults to "read_write".
+        LLM_CACHE_TTL_SECONDS (int): How long a cached model output is served unless the node sets its own TTL. Defaults to 24 hours.
+        LLM_CACHE_MAX_MEMORY_ENTRIES (int): Size of the in-memory LRU tier of the LLM cache. Defaults to 256.
+        LLM_CACHE_NEAR_DUPLICATE_ENABLED (bool): Also match prompts that differ only in timestamps and whitespace. Defaults to True.
+
+    **LLM Hedging:**
+        LLM_HEDGING_ENABLED (bool): Start the next candidate in parallel when a node's first model is slow. Defaults to True.
+        LLM_HEDGE_PERCENTILES (dict[str, float]): Nodes that hedge, mapped to the percentile of the first candidate's recent
+            latency after which the next candidate is started (time to the first chunk for streamed nodes, i.e.
+            suggestions_generator). Nodes missing here only fall back on errors.
+        LLM_HEDGE_DEFAULT_DELAY_SECONDS (float): Hedge delay used until a node has enough latency samples. Defaults to 30.
+        LLM_HEDGE_MIN_SAMPLES (int): Primary latency samples needed before the percentile is used. Defaults to 20.
+        LLM_HEDGE_LATENCY_WINDOW (int): Number of recent primary latencies kept per node. Defaults to 200.
+
+    **LLM Routing:**
+        LLM_ROUTING_ENABLED (bool): Order each node's model candidates by observed health instead of the configured order. Defaults to True.
+        LLM_ROUTING_EWMA_ALPHA (float): Weight of the newest call in the latency, error and schema failure moving averages. Defaults to 0.2.
+        LLM_ROUTING_ERROR_PENALTY (float): How strongly a provider/model's error rate inflates its expected latency. Defaults to 5.0.
+        LLM_ROUTING_SCHEMA_FAILURE_PENALTY (float): How strongly a model's schema failure rate on a node inflates its expected latency. Defaults to 3.0.
+        LLM_ROUTING_ORDER_BIAS (float): Score penalty per position in the configured order, so that order wins ties. Defaults to 0.25.
+        LLM_ROUTING_EXPLORATION_RATE (float): Probability that another candidate is tried first to keep its statistics fresh. Defaults to 0.05.
+
+    **Sessions:**
+        SESSION_TTL_SECONDS (int): How long a run's session (article draft, sentence level suggestions) is kept after its
+            last write, i.e. how long the full article endpoint accepts its run id. Defaults to 24 hours.
+        SESSION_MAX_MEMORY_ENTRIES (int): Size of the in-memory LRU tier of the session store. Defaults to 1000.
+        SESSION_PERSISTENT (bool): Also keep sessions in the SQLite file at CACHE_DB_PATH, so they are shared by the workers
+            of a host and survive restarts. Defaults to True.
+
+    **Router Scorer:**
+        ROUTER_SCORER_ENABLED (bool): Decide clear cases of the search router locally (BM25, entity coverage and recency of the
+            results) and only ask the router LLM for ambiguous ones. Defaults to True.
+        ROUTER_SCORER_GOOD_RESULT (float): Relevance (0-1) from which a search result counts as a real competitor. Defaults to 0.25,
+            calibrated in tests/test_competitor_relevance.py (on-topic results mostly 0.30-0.80, off-topic ones 0.23 at most, but
+            results about the same kind of story elsewhere score like on-topic ones, see competitor_relevance.py).
+        ROUTER_SCORER_ANALYSIS_SHARE (float): Share of good results from which competitor analysis is chosen without the LLM.
+            Defaults to 0.8 (4 of the usual 5 results, 8 of 10 after two rounds), a margin over the router prompt's "about 7 out
+            of 10" since single results near the good result threshold are often misjudged.
+        ROUTER_SCORER_RETRY_SHARE (float): Share of good results up to which another search round is chosen without the LLM.
+            Defaults to 0.2 (at most 1 of 5 results, 2 of 10), 2 or 3 good results of 5 are left to the router LLM.
+        ROUTER_SCORER_RECENCY_HALF_LIFE_DAYS (float): Age at which a result's recency score halves. Defaults to 30.
+        ROUTER_SCORER_ARTICLE_TERMS (int): Number of the article's most frequent terms matched against the results. Defaults to 25.
+
+    **Revisions:**
+        REVISION_REUSE_ENABLED (bool): Re-submissions of an edited draft (same session_id) reuse the search results, competitor
+            analysis and GKP data of the previous revision when the topic didn't change. Defaults to True.
+        REVISION_MIN_SIMILARITY (float): Word level similarity (difflib ratio) to the previous revision below which a draft is
+            treated as a new article. Defaults to 0.6.
+        REVISION_MIN_ENTITY_OVERLAP (float): Jaccard overlap of the new entities with the ones the previous research was done
+            with, needed to reuse that research. Defaults to 0.75.
+
+    **Shared Runs:**
+        SHARED_RUNS_ENABLED (bool): Serve identical article submissions from one keyword agent run (in-flight submissions attach
+            to it and get its earlier events replayed). Defaults to True.
+        SHARED_RUN_RESULT_TTL_SECONDS (int): How long the events of a completed run are served to re-submissions of the same
+            article, 0 only shares in-flight runs. Defaults to 10 minutes.
+        SHARED_RUN_MAX_RESULTS (int): Size of the in-memory LRU tier of the completed run store. Defaults to 64.
+
+    **Checkpointing:**
+        CHECKPOINT_ENABLED (bool): Save the keyword agent's state after every super step so failed or interrupted runs can be
+            resumed (POST /agent/keyword/resume). Defaults to True.
+        CHECKPOINT_DB_PATH (str): Path of the SQLite file for checkpoints. Defaults to ".cache/checkpoints.sqlite3".
+        CHECKPOINT_COMPRESSION_LEVEL (int): zlib level used for checkpoint payloads (1 fastest - 9 smallest). Defaults to 6.
+        CHECKPOINT_COMPRESSION_MIN_BYTES (int): Payloads smaller than this are stored uncompressed. Defaults to 1024.
+        CHECKPOINT_KEEP_COMPLETED (bool): Keep the checkpoints of runs that completed (only needed to inspect them). Defaults to False.
+        CHECKPOINT_TTL_SECONDS (int): Checkpoints of runs that failed or were interrupted are deleted when the run wasn't
+            resumed for this long. Defaults to 24 hours.
+        CHECKPOINT_PRUNE_INTERVAL_SECONDS (int): Minimum time between two prunes of expired checkpoints. Defaults to 1 hour.
+
+    **Caching:**
+        CACHE_PERSISTENT (bool): Whether caches also keep a SQLite tier on disk that survives restarts. Defaults to True.
+        CACHE_DB_PATH (str): Path of the SQLite file shared by all persistent caches. Defaults to ".cache/seo_ai_cache.sqlite3".
 
     **Example Usage:**
         ```python
@@ -78,6 +208,137 @@ class Settings(BaseSettings):
     # FastAPI host and port with default values
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    WARM_UP_ON_STARTUP: bool = True
+
+    # Google Keyword Planner client connection pool
+    GKP_MAX_CONNECTIONS: int = 20
+    GKP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    GKP_KEEPALIVE_EXPIRY: float = 30.0
+    GKP_HTTP2: bool = False
+
+    # Google Keyword Planner result cache
+    GKP_CACHE_ENABLED: bool = True
+    GKP_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    GKP_CACHE_MAX_MEMORY_ENTRIES: int = 512
+
+    # Keyword planner fan-out over competitor urls
+    GKP_FANOUT_URLS: int = 3
+    GKP_SYNTHESIZER_TOP_K: int = 50
+    GKP_PREFETCH_ENABLED: bool = True
+    GKP_SITE_URL: str | None = None
+
+    # Web search result cache
+    WEB_SEARCH_CACHE_ENABLED: bool = True
+    WEB_SEARCH_CACHE_TTL_RATIO: float = 1 / 28
+    WEB_SEARCH_DEFAULT_WINDOW_DAYS: int = 14
+    WEB_SEARCH_CACHE_MAX_MEMORY_ENTRIES: int = 1024
+
+    # Web search provider routing and hedging
+    WEB_SEARCH_HEDGING_ENABLED: bool = True
+    WEB_SEARCH_HEDGE_DELAY_SECONDS: float = 2.0
+    WEB_SEARCH_HEDGE_LATENCY_MULTIPLIER: float = 1.5
+    WEB_SEARCH_MERGE_GRACE_SECONDS: float = 0.3
+    WEB_SEARCH_EWMA_ALPHA: float = 0.2
+    WEB_SEARCH_ERROR_PENALTY: float = 5.0
+    WEB_SEARCH_PREFERRED_PROVIDER_BONUS: float = 0.8
+    WEB_SEARCH_QUOTA_RESERVE_RATIO: float = 0.1
+    TAVILY_MONTHLY_QUOTA: int = 1000
+    EXA_MONTHLY_QUOTA: int = 1000
+
+    # Per provider rate limiting and concurrency governance (defaults follow our current plan limits)
+    RATE_LIMITER_ENABLED: bool = True
+    PROVIDER_RATE_LIMITS: dict[str, dict[str, float]] = {
+        "openai": {"requests_per_minute": 500, "tokens_per_minute": 200_000, "max_concurrency": 16, "latency_target_seconds": 60},
+        "mistral": {"requests_per_minute": 60, "tokens_per_minute": 500_000, "max_concurrency": 4, "latency_target_seconds": 60},
+        "groq": {"requests_per_minute": 30, "tokens_per_minute": 6_000, "max_concurrency": 4, "latency_target_seconds": 30},
+        "gemini": {"requests_per_minute": 15, "tokens_per_minute": 1_000_000, "max_concurrency": 4, "latency_target_seconds": 60},
+        "tavily": {"requests_per_minute": 100, "max_concurrency": 8, "latency_target_seconds": 10},
+        "exa": {"requests_per_minute": 300, "max_concurrency": 8, "latency_target_seconds": 10},
+        "gkp": {"requests_per_minute": 60, "max_concurrency": 4, "latency_target_seconds": 30},
+    }
+    RATE_LIMIT_AIMD_DECREASE_FACTOR: float = 0.5
+    RATE_LIMIT_AIMD_LATENCY_BACKOFF: float = 0.9
+    RATE_LIMIT_DEFAULT_OUTPUT_TOKENS: int = 1024
+
+    # Prompt token budgets per node
+    PROMPT_BUDGET_ENABLED: bool = True
+    PROMPT_TOKEN_ENCODING: str = "o200k_base"
+    PROMPT_TOKEN_BUDGETS: dict[str, int] = {
+        "entity_extractor": 8_000,
+        "query_generator": 10_000,
+        "router_and_state_updater": 12_000,
+        "competitor_analysis": 16_000,
+        "masterlist_and_primary_keyword_generator": 12_000,
+        "suggestions_generator": 16_000,
+        "full_article_generator": 24_000,
+    }
+    PROMPT_TOKEN_FACTORS: dict[str, float] = {
+        "openai": 1.0,
+        "mistral": 1.2,
+        "groq": 1.1,
+        "gemini": 1.1,
+    }
+
+    # LLM response cache (record/replay for offline development through LLM_CACHE_MODE)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MODE: Literal["read_write", "record", "replay"] = "read_write"
+    LLM_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    LLM_CACHE_MAX_MEMORY_ENTRIES: int = 256
+    LLM_CACHE_NEAR_DUPLICATE_ENABLED: bool = True
+
+    # Latency triggered hedging of node models
+    LLM_HEDGING_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILES: dict[str, float] = {
+        "competitor_analysis": 0.95,
+        "suggestions_generator": 0.95,
+    }
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = 30.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_LATENCY_WINDOW: int = 200
+
+    # Adaptive ordering of node model candidates
+    LLM_ROUTING_ENABLED: bool = True
+    LLM_ROUTING_EWMA_ALPHA: float = 0.2
+    LLM_ROUTING_ERROR_PENALTY: float = 5.0
+    LLM_ROUTING_SCHEMA_FAILURE_PENALTY: float = 3.0
+    LLM_ROUTING_ORDER_BIAS: float = 0.25
+    LLM_ROUTING_EXPLORATION_RATE: float = 0.05
+
+    # Per-run sessions (state needed after a run, i.e. by the full article endpoint)
+    SESSION_TTL_SECONDS: int = 24 * 60 * 60
+    SESSION_MAX_MEMORY_ENTRIES: int = 1000
+    SESSION_PERSISTENT: bool = True
+
+    # Local decisions of the search router
+    ROUTER_SCORER_ENABLED: bool = True
+    ROUTER_SCORER_GOOD_RESULT: float = 0.25
+    ROUTER_SCORER_ANALYSIS_SHARE: float = 0.8
+    ROUTER_SCORER_RETRY_SHARE: float = 0.2
+    ROUTER_SCORER_RECENCY_HALF_LIFE_DAYS: float = 30.0
+    ROUTER_SCORER_ARTICLE_TERMS: int = 25
+
+    # Incremental re-analysis of edited drafts
+    REVISION_REUSE_ENABLED: bool = True
+    REVISION_MIN_SIMILARITY: float = 0.6
+    REVISION_MIN_ENTITY_OVERLAP: float = 0.75
+
+    # Deduplication of identical article submissions
+    SHARED_RUNS_ENABLED: bool = True
+    SHARED_RUN_RESULT_TTL_SECONDS: int = 10 * 60
+    SHARED_RUN_MAX_RESULTS: int = 64
+
+    # Resumable graph runs
+    CHECKPOINT_ENABLED: bool = True
+    CHECKPOINT_DB_PATH: str = ".cache/checkpoints.sqlite3"
+    CHECKPOINT_COMPRESSION_LEVEL: int = 6
+    CHECKPOINT_COMPRESSION_MIN_BYTES: int = 1024
+    CHECKPOINT_KEEP_COMPLETED: bool = False
+    CHECKPOINT_TTL_SECONDS: int = 24 * 60 * 60
+    CHECKPOINT_PRUNE_INTERVAL_SECONDS: int = 60 * 60
+
+    # Shared on-disk cache tier
+    CACHE_PERSISTENT: bool = True
+    CACHE_DB_PATH: str = ".cache/seo_ai_cache.sqlite3"
 
 # *******************************************************
 # Singleton instance to be used throughout the application
@@ -0,0 +1,212 @@
+"""
+Shared agent runs: identical article submissions are served by one graph run.
+
+Editors re-submit the same draft and several people open the same story, each submission used to start its own
+(expensive) keyword agent run. Runs are keyed by a hash of the article instead:
+
+- While a run for an article is in flight, another submission of it attaches as one more subscriber. It first gets the
+  events emitted so far replayed, then follows the live events. Everyone sees the same run id.
+- Once a run completed successfully, its events are kept in a short-lived result store (`SHARED_RUN_RESULT_TTL_SECONDS`)
+  and re-submissions within that window are served from it without running the graph.
+- Failed runs are not stored, the next submission starts a new run.
+
+The run is produced in its own task, so it keeps going when the subscriber that started it disconnects (the others
+still need it, and its result is stored for a re-submission). This is the `SingleFlight` idea for event streams.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Callable
+
+from src.utils.cache import TieredCache, make_cache_key
+from src.utils.settings import settings
+
+
+def article_key(article: str) -> str:
+    """
+    Content hash of a submitted article. Leading and trailing whitespace doesn't make it a different article.
+    """
+    return make_cache_key("keyword_agent_run", article.strip())
+
+
+class SharedRun:
+    """
+    One in-flight run: the events emitted so far plus a way to wait for the next one.
+    """
+
+    def __init__(self) -> None:
+        self.events: list[dict[str, Any]] = []
+        self.done: bool = False
+        self.subscribers: int = 0
+        self.task: asyncio.Task[None] | None = None
+        # replaced on every change, so waiters wake up once per published event
+        self._changed: asyncio.Event = asyncio.Event()
+
+    def publish(self, event: dict[str, Any]) -> None:
+        self.events.append(event)
+        self._notify()
+
+    def finish(self) -> None:
+        self.done = True
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    @property
+    def succeeded(self) -> bool:
+        return self.done and not any(event.get("type") == "error" for event in self.events)
+
+    async def follow(self) -> AsyncIterator[dict[str, Any]]:
+        """
+        Yield every event of the run from the first one, waiting for new events until the run is done.
+        """
+        index: int = 0
+        while True:
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                return
+            await self._changed.wait()
+
+
+class SharedRuns:
+    """
+    Deduplicates runs by key: one producer per key, any number of subscribers, results kept for a short window.
+
+    Attributes:
+        name (str): Name used in stats.
+        submissions (int): Total `subscribe` calls.
+        executions (int): Runs actually started.
+        attached (int): Submissions that joined an in-flight run.
+        result_hits (int): Submissions served from the result store.
+
+    Example:
+        >>> async for event in shared_runs.subscribe(article_key(article), lambda: run_keyword_agent_stream(article)):
+        ...     yield event
+    """
+
+    def __init__(self, name: str, results: TieredCache | None) -> None:
+        """
+        Args:
+            name (str): Name used in stats.
+            results (TieredCache | None): Store for the events of completed runs. None disables serving completed runs.
+        """
+        self.name = name
+        self.results = results
+        self._inflight: dict[str, SharedRun] = {}
+        self.submissions: int = 0
+        self.executions: int = 0
+        self.attached: int = 0
+        self.result_hits: int = 0
+
+    async def subscribe(
+        self, key: str, start: Callable[[], AsyncIterator[dict[str, Any]]]
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Stream the events of the run for `key`: from the result store, from the in-flight run or from a new run.
+
+        Args:
+            key (str): Key of the run (i.e. `article_key(article)`).
+            start (Callable[[], AsyncIterator[dict[str, Any]]]): Starts a new run, only called if there is none to share.
+
+        Yields:
+            dict[str, Any]: The run's events, always from the first one.
+        """
+        self.submissions += 1
+
+        run: SharedRun | None = self._inflight.get(key)
+        if run is None and self.results is not None:
+            stored: list[dict[str, Any]] | None = await self.results.get(key)
+            if stored is not None:
+                self.result_hits += 1
+                for event in stored:
+                    yield event
+                return
+            # a run for the same key may have started while we looked at the store
+            run = self._inflight.get(key)
+
+        if run is None:
+            run = SharedRun()
+            self._inflight[key] = run
+            self.executions += 1
+            run.task = asyncio.ensure_future(self._produce(key, run, start))
+        else:
+            self.attached += 1
+
+        run.subscribers += 1
+        try:
+            async for event in run.follow():
+                yield event
+        finally:
+            run.subscribers -= 1
+
+    async def _produce(self, key: str, run: SharedRun, start: Callable[[], AsyncIterator[dict[str, Any]]]) -> None:
+        """
+        Consume the run and publish its events to the subscribers. Stores the events once the run succeeded.
+        """
+        try:
+            async for event in start():
+                run.publish(event)
+        except Exception as e:
+            print(f"Shared run {self.name} failed: {e}")
+            run.publish({"type": "error", "content": str(e)})
+        finally:
+            run.finish()
+            if self._inflight.get(key) is run:
+                del self._inflight[key]
+
+        if run.succeeded and self.results is not None:
+            await self.results.set(key, run.events)
+
+    async def aclose(self) -> None:
+        """
+        Cancel the runs that are still in flight (server shutdown) and close the result store.
+        """
+        tasks: list[asyncio.Task[None]] = [run.task for run in self._inflight.values() if run.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.results is not None:
+            self.results.close()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: counters of this group, `saved_ratio` is the share of submissions that didn't start a run.
+        """
+        return {
+            "name": self.name,
+            "submissions": self.submissions,
+            "executions": self.executions,
+            "attached": self.attached,
+            "result_hits": self.result_hits,
+            "saved_ratio": round((self.attached + self.result_hits) / self.submissions, 4) if self.submissions else 0.0,
+            "in_flight": len(self._inflight),
+            "subscribers": sum(run.subscribers for run in self._inflight.values()),
+            "results": self.results.stats() if self.results is not None else None,
+        }
+
+
+# *******************************************************
+# Singleton shared keyword agent runs (None when disabled) to be used throughout the application
+# Its lifecycle is tied to the FastAPI lifespan in src/main.py
+# *******************************************************
+shared_runs: SharedRuns | None = (
+    SharedRuns(
+        name="keyword_agent",
+        results=(
+            TieredCache(
+                namespace="shared_runs",
+                default_ttl=settings.SHARED_RUN_RESULT_TTL_SECONDS,
+                max_memory_entries=settings.SHARED_RUN_MAX_RESULTS,
+                sqlite_path=settings.CACHE_DB_PATH if settings.CACHE_PERSISTENT else None,
+            )
+            if settings.SHARED_RUN_RESULT_TTL_SECONDS > 0
+            else None
+        ),
+    )
+    if settings.SHARED_RUNS_ENABLED
+    else None
+)
@@ -0,0 +1,106 @@
+"""
+Single-flight request coalescing: while a call for a given key is in flight, identical calls don't hit the upstream
+again, they await the result of the call that is already running.
+
+This matters when several journalists submit articles about the same breaking story at the same time and the graph runs
+send identical GKP or web search requests concurrently.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent async calls that share a key into one upstream call.
+
+    The upstream call runs in its own task, so if the caller that started it is cancelled (i.e. the client disconnected)
+    the call still completes for everyone else waiting on it. Exceptions are propagated to every waiter and nothing is
+    remembered once the call finishes (this is not a cache, pair it with one).
+
+    Note: all waiters receive the *same* result object, treat it as read-only.
+
+    Attributes:
+        name (str): Name used in stats.
+        calls (int): Total calls made through `do`.
+        executions (int): Calls that actually reached the upstream.
+        coalesced (int): Calls that were served by an in-flight call (upstream calls saved).
+        errors (int): Upstream calls that raised.
+
+    Example:
+        >>> flight = SingleFlight(name="gkp")
+        >>> results = await flight.do(key, lambda: api.generate_keywords(keywords=["coffee"]))
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._inflight: dict[str, asyncio.Task[Any]] = {}
+        self.calls: int = 0
+        self.executions: int = 0
+        self.coalesced: int = 0
+        self.errors: int = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn unless a call with the same key is already in flight, in which case await that call instead.
+
+        Args:
+            key (str): Key identifying the normalized request.
+            fn (Callable[[], Awaitable[T]]): Zero-arg coroutine function that performs the upstream call.
+
+        Returns:
+            T: The result of the (possibly shared) upstream call.
+        """
+        self.calls += 1
+        task: asyncio.Task[Any] | None = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self.executions += 1
+            task.add_done_callback(lambda done, key=key: self._on_done(key, done))
+        else:
+            self.coalesced += 1
+
+        # shield so a cancelled waiter doesn't cancel the shared upstream call for the others
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: str, task: asyncio.Task[Any]) -> None:
+        """
+        Forget the finished call so the next request for this key goes upstream again.
+        """
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # retrieving the exception marks it as handled even if every waiter was cancelled
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    async def cancel(self) -> None:
+        """
+        Cancel the upstream calls that are still in flight and wait for them to stop (i.e. before closing the client they
+        use on shutdown). Their waiters get a CancelledError.
+        """
+        tasks: list[asyncio.Task[Any]] = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict[str, Any]: counters for this single-flight group, `coalesced` is the number of upstream calls saved.
+        """
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "saved_ratio": round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+            "errors": self.errors,
+            "in_flight": self.in_flight(),
+        }
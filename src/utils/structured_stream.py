@@ -0,0 +1,102 @@
+"""
+Incremental deltas of a streamed structured output.
+
+Chains built with `partial_json=True` (see `initialize_model_with_fallbacks`) stream cumulative partial dicts while the
+model generates the JSON, i.e. {"suggested_url_slug": "penn-st"} then {"suggested_url_slug": "penn-state-"} ...
+`field_deltas` turns two consecutive partial dicts into the text that was added to each field, so it can be sent to the
+frontend as small `answer_delta` events instead of one large answer at the end. When the model router starts over with
+another candidate mid answer (`STREAM_RESTART`), `reset_deltas` clears what was sent so far.
+"""
+
+from typing import Any, TypedDict
+
+
+class FieldDelta(TypedDict):
+    """
+    Text added to one field (or one item of a list field) since the previous partial output.
+
+    Attributes:
+        field (str): Name of the field in the event (may differ from the schema field name).
+        index (int | None): Item index for list fields, None for string fields.
+        delta (str): The new text. Append it to what was received so far.
+        reset (bool): The field changed in a way that isn't an append (rare, i.e. a partial escape sequence was
+            resolved). `delta` is then the complete current value and replaces what was received so far.
+    """
+
+    field: str
+    index: int | None
+    delta: str
+    reset: bool
+
+
+def _text_delta(field: str, index: int | None, previous: Any, current: Any) -> FieldDelta | None:
+    if not isinstance(current, str):
+        return None
+    previous_text: str = previous if isinstance(previous, str) else ""
+    if current == previous_text:
+        return None
+    if current.startswith(previous_text):
+        return FieldDelta(field=field, index=index, delta=current[len(previous_text):], reset=False)
+    return FieldDelta(field=field, index=index, delta=current, reset=True)
+
+
+def field_deltas(previous: dict[str, Any], current: dict[str, Any], fields: dict[str, str]) -> list[FieldDelta]:
+    """
+    Text added to each field between two cumulative partial outputs, in the order of `fields`.
+
+    Args:
+        previous (dict[str, Any]): The previous partial output ({} before the first chunk).
+        current (dict[str, Any]): The latest partial output.
+        fields (dict[str, str]): Schema field name -> field name used in the deltas. Only string and list of string
+            fields are supported, other fields are ignored.
+
+    Returns:
+        list[FieldDelta]: One delta per field (or list item) that changed.
+
+    Example:
+        >>> field_deltas({"slug": "penn"}, {"slug": "penn-state", "titles": ["Penn"]}, {"slug": "slug", "titles": "titles"})
+        [{'field': 'slug', 'index': None, 'delta': '-state', 'reset': False}, {'field': 'titles', 'index': 0, 'delta': 'Penn', 'reset': False}]
+    """
+    deltas: list[FieldDelta] = []
+    for schema_field, event_field in fields.items():
+        previous_value: Any = previous.get(schema_field)
+        current_value: Any = current.get(schema_field)
+
+        if isinstance(current_value, list):
+            previous_items: list[Any] = previous_value if isinstance(previous_value, list) else []
+            for index, item in enumerate(current_value):
+                previous_item: Any = previous_items[index] if index < len(previous_items) else None
+                delta = _text_delta(event_field, index, previous_item, item)
+                if delta is not None:
+                    deltas.append(delta)
+            continue
+
+        delta = _text_delta(event_field, None, previous_value, current_value)
+        if delta is not None:
+            deltas.append(delta)
+    return deltas
+
+
+def reset_deltas(previous: dict[str, Any], fields: dict[str, str]) -> list[FieldDelta]:
+    """
+    Deltas that clear every field (and list item) sent so far, used when the answer starts over.
+
+    Args:
+        previous (dict[str, Any]): The last partial output that was sent.
+        fields (dict[str, str]): Same as in `field_deltas`.
+
+    Returns:
+        list[FieldDelta]: One empty reset delta per field (or list item) that had text.
+    """
+    deltas: list[FieldDelta] = []
+    for schema_field, event_field in fields.items():
+        value: Any = previous.get(schema_field)
+        if isinstance(value, list):
+            deltas.extend(
+                FieldDelta(field=event_field, index=index, delta="", reset=True)
+                for index, item in enumerate(value)
+                if isinstance(item, str) and item
+            )
+        elif isinstance(value, str) and value:
+            deltas.append(FieldDelta(field=event_field, index=None, delta="", reset=True))
+    return deltas
@@ -0,0 +1,17 @@
+"""
+Shared test setup.
+
+Settings are read from the environment when `src.utils.settings` is first imported, so the test defaults are set here,
+before any test module imports the app: dummy API keys (nothing talks to a real provider) and no SQLite tiers, so
+tests never touch the `.cache/` directory of a developer's checkout.
+"""
+
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("MISTRAL_API_KEY", "test")
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("CACHE_PERSISTENT", "false")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("WARM_UP_ON_STARTUP", "false")
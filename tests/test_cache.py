@@ -0,0 +1,65 @@
+import asyncio
+
+from src.utils.cache import TieredCache, make_cache_key
+
+
+def test_disk_tier_is_opened_on_first_use(tmp_path):
+    path = tmp_path / "cache" / "cache.sqlite3"
+    cache = TieredCache(namespace="test", default_ttl=60, sqlite_path=str(path))
+    # constructing the cache (i.e. a module level singleton at import time) touches nothing on disk
+    assert not path.parent.exists()
+
+    asyncio.run(cache.set("key", {"value": 1}))
+    assert path.exists()
+    cache.close()
+
+
+def test_disk_tier_survives_restarts_and_expires(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    key = make_cache_key(["coffee", "tea"], "https://www.thedp.com")
+
+    async def write():
+        cache = TieredCache(namespace="test", default_ttl=60, sqlite_path=path)
+        await cache.set(key, ["coffee"])
+        await cache.set("expired", ["tea"], ttl=-1)
+        cache.close()
+
+    async def read():
+        cache = TieredCache(namespace="test", default_ttl=60, sqlite_path=path)
+        values = await cache.get(key), await cache.get("expired")
+        stats = cache.stats()
+        cache.close()
+        return values, stats
+
+    asyncio.run(write())
+    (value, expired), stats = asyncio.run(read())
+    assert value == ["coffee"]
+    assert expired is None
+    assert stats["disk_hits"] == 1
+
+
+def test_closed_disk_tier_does_not_reconnect(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = TieredCache(namespace="test", default_ttl=60, sqlite_path=str(path))
+    cache.close()
+
+    asyncio.run(cache.set("key", 1))
+    # the memory tier keeps working, the disk tier stays closed
+    assert asyncio.run(cache.get("key")) == 1
+    assert not path.exists()
+
+
+def test_broken_disk_tier_degrades_to_memory(tmp_path):
+    # a directory can't be opened as a database, every disk operation fails with sqlite3.OperationalError
+    cache = TieredCache(namespace="test", default_ttl=60, sqlite_path=str(tmp_path))
+
+    async def scenario():
+        await cache.set("key", ["coffee"])
+        value = await cache.get("key")
+        await cache.delete("key")
+        deleted = await cache.get("key")
+        await cache.clear()
+        return value, deleted
+
+    assert asyncio.run(scenario()) == (["coffee"], None)
+    cache.close()
@@ -0,0 +1,99 @@
+import asyncio
+import operator
+from typing import Annotated, TypedDict
+
+from langgraph.config import get_stream_writer
+from langgraph.graph import END, START, StateGraph
+
+from src.utils.checkpointer import CompressedSerializer, GraphCheckpointer
+
+
+class ToyState(TypedDict):
+    ran: Annotated[list[str], operator.add]
+
+
+def build_toy_graph(fail: dict[str, bool]):
+    """
+    extract -> analyse, analyse fails like the keyword agent's nodes: it streams an error event, then raises.
+    """
+
+    async def extract(state: ToyState) -> dict:
+        return {"ran": ["extract"]}
+
+    async def analyse(state: ToyState) -> dict:
+        if fail["analyse"]:
+            get_stream_writer()({"type": "error", "content": "analyse failed"})
+            raise ValueError("analyse failed")
+        return {"ran": ["analyse"]}
+
+    builder = StateGraph(ToyState)
+    builder.add_node("extract", extract)
+    builder.add_node("analyse", analyse)
+    builder.add_edge(START, "extract")
+    builder.add_edge("extract", "analyse")
+    builder.add_edge("analyse", END)
+    return builder.compile()
+
+
+def make_checkpointer(path, ttl: float = 60) -> GraphCheckpointer:
+    return GraphCheckpointer(path=str(path), serde=CompressedSerializer(), ttl=ttl, prune_interval=0)
+
+
+def test_failed_node_is_run_again_on_resume(tmp_path):
+    fail = {"analyse": True}
+    config = {"configurable": {"thread_id": "run"}}
+
+    async def scenario():
+        checkpointer = make_checkpointer(tmp_path / "checkpoints.sqlite3")
+        agent = build_toy_graph(fail).copy(update={"checkpointer": await checkpointer.get()})
+
+        events = []
+        try:
+            async for mode, update in agent.astream({"ran": []}, config=config, stream_mode=["custom", "values"]):
+                if mode == "custom":
+                    events.append(update)
+        except ValueError:
+            pass
+        failed = await agent.aget_state(config)
+
+        fail["analyse"] = False
+        async for _ in agent.astream(None, config=config):
+            pass
+        resumed = await agent.aget_state(config)
+        await checkpointer.aclose()
+        return events, failed, resumed
+
+    events, failed, resumed = asyncio.run(scenario())
+    assert events == [{"type": "error", "content": "analyse failed"}]
+    # the failed node is still the next step, extract is not run again
+    assert failed.next == ("analyse",)
+    assert resumed.next == ()
+    assert resumed.values["ran"] == ["extract", "analyse"]
+
+
+def test_expired_threads_are_pruned(tmp_path):
+    config = {"configurable": {"thread_id": "abandoned"}}
+
+    async def scenario():
+        checkpointer = make_checkpointer(tmp_path / "checkpoints.sqlite3", ttl=0.05)
+        agent = build_toy_graph({"analyse": True}).copy(update={"checkpointer": await checkpointer.get()})
+        await checkpointer.touch("abandoned")
+        try:
+            await agent.ainvoke({"ran": []}, config=config)
+        except ValueError:
+            pass
+        before = await agent.aget_state(config)
+
+        # the next run prunes the abandoned thread once its ttl passed (no prune interval)
+        await asyncio.sleep(0.1)
+        await checkpointer.touch("other")
+        after = await agent.aget_state(config)
+        stats = checkpointer.stats()
+        await checkpointer.aclose()
+        return before, after, stats
+
+    before, after, stats = asyncio.run(scenario())
+    assert before.values
+    assert not after.values
+    assert stats["pruned_threads"] == 1
+    assert stats["deleted_threads"] == 0
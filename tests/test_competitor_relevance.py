@@ -0,0 +1,305 @@
+"""
+Calibration of the router scorer's defaults on the sample searches in reference_docs/web_search_responses.txt:
+
+- the Exa search for the Penn / Title IX story (raw response), scored against the story below,
+- the Tavily search about Penn graduates' jobs and the Exa search about RAG tools (parsed responses), which are
+  off-topic for that story,
+
+and on results written for this test, after real coverage of the time:
+
+- near-topic results for the Penn story: other Penn stories and other Title IX cases,
+- a second story (Harvard's lawsuit over its funding freeze) with on-topic and near-topic results.
+"""
+
+import ast
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from src.tools.competitor_relevance import CompetitorRelevanceScorer
+from src.utils.settings import settings
+
+SAMPLES = (Path(__file__).parent.parent / "reference_docs" / "web_search_responses.txt").read_text()
+
+ARTICLE = """
+Trump administration says Penn violated Title IX by letting transgender swimmer compete
+
+The U.S. Department of Education's Office for Civil Rights found that the University of Pennsylvania violated Title IX
+when it allowed Lia Thomas, a transgender swimmer, to compete on the women's swimming team in 2022. The finding follows a
+directed investigation the office opened in February into Penn's intercollegiate athletics participation policies, days
+after President Trump signed an executive order meant to ban transgender athletes from women's sports.
+
+The Trump administration had already suspended $175 million in federal funding to Penn over the swimmer's participation.
+The department said Penn must issue an apology to female swimmers, restore their records and titles, and adopt the
+federal definition of sex in its athletics policies, or risk referral to the Department of Justice.
+
+Penn said it has always followed NCAA eligibility rules and Title IX, and that it never had a transgender athlete policy
+of its own. The NCAA changed its policy after the executive order to limit women's sports to athletes assigned female at
+birth. University President J. Larry Jameson said Penn is reviewing the finding and remains in conversation with the
+federal government.
+"""
+ENTITIES = ["Penn", "Title IX", "Trump administration", "Office for Civil Rights", "transgender athletes"]
+
+HARVARD_ARTICLE = """
+Harvard sues Trump administration over $2.2 billion funding freeze
+
+Harvard University filed a lawsuit in federal court in Boston on Monday challenging the Trump administration's freeze of
+more than $2.2 billion in federal research grants and contracts. The suit argues the freeze violates the First Amendment
+and federal law, and that the government is using research funding as leverage to control academic decisions.
+
+The freeze came hours after Harvard rejected a list of demands from the administration's antisemitism task force,
+including changes to hiring, admissions and governance, and an audit of viewpoint diversity on campus. Harvard
+President Alan Garber said the university would not give up its independence or its constitutional rights.
+
+The administration has also threatened Harvard's tax-exempt status and its ability to enroll international students.
+The White House said Harvard had failed to protect Jewish students and that federal funding is a privilege.
+"""
+HARVARD_ENTITIES = ["Harvard", "Trump administration", "Alan Garber", "federal funding", "antisemitism task force"]
+
+# the day of each search (just after its newest result)
+PENN_SEARCH_DAY = datetime(2025, 4, 29, tzinfo=timezone.utc)
+JOBS_SEARCH_DAY = datetime(2025, 5, 16, tzinfo=timezone.utc)
+RAG_SEARCH_DAY = datetime(2025, 5, 10, tzinfo=timezone.utc)
+HARVARD_SEARCH_DAY = datetime(2025, 4, 23, tzinfo=timezone.utc)
+
+
+def section(title: str) -> str:
+    start: int = SAMPLES.index("\n", SAMPLES.index(title)) + 1
+    end: int = SAMPLES.find("\n#####", start)
+    return SAMPLES[start : end if end != -1 else None]
+
+
+def exa_raw_records() -> list[dict[str, Any]]:
+    """
+    The raw Exa response as WebSearchRecords (what `WebSearch` parses it into).
+    """
+    records: list[dict[str, Any]] = []
+    for block in section("Exa Client response (raw)").split("\n\n\n"):
+        fields: dict[str, str] = {key: value.strip() for key, value in re.findall(r"^([A-Za-z ]+): (.*)$", block, re.M)}
+        if "Title" not in fields:
+            continue
+        records.append(
+            {
+                "url": fields["URL"],
+                "title": fields["Title"],
+                "published_date": None if fields["Published Date"] == "None" else fields["Published Date"],
+                "highlights": ast.literal_eval(fields["Highlights"]),
+            }
+        )
+    return records
+
+
+def parsed_records(title: str) -> list[dict[str, Any]]:
+    return ast.literal_eval(section(title).split("-----")[0])
+
+
+def make_scorer() -> CompetitorRelevanceScorer:
+    return CompetitorRelevanceScorer(
+        good_result=settings.ROUTER_SCORER_GOOD_RESULT,
+        analysis_share=settings.ROUTER_SCORER_ANALYSIS_SHARE,
+        retry_share=settings.ROUTER_SCORER_RETRY_SHARE,
+        recency_half_life_days=settings.ROUTER_SCORER_RECENCY_HALF_LIFE_DAYS,
+        article_terms=settings.ROUTER_SCORER_ARTICLE_TERMS,
+    )
+
+
+def record(url: str, title: str, published_date: str, *highlights: str) -> dict[str, Any]:
+    return {"url": url, "title": title, "published_date": published_date, "highlights": list(highlights)}
+
+
+PENN = exa_raw_records()
+JOBS = parsed_records("Tavily Response (parsed)")
+RAG = parsed_records("Exa Response (parsed)")
+
+# other stories about Penn, and a Title IX story that isn't about athletes
+PENN_NEAR_TOPIC = [
+    record(
+        "https://www.thedp.com/article/2025/04/penn-commencement-speakers",
+        "Penn announces 2025 commencement speakers and honorary degree recipients",
+        "2025-04-22T20:00:00.000Z",
+        "The University of Pennsylvania announced the speaker for its 269th commencement at Franklin Field.",
+        "Honorary degrees will be awarded to seven recipients, University President J. Larry Jameson said.",
+    ),
+    record(
+        "https://www.inquirer.com/health/penn-medicine-nurses-contract",
+        "Penn Medicine nurses vote on union contract at the Hospital of the University of Pennsylvania",
+        "2025-04-24T12:00:00.000Z",
+        "Nurses at the Hospital of the University of Pennsylvania voted on a new contract with Penn Medicine.",
+        "The union said the agreement raises wages and sets staffing ratios.",
+    ),
+    record(
+        "https://www.thedp.com/article/2025/04/penn-hiring-freeze-research-cuts",
+        "Penn freezes staff hiring as federal research funding cuts loom",
+        "2025-04-15T16:00:00.000Z",
+        "Penn paused most staff hiring and asked schools to plan for cuts as federal research grants from the National "
+        "Institutes of Health were terminated.",
+        "The university said the measures are meant to protect its research mission.",
+    ),
+    record(
+        "https://www.insidehighered.com/news/2025/01/10/judge-strikes-down-title-ix-rule",
+        "Judge strikes down Biden Title IX rule on sexual harassment and gender identity",
+        "2025-01-10T14:00:00.000Z",
+        "A federal judge vacated the 2024 Title IX rule that extended sex discrimination protections to gender "
+        "identity.",
+        "Colleges will return to the 2020 rule for sexual harassment investigations and hearings.",
+    ),
+]
+# other transgender athlete Title IX cases, the same kind of story as the Penn one
+OTHER_TITLE_IX_CASES = [
+    record(
+        "https://apnews.com/article/san-jose-state-volleyball-title-ix-lawsuit",
+        "San Jose State volleyball players sue over transgender teammate, citing Title IX",
+        "2025-04-18T15:00:00.000Z",
+        "Former San Jose State volleyball players filed a lawsuit claiming the university and the Mountain West "
+        "Conference violated Title IX by letting a transgender teammate play.",
+        "The case is one of several that preceded the executive order on transgender athletes in women's sports.",
+    ),
+    record(
+        "https://www.nytimes.com/2025/04/11/us/maine-title-ix-transgender-athletes.html",
+        "Education Department refers Maine to Justice Department in Title IX dispute over transgender athletes",
+        "2025-04-11T18:20:00.000Z",
+        "The Education Department's Office for Civil Rights said Maine's education department violated Title IX by "
+        "allowing transgender girls to compete in girls' high school sports.",
+        "Gov. Janet Mills has refused to comply with the Trump administration's demands, and the state's federal "
+        "school lunch funding was frozen.",
+    ),
+]
+
+HARVARD = [
+    record(
+        "https://www.nytimes.com/2025/04/21/us/harvard-lawsuit-trump-funding.html",
+        "Harvard Sues Trump Administration Over Funding Freeze",
+        "2025-04-21T19:30:00.000Z",
+        "Harvard University sued the Trump administration on Monday, asking a federal judge to restore more than $2.2 "
+        "billion in research funding that was frozen after the university refused the government's demands.",
+        "Harvard's president, Alan Garber, said the administration was seeking unprecedented control over the "
+        "university.",
+    ),
+    record(
+        "https://apnews.com/article/harvard-lawsuit-funding-freeze",
+        "Harvard files lawsuit to stop Trump's $2.2 billion funding freeze",
+        "2025-04-21T21:10:00.000Z",
+        "The lawsuit, filed in federal court in Boston, says the freeze of federal grants violates the First "
+        "Amendment.",
+        "The antisemitism task force had demanded changes to Harvard's governance, hiring and admissions.",
+    ),
+    record(
+        "https://www.thecrimson.com/article/2025/4/22/garber-lawsuit-trump-administration/",
+        "Garber Announces Harvard Lawsuit Against Trump Administration",
+        "2025-04-22T02:00:00.000Z",
+        "Harvard President Alan Garber told affiliates the University would fight the funding freeze in court.",
+        "The administration froze $2.2 billion in federal funding after Harvard rejected the task force's demands.",
+    ),
+    record(
+        "https://www.bostonglobe.com/2025/04/16/metro/trump-harvard-tax-exempt-status/",
+        "Trump threatens Harvard's tax-exempt status as funding fight escalates",
+        "2025-04-16T15:00:00.000Z",
+        "President Trump said Harvard should lose its tax-exempt status after the university refused the "
+        "administration's demands.",
+        "The threat came a day after the administration froze federal funding to Harvard.",
+    ),
+]
+# another university's settlement and other Harvard stories
+HARVARD_NEAR_TOPIC = [
+    record(
+        "https://www.nytimes.com/2025/03/21/nyregion/columbia-trump-demands.html",
+        "Columbia agrees to Trump administration demands to restore $400 million",
+        "2025-03-21T17:00:00.000Z",
+        "Columbia University agreed to overhaul its protest policies and put its Middle East studies department under "
+        "review.",
+        "The administration had cancelled $400 million in grants over the university's handling of antisemitism.",
+    ),
+    record(
+        "https://www.thecrimson.com/article/2025/4/10/housing-lottery-rules/",
+        "Harvard College announces new undergraduate housing lottery rules",
+        "2025-04-10T18:00:00.000Z",
+        "Harvard College will change how first-year students are assigned to upperclass houses.",
+        "Students can now form blocking groups of up to eight.",
+    ),
+    record(
+        "https://www.cnbc.com/2025/04/05/harvard-endowment-returns.html",
+        "Harvard endowment returns 9.6% as private equity holdings lag",
+        "2025-04-05T12:00:00.000Z",
+        "Harvard's endowment, the largest in higher education, reported a 9.6% return for the fiscal year.",
+        "The Harvard Management Company said private equity returns were below expectations.",
+    ),
+]
+
+
+def test_samples_are_parsed():
+    assert len(PENN) == len(JOBS) == len(RAG) == 5
+    assert PENN[3]["url"] == "https://www.cbsnews.com/philadelphia/news/trump-penn-title-ix-violation-sports/"
+
+
+def test_on_topic_search_goes_to_competitor_analysis():
+    decision = make_scorer().decide(ARTICLE, ENTITIES, PENN, now=PENN_SEARCH_DAY)
+    assert decision.route == "competitor_analysis"
+    # all but the DP's federal impacts page (visa revocations, not Title IX) are good results
+    assert decision.good_share == 0.8
+    assert decision.relevance[4] < settings.ROUTER_SCORER_GOOD_RESULT
+
+
+def test_off_topic_searches_search_again():
+    scorer = make_scorer()
+    for records, now in [(JOBS, JOBS_SEARCH_DAY), (RAG, RAG_SEARCH_DAY)]:
+        decision = scorer.decide(ARTICLE, ENTITIES, records, now=now)
+        assert decision.route == "query_generator"
+        assert decision.good_share == 0.0
+
+
+def test_second_story_goes_to_competitor_analysis():
+    decision = make_scorer().decide(
+        HARVARD_ARTICLE, HARVARD_ENTITIES, HARVARD + HARVARD_NEAR_TOPIC[:1], now=HARVARD_SEARCH_DAY
+    )
+    assert decision.route == "competitor_analysis"
+    assert decision.good_share == 0.8
+
+
+def test_threshold_separates_on_and_off_topic_results():
+    scorer = make_scorer()
+    on_topic = scorer.decide(ARTICLE, ENTITIES, PENN, now=PENN_SEARCH_DAY).relevance
+    on_topic += scorer.decide(HARVARD_ARTICLE, HARVARD_ENTITIES, HARVARD, now=HARVARD_SEARCH_DAY).relevance
+    off_topic = scorer.decide(ARTICLE, ENTITIES, JOBS, now=JOBS_SEARCH_DAY).relevance
+    off_topic += scorer.decide(ARTICLE, ENTITIES, RAG, now=RAG_SEARCH_DAY).relevance
+    near_topic = scorer.decide(ARTICLE, ENTITIES, PENN_NEAR_TOPIC, now=PENN_SEARCH_DAY).relevance
+    near_topic += scorer.decide(HARVARD_ARTICLE, HARVARD_ENTITIES, HARVARD_NEAR_TOPIC, now=HARVARD_SEARCH_DAY).relevance
+
+    # the margins are thin (and the DP's federal impacts page, partly on-topic, is under the threshold), which is why
+    # only clear majorities of good results are decided locally
+    assert max(off_topic + near_topic) <= settings.ROUTER_SCORER_GOOD_RESULT - 0.02
+    assert max(near_topic) <= settings.ROUTER_SCORER_GOOD_RESULT - 0.05
+    assert sorted(on_topic)[1] >= settings.ROUTER_SCORER_GOOD_RESULT + 0.04
+
+
+@pytest.mark.xfail(strict=True, reason="the scorer matches topics, not stories")
+def test_same_kind_of_story_elsewhere_is_not_a_good_result():
+    scorer = make_scorer()
+    other_cases = scorer.decide(ARTICLE, ENTITIES, OTHER_TITLE_IX_CASES, now=PENN_SEARCH_DAY).relevance
+    # Penn's own federal funding cuts, for the Harvard story
+    other_funding = scorer.decide(HARVARD_ARTICLE, HARVARD_ENTITIES, PENN[1:3], now=HARVARD_SEARCH_DAY).relevance
+    assert max(other_cases + other_funding) < settings.ROUTER_SCORER_GOOD_RESULT
+
+
+def test_search_with_near_topic_results_is_left_to_the_router_llm():
+    # a second round of near-topic results: 4 good results of 9, under the analysis share
+    decision = make_scorer().decide(ARTICLE, ENTITIES, PENN + PENN_NEAR_TOPIC, now=PENN_SEARCH_DAY)
+    assert decision.route is None
+    assert decision.good_share == round(4 / 9, 4)
+
+
+def test_mixed_search_is_left_to_the_router_llm():
+    # 3 on-topic and 2 off-topic results, the LLM decides whether that's enough
+    decision = make_scorer().decide(ARTICLE, ENTITIES, PENN[1:4] + JOBS[:2], now=PENN_SEARCH_DAY)
+    assert decision.route is None
+    assert decision.good_share == 0.6
+
+
+def test_older_results_are_discounted_not_dropped():
+    scorer = make_scorer()
+    fresh = scorer.decide(ARTICLE, ENTITIES, PENN[3:4], now=PENN_SEARCH_DAY).relevance[0]
+    year_later = scorer.decide(ARTICLE, ENTITIES, PENN[3:4], now=datetime(2026, 4, 29, tzinfo=timezone.utc)).relevance[0]
+    assert year_later < fresh
+    assert year_later >= 0.8 * fresh
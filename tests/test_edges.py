@@ -0,0 +1,45 @@
+import subprocess
+import sys
+
+from src.agents.keywords_agent.edges import fan_out_keyword_planner
+from src.utils.settings import settings
+
+STATE = {
+    "retrieved_entities": ["Penn", "Title IX"],
+    "competitor_information": [
+        {"rank": 2, "url": "https://www.inquirer.com/penn"},
+        {"rank": 1, "url": "https://www.thedp.com/title-ix"},
+        {"rank": 3, "url": "https://www.thedp.com/title-ix"},
+    ],
+}
+
+
+def sent_urls(state) -> list[str]:
+    return [send.arg["url"] for send in fan_out_keyword_planner(state)]
+
+
+def test_routing_module_does_not_import_the_nodes():
+    # in a fresh interpreter, other tests may have imported the nodes already
+    code = "import sys, src.agents.keywords_agent.edges; print('src.agents.keywords_agent.nodes' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_fan_out_merges_the_prefetched_calls(monkeypatch):
+    monkeypatch.setattr(settings, "GKP_PREFETCH_ENABLED", True)
+    monkeypatch.setattr(settings, "GKP_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "GKP_SITE_URL", "https://www.thedp.com")
+    assert sent_urls(STATE) == [
+        "https://www.thedp.com/title-ix",
+        "https://www.inquirer.com/penn",
+        "",
+        "https://www.thedp.com",
+    ]
+
+
+def test_no_prefetch_without_the_gkp_cache(monkeypatch):
+    monkeypatch.setattr(settings, "GKP_PREFETCH_ENABLED", True)
+    monkeypatch.setattr(settings, "GKP_CACHE_ENABLED", False)
+    assert sent_urls(STATE) == ["https://www.thedp.com/title-ix", "https://www.inquirer.com/penn"]
+    # the seeds-only call is still the fallback when no competitor url is known
+    assert sent_urls({"retrieved_entities": ["Penn"], "competitor_information": []}) == [""]
@@ -0,0 +1,144 @@
+import asyncio
+import json
+from pathlib import Path
+
+import httpx
+
+from src.tools import google_keywords_api
+from src.tools.google_keywords_api import GoogleKeywordsAPI
+from src.utils.cache import TieredCache
+from src.utils.rate_limiter import ProviderGovernor, RateLimiterRegistry
+from src.utils.settings import settings
+
+SAMPLE_RESPONSE = json.loads(
+    (Path(__file__).parent.parent / "reference_docs" / "gkp_raw_sample_response.json").read_text()
+)
+
+
+def make_api(
+    cache: TieredCache | None = None, delay: float = 0.0, peak: list[int] | None = None
+) -> tuple[GoogleKeywordsAPI, list[dict]]:
+    """
+    A client whose HTTP transport answers every request with the sample GKP response and records the payloads.
+    `peak` (if given, a one item list) receives the highest number of requests the transport served at once.
+    """
+    requests: list[dict] = []
+    active: list[int] = [0]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        active[0] += 1
+        if peak is not None:
+            peak[0] = max(peak[0], active[0])
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            active[0] -= 1
+        return httpx.Response(200, json=SAMPLE_RESPONSE)
+
+    api = GoogleKeywordsAPI(base_url="http://gkp.test", cache=cache, http2=False)
+    api._client = httpx.AsyncClient(base_url=api.base_url, transport=httpx.MockTransport(handler))
+    return api, requests
+
+
+def test_generate_keywords_parses_response():
+    async def run():
+        api, requests = make_api()
+        results = await api.generate_keywords(keywords=["coffee"])
+        await api.aclose()
+        return results, requests
+
+    results, requests = asyncio.run(run())
+    assert requests == [{"keywords": ["coffee"], "url": "https://www.thedp.com/", "location_id": "2840", "language_id": "1000"}]
+    assert len(results) == len(SAMPLE_RESPONSE["results"])
+    searches = [result["average_monthly_searches"] for result in results]
+    assert searches == sorted(searches, reverse=True)
+
+
+def test_generate_keywords_coalesces_identical_concurrent_calls():
+    async def run():
+        api, requests = make_api(delay=0.05)
+        results = await asyncio.gather(
+            api.generate_keywords(keywords=["Coffee", "tea"], url="https://WWW.thedp.com/"),
+            api.generate_keywords(keywords=["tea", " coffee "], url="https://www.thedp.com"),
+            api.generate_keywords(keywords=["tea"]),
+        )
+        await api.aclose()
+        return results, requests, api.single_flight
+
+    results, requests, flight = asyncio.run(run())
+    # the first two only differ in seed order, casing and url formatting
+    assert len(requests) == 2
+    assert results[0] is results[1]
+    assert (flight.executions, flight.coalesced) == (2, 1)
+
+
+def test_generate_keywords_serves_normalized_requests_from_cache():
+    async def run():
+        cache = TieredCache(namespace="gkp_test", default_ttl=60, max_memory_entries=8)
+        api, requests = make_api(cache=cache)
+        first = await api.generate_keywords(keywords=["coffee"])
+        second = await api.generate_keywords(keywords=["COFFEE"])
+        await api.aclose()
+        return first, second, requests
+
+    first, second, requests = asyncio.run(run())
+    assert first == second
+    assert len(requests) == 1
+
+
+def test_generate_keywords_rejects_empty_seeds():
+    api, requests = make_api()
+    try:
+        asyncio.run(api.generate_keywords(keywords=[]))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("empty seeds must raise ValueError")
+    assert requests == []
+
+
+def test_only_upstream_requests_take_a_concurrency_slot(monkeypatch):
+    # the "gkp" governor is the only bound on concurrent GKP requests, give it exactly two slots
+    registry = RateLimiterRegistry()
+    registry._governors["gkp"] = ProviderGovernor(name="gkp", max_concurrency=2, initial_concurrency=2)
+    monkeypatch.setattr(google_keywords_api, "rate_limits", registry)
+    monkeypatch.setattr(settings, "RATE_LIMITER_ENABLED", True)
+    peak: list[int] = [0]
+
+    async def run():
+        api, requests = make_api(delay=0.05, peak=peak)
+        api.prefetch(keywords=["coffee"], url="", run_id="run")
+        await asyncio.sleep(0)
+        # the second coffee call waits on the prefetch's request, it must not keep tea from using the other slot
+        results = await asyncio.gather(
+            api.generate_keywords(keywords=["coffee"], url=""),
+            api.generate_keywords(keywords=["tea"], url=""),
+        )
+        await api.aclose()
+        return results, requests
+
+    results, requests = asyncio.run(run())
+    assert len(requests) == 2
+    assert peak == [2]
+    assert all(results)
+
+
+def test_prefetches_are_cancelled_per_run_and_on_close():
+    async def run():
+        api, requests = make_api(delay=10)
+        api.prefetch(keywords=["coffee"], url="", run_id="failed")
+        api.prefetch(keywords=["tea"], url="", run_id="other")
+        await asyncio.sleep(0.01)
+
+        await api.cancel_prefetches("failed")
+        remaining = set(api._prefetches)
+        # shutdown: every prefetch and the upstream requests still in flight stop before the client is closed
+        await api.cancel_prefetches()
+        await api.aclose()
+        return remaining, api._prefetches, api.single_flight.in_flight()
+
+    remaining, prefetches, in_flight = asyncio.run(run())
+    assert remaining == {"other"}
+    assert prefetches == {}
+    assert in_flight == 0
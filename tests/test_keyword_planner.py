@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.agents.keywords_agent import nodes
+from src.agents.keywords_agent.state import KeywordPlannerTask
+
+
+def gkp_down(monkeypatch) -> list[dict]:
+    """
+    Make every GKP call fail like an unreachable microservice, returns the list the nodes' stream writer appends to.
+    """
+
+    async def generate_keywords(keywords: list[str], url: str) -> list[dict]:
+        raise httpx.ConnectError("Google Keywords API is not reachable at /keywords/generate")
+
+    events: list[dict] = []
+    monkeypatch.setattr(nodes.gkp, "generate_keywords", generate_keywords)
+    monkeypatch.setattr(nodes, "get_stream_writer", lambda: events.append)
+    return events
+
+
+def test_map_step_reports_and_raises_gkp_errors(monkeypatch):
+    events = gkp_down(monkeypatch)
+    task = KeywordPlannerTask(seed_keywords=["Penn", "Title IX"], url="https://www.thedp.com", index=0)
+
+    # raising (instead of returning empty planner data) fails the node, so the run can be resumed
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(nodes.google_keyword_planner(task))
+    assert events[-1]["type"] == "error"
+    assert events[-1]["node"] == "Google Keyword Planner"
+
+
+def test_prefetch_swallows_gkp_errors(monkeypatch):
+    gkp_down(monkeypatch)
+    monkeypatch.setattr(nodes.settings, "GKP_PREFETCH_ENABLED", True)
+    monkeypatch.setattr(nodes.settings, "GKP_CACHE_ENABLED", True)
+
+    async def scenario():
+        update = await nodes.keyword_planner_prefetch(
+            {"retrieved_entities": ["Penn"], "previous_revision": None, "run_id": "run"}
+        )
+        tasks = list(nodes.gkp._prefetches["run"])
+        await asyncio.gather(*tasks)
+        return update, tasks
+
+    update, tasks = asyncio.run(scenario())
+    assert update == {}
+    assert tasks and all(task.exception() is None for task in tasks)
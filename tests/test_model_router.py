@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from src.utils.model_router import STREAM_RESTART, NodeModelRouter, model_health, node_latency
+from src.utils.settings import settings
+
+
+class Answer(BaseModel):
+    slug: str
+    headlines: list[str]
+
+
+class FakeCandidate:
+    """
+    Streams cumulative partial dicts like a partial JSON chain, with a delay before the first chunk.
+    """
+
+    def __init__(self, chunks: list[dict], first_chunk_delay: float = 0.0, error: Exception | None = None) -> None:
+        self.chunks = chunks
+        self.first_chunk_delay = first_chunk_delay
+        self.error = error
+        self.started = 0
+        self.cancelled = 0
+
+    async def astream(self, input, config=None, **kwargs):
+        self.started += 1
+        try:
+            await asyncio.sleep(self.first_chunk_delay)
+            for chunk in self.chunks:
+                yield chunk
+                await asyncio.sleep(0)
+            if self.error is not None:
+                raise self.error
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        self.started += 1
+        await asyncio.sleep(self.first_chunk_delay)
+        if self.error is not None:
+            raise self.error
+        return self.chunks[-1]
+
+
+VALID = [{"slug": "penn"}, {"slug": "penn-state", "headlines": ["Penn"]}]
+# the last chunk is missing a required field
+INVALID = [{"slug": "penn"}, {"slug": "penn-state"}]
+
+
+@pytest.fixture(autouse=True)
+def deterministic_routing(monkeypatch):
+    # configured order, no exploration, and a fast default hedge delay for the hedged node
+    monkeypatch.setattr(settings, "LLM_ROUTING_ENABLED", False)
+    monkeypatch.setitem(settings.LLM_HEDGE_PERCENTILES, "hedged_node", 0.95)
+    monkeypatch.setattr(settings, "LLM_HEDGE_DEFAULT_DELAY_SECONDS", 0.05)
+
+
+def make_router(node: str, *candidates: FakeCandidate) -> NodeModelRouter:
+    labels = [f"fake/{node}-{index}" for index in range(len(candidates))]
+    return NodeModelRouter(list(candidates), labels, node=node, structured=True, dict_schema=Answer)
+
+
+async def collect(router: NodeModelRouter) -> list:
+    return [chunk async for chunk in router.astream("prompt")]
+
+
+def test_stream_with_invalid_output_restarts_on_the_next_candidate():
+    primary, fallback = FakeCandidate(INVALID), FakeCandidate(VALID)
+    router = make_router("schema_node", primary, fallback)
+
+    chunks = asyncio.run(collect(router))
+
+    assert chunks == [*INVALID, STREAM_RESTART, *VALID]
+    assert model_health.get("fake/schema_node-0").schema_failures == 1
+    assert node_latency.get("schema_node").failovers == 1
+
+
+def test_stream_hedges_a_slow_first_chunk():
+    slow, fast = FakeCandidate(VALID, first_chunk_delay=1.0), FakeCandidate(VALID)
+    router = make_router("hedged_node", slow, fast)
+
+    chunks = asyncio.run(collect(router))
+
+    assert chunks == VALID
+    assert (slow.cancelled, fast.started) == (1, 1)
+    stats = node_latency.get("hedged_node")
+    assert (stats.hedged, stats.hedge_wins) == (1, 1)
+
+
+def test_stream_keeps_the_hedged_primary_latency(monkeypatch):
+    monkeypatch.setitem(settings.LLM_HEDGE_PERCENTILES, "hedge_loser_node", 0.95)
+    slow, fast = FakeCandidate(VALID, first_chunk_delay=1.0), FakeCandidate(VALID, first_chunk_delay=0.05)
+    router = make_router("hedge_loser_node", slow, fast)
+
+    asyncio.run(collect(router))
+
+    # the primary lost before its first chunk, it still ran for the hedge delay plus the hedge's first chunk
+    latencies = list(node_latency.get("hedge_loser_node").latencies)
+    assert len(latencies) == 1
+    assert 0.1 <= latencies[0] < 1.0
+
+
+def test_stream_error_before_the_first_chunk_fails_over_without_restart():
+    broken, fallback = FakeCandidate([], error=RuntimeError("provider down")), FakeCandidate(VALID)
+    router = make_router("error_node", broken, fallback)
+
+    assert asyncio.run(collect(router)) == VALID
+
+
+def test_stream_raises_when_every_candidate_is_invalid():
+    router = make_router("invalid_node", FakeCandidate(INVALID), FakeCandidate(INVALID))
+
+    with pytest.raises(ValueError):
+        asyncio.run(collect(router))
+
+
+def test_ainvoke_validates_dict_outputs_and_falls_back():
+    router = make_router("invoke_node", FakeCandidate(INVALID), FakeCandidate(VALID))
+
+    assert asyncio.run(router.ainvoke("prompt")) == VALID[-1]
+    assert model_health.get("fake/invoke_node-0").schema_failures == 1
@@ -0,0 +1,37 @@
+from src.utils.prompt_budget import BudgetedInput, PromptBuilder, count_tokens
+from src.utils.settings import settings
+
+
+def test_node_budget_uses_the_highest_provider_token_factor(monkeypatch):
+    monkeypatch.setitem(settings.PROMPT_TOKEN_BUDGETS, "test_node", 12_000)
+    builder = PromptBuilder()
+    assert builder.budget_for("test_node") == 12_000
+
+    builder.register_providers("test_node", ["openai"])
+    assert builder.budget_for("test_node") == 12_000
+
+    builder.register_providers("test_node", ["mistral", "groq"])
+    factor = max(settings.PROMPT_TOKEN_FACTORS["mistral"], settings.PROMPT_TOKEN_FACTORS["groq"])
+    assert builder.token_factor("test_node") == factor
+    assert builder.budget_for("test_node") == int(12_000 / factor)
+
+
+def test_build_trims_lowest_priority_input_to_the_budget(monkeypatch):
+    monkeypatch.setitem(settings.PROMPT_TOKEN_BUDGETS, "test_node", 300)
+    builder = PromptBuilder()
+    builder.register_providers("test_node", ["mistral"])
+    article = "The university announced a new housing policy for students. " * 3
+    results = [f"Result {index}: students react to the housing policy announcement." for index in range(100)]
+
+    prompt = builder.build(
+        node="test_node",
+        template="ARTICLE:\n{article}\n\nRESULTS:\n{results}",
+        article=BudgetedInput(article, priority=2),
+        results=BudgetedInput(results, priority=1, separator="\n"),
+    )
+
+    assert count_tokens(prompt) <= builder.budget_for("test_node")
+    # the higher priority article is kept whole, results are dropped from the end
+    assert article in prompt
+    assert "Result 0:" in prompt and "Result 99:" not in prompt
+    assert builder.stats()["test_node"]["trimmed_prompts"] == 1
@@ -0,0 +1,70 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Iterator
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.utils import models_initializer
+from src.utils.models_initializer import RateLimitedRunnable
+from src.utils.rate_limiter import Permit
+
+USAGE = {"input_tokens": 900, "output_tokens": 300, "total_tokens": 1200}
+
+
+class UsageReportingModel(BaseChatModel):
+    """
+    Answers "coffee" and reports USAGE, like a provider does (on the final message, or on the last chunk of a stream).
+    """
+
+    @property
+    def _llm_type(self) -> str:
+        return "usage-reporting"
+
+    def _generate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="coffee", usage_metadata=USAGE))])
+
+    def _stream(
+        self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        for token in ["cof", "fee"]:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=USAGE))
+
+
+def record_permits(monkeypatch) -> list[Permit]:
+    permits: list[Permit] = []
+
+    @asynccontextmanager
+    async def slot(provider: str, tokens: float = 0):
+        permit = Permit()
+        permits.append(permit)
+        yield permit
+
+    monkeypatch.setattr(models_initializer.rate_limits, "slot", slot)
+    return permits
+
+
+def test_parsed_output_reports_provider_usage(monkeypatch):
+    permits = record_permits(monkeypatch)
+    # a parser after the model (like with_structured_output) means the output carries no usage itself
+    runnable = RateLimitedRunnable(bound=UsageReportingModel() | StrOutputParser(), provider="openai")
+
+    assert asyncio.run(runnable.ainvoke("Which drink?")) == "coffee"
+    assert permits[0].actual_tokens == USAGE["total_tokens"]
+
+
+def test_streams_report_provider_usage(monkeypatch):
+    permits = record_permits(monkeypatch)
+
+    async def collect(runnable: RateLimitedRunnable) -> list[Any]:
+        return [chunk async for chunk in runnable.astream("Which drink?")]
+
+    parsed = asyncio.run(collect(RateLimitedRunnable(bound=UsageReportingModel() | StrOutputParser(), provider="groq")))
+    raw = asyncio.run(collect(RateLimitedRunnable(bound=UsageReportingModel(), provider="groq")))
+
+    assert "".join(parsed) == "coffee"
+    assert len(raw) == 3
+    assert [permit.actual_tokens for permit in permits] == [USAGE["total_tokens"], USAGE["total_tokens"]]